@@ -1,5 +1,5 @@
 from fastapi import FastAPI
-from .api.routers import router as auth_router
 
 def init_auth(app: FastAPI):
-    app.include_router(auth_router, prefix="/auth", tags=["Auth"])
\ No newline at end of file
+    from .api.routers import router as auth_router  # deferred, so importing app.auth.* stays cheap
+    app.include_router(auth_router, prefix="/auth", tags=["Auth"])
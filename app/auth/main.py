@@ -1,20 +1,56 @@
 # app/auth/main.py
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
-from .api.routers import router as auth_router
 from contextlib import asynccontextmanager
 from common.clients.redis_manager import init_redis, close_redis
+from common.metrics.middleware import init_metrics
+from common.profiling.middleware import init_profiling
+from common.profiling.startup import startup_report
+from common.logging.logger import init_logging
+from common.logging.middleware import init_request_context
+from . import init_auth
+
+startup_report.record("imports", time.perf_counter() - _import_started)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    await init_redis()
+    with startup_report.phase("redis"):
+        await init_redis()
+    startup_report.log()
     yield
     # Shutdown
     await close_redis()
 
-app = FastAPI(title="Auth Service", version="1.0.0", lifespan=lifespan)
-app.include_router(auth_router, prefix="/auth", tags=["Auth"])
+def create_app() -> FastAPI:
+    started = time.perf_counter()
+    init_logging()
+    app = FastAPI(title="Auth Service", version="1.0.0", lifespan=lifespan)
+    init_auth(app)
+    init_metrics(app)
+    init_profiling(app)
+    init_request_context(app)
+
+    @app.get("/health", tags=["health"])
+    async def health_check():
+        return {"status": "ok", "message": "Auth service is running!"}
+
+    @app.get("/health/startup", tags=["health"])
+    async def startup_timings():
+        return startup_report.snapshot()
+
+    startup_report.record("create_app", time.perf_counter() - started)
+    return app
+
+_app = None
 
-@app.get("/health", tags=["health"])
-async def health_check():
-    return {"status": "ok", "message": "Auth service is running!"}
+def __getattr__(name: str):
+    # `uvicorn app.auth.main:app` keeps working; the app is built on first access, not on import
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
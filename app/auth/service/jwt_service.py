@@ -1,4 +1,8 @@
+import hashlib
+import threading
+import time
 import jwt
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from common.config.config import settings
 from common.exceptions.auth_exceptions import AuthError, TokenExpiredError
@@ -9,18 +13,74 @@ class JWTService:
         self.algorithm = settings.JWT_ALGORITHM
         self.expire_minutes = settings.JWT_EXPIRE_MINUTES
 
+        # verified-claims cache: sha256(token) -> (sub, expires_at); never outlives the token's exp
+        self.cache_max_size = settings.JWT_CACHE_MAX_SIZE
+        self.cache_ttl = settings.JWT_CACHE_TTL_SECONDS
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()  # get_current_user is sync, so it runs on the threadpool
+
     def create_token(self, user_id: str) -> str:
         expire = datetime.now(timezone.utc) + timedelta(minutes=self.expire_minutes)
         payload = {"sub": user_id, "exp": expire}
         return jwt.encode(payload, self.secret, algorithm=self.algorithm)
 
     def decode_token(self, token: str) -> str:
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        now = time.time()
+        cached = self._cache_get(digest, now)
+        if cached is not None:
+            return cached
+
         try:
             payload = jwt.decode(token, self.secret, algorithms=[self.algorithm])
-            return payload.get("sub")
         except jwt.ExpiredSignatureError:
             raise TokenExpiredError("Token expired")
         except jwt.PyJWTError:
             raise AuthError("Invalid authentication token")
 
-jwt_service = JWTService()
\ No newline at end of file
+        user_id = payload.get("sub")
+        if user_id:
+            expires_at = now + self.cache_ttl
+            if payload.get("exp") is not None:
+                expires_at = min(expires_at, float(payload["exp"]))
+            self._cache_put(digest, user_id, expires_at)
+        return user_id
+
+    def cache_stats(self) -> dict:
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "size": len(self._cache),
+            "max_size": self.cache_max_size,
+        }
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _cache_get(self, digest: bytes, now: float):
+        with self._cache_lock:
+            entry = self._cache.get(digest)
+            if entry is not None:
+                user_id, expires_at = entry
+                if now < expires_at:
+                    self._cache.move_to_end(digest)
+                    self.cache_hits += 1
+                    return user_id
+                # past exp (or the TTL): fall through so jwt raises the proper error
+                del self._cache[digest]
+            self.cache_misses += 1
+            return None
+
+    def _cache_put(self, digest: bytes, user_id: str, expires_at: float):
+        if self.cache_max_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[digest] = (user_id, expires_at)
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.cache_max_size:
+                self._cache.popitem(last=False)
+
+jwt_service = JWTService()
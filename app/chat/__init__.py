@@ -1,5 +1,56 @@
+from typing import TYPE_CHECKING, Optional
 from fastapi import FastAPI
-from .api.routers import router as chat_router
+
+if TYPE_CHECKING:
+    from .service.chat_service import ChatService
+
+# Submodules are imported inside these functions, so importing the package (which every
+# app.chat.* import does first) stays cheap and the entry point's own import timer sees the cost.
+_session_migrator = None
 
 def init_chat(app: FastAPI):
-    app.include_router(chat_router, prefix="/chat", tags=["Chat"])
\ No newline at end of file
+    from .api.routers import router as chat_router
+    app.include_router(chat_router, prefix="/chat", tags=["Chat"])
+
+def get_chat_service() -> Optional["ChatService"]:
+    """The running chat service, or None before start_chat() (and after stop_chat())."""
+    from .api import routers
+    return routers.chat_service
+
+async def start_chat() -> "ChatService":
+    """Build the chat service and start its background work. Call from the app's lifespan, after init_redis()."""
+    global _session_migrator
+    from common.config.config import settings
+    from common.profiling.startup import startup_report
+    from .api import routers
+    from .metrics import bind_chat_service
+    from .repository.session_migrator import SessionMigrator
+    from .service.chat_service import ChatService
+
+    with startup_report.phase("chat_service"):
+        service = routers.chat_service = ChatService()
+    with startup_report.phase("llm_discovery"):
+        await service.llm.discover_backend()
+    bind_chat_service(service)
+    await service.llm.router.start()
+    await service.llm.model_manager.start()
+    await service.repo.cache.start()
+    if settings.SESSION_MIGRATE_ON_STARTUP:
+        _session_migrator = SessionMigrator(service.repo)
+        await _session_migrator.start()
+    return service
+
+async def stop_chat():
+    global _session_migrator
+    from .api import routers
+    service = routers.chat_service
+    if service is None:
+        return
+    if _session_migrator is not None:
+        await _session_migrator.stop()
+        _session_migrator = None
+    await service.repo.cache.stop()
+    await service.compactor.shutdown()
+    await service.llm.model_manager.stop()
+    await service.llm.router.stop()
+    routers.chat_service = None
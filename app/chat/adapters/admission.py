@@ -0,0 +1,164 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import List
+from app.chat.metrics import LLM_ADMISSION_SHED_TOTAL, LLM_ADMISSION_WAIT_SECONDS
+from common.config.config import settings
+from common.exceptions.chat_exceptions import OverloadedError
+
+# lower value is served first
+INTERACTIVE = 0  # streaming / WebSocket: a user is watching tokens arrive
+STANDARD = 1     # plain REST request/response
+BATCH = 2        # background work such as session compaction
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", STANDARD: "standard", BATCH: "batch"}
+
+_WAIT = {p: LLM_ADMISSION_WAIT_SECONDS.labels(name) for p, name in PRIORITY_NAMES.items()}
+_SHED = {
+    (p, reason): LLM_ADMISSION_SHED_TOTAL.labels(name, reason)
+    for p, name in PRIORITY_NAMES.items() for reason in ("queue_full", "displaced", "timeout")
+}
+
+class AdmissionController:
+    """Caps concurrent LLM calls and queues the overflow by priority.
+
+    At most `max_in_flight` calls run at once. Up to `queue_size` more wait, served
+    by priority and then arrival order. A waiter that is not admitted within its
+    deadline, or that cannot get a queue place, gets OverloadedError (503 with
+    Retry-After) instead of joining a backlog that would make every request
+    slow. When the queue is full, a newcomer may push out a lower-priority waiter.
+    """
+
+    def __init__(self, max_in_flight: int = None, queue_size: int = None, max_wait: float = None):
+        self.max_in_flight = settings.LLM_MAX_IN_FLIGHT_PER_BACKEND if max_in_flight is None else max_in_flight
+        self.queue_size = settings.LLM_ADMISSION_QUEUE_SIZE if queue_size is None else queue_size
+        self.max_wait = settings.LLM_ADMISSION_MAX_WAIT if max_wait is None else max_wait
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._queue: List[list] = []  # heap of [priority, seq, future]
+        self._seq = itertools.count()
+        self._waits = deque(maxlen=1000)  # seconds spent queued, recent admissions
+        self._holds = deque(maxlen=100)   # seconds a slot was held, for Retry-After estimates
+
+    @asynccontextmanager
+    async def slot(self, priority: int = STANDARD, max_wait: float = None):
+        await self.acquire(priority, max_wait)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._holds.append(time.monotonic() - started)
+            self.release()
+
+    async def acquire(self, priority: int = STANDARD, max_wait: float = None):
+        max_wait = self.max_wait if max_wait is None else max_wait
+        if self.in_flight < self.max_in_flight and not self._queue:
+            self.in_flight += 1
+            self._admit(priority, 0.0)
+            return
+
+        if len(self._queue) >= self.queue_size:
+            worst = max(self._queue) if self._queue else None
+            if worst is None or worst[0] <= priority:
+                self.rejected += 1
+                self._shed(priority, "queue_full")
+                raise self._overloaded("LLM queue is full")
+            # make room by shedding the newest, least important waiter
+            self._queue.remove(worst)
+            heapq.heapify(self._queue)
+            self.rejected += 1
+            self._shed(worst[0], "displaced")
+            worst[2].set_exception(self._overloaded("Request displaced by higher-priority traffic"))
+
+        started = time.monotonic()
+        fut = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), fut]
+        heapq.heappush(self._queue, entry)
+        try:
+            done, _ = await asyncio.wait((fut,), timeout=max_wait)
+        except asyncio.CancelledError:
+            self._abandon(entry)
+            raise
+        if not done:
+            self._abandon(entry)
+            self.timed_out += 1
+            self._shed(priority, "timeout")
+            raise self._overloaded("Timed out waiting for LLM capacity")
+        fut.result()  # raises if this waiter was displaced
+        self._admit(priority, time.monotonic() - started)
+
+    def release(self):
+        # hand the slot straight to the next waiter, so in_flight never dips and lets a newcomer jump the queue
+        while self._queue:
+            _, _, fut = heapq.heappop(self._queue)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": len(self._queue),
+            "queue_size": self.queue_size,
+            "queued_by_priority": {
+                name: sum(1 for entry in self._queue if entry[0] == p) for p, name in PRIORITY_NAMES.items()
+            },
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_p50_ms": round(self._percentile(waits, 0.50) * 1000, 1),
+            "wait_p95_ms": round(self._percentile(waits, 0.95) * 1000, 1),
+            "wait_max_ms": round((waits[-1] if waits else 0.0) * 1000, 1),
+        }
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, from recent slot hold times."""
+        hold = sum(self._holds) / len(self._holds) if self._holds else 1.0
+        return max(1, math.ceil(hold * (len(self._queue) + 1) / max(1, self.max_in_flight)))
+
+    def _abandon(self, entry: list):
+        fut = entry[2]
+        if fut.done() and not fut.cancelled() and fut.exception() is None:
+            # admitted in the same instant we gave up: pass the slot on
+            self.release()
+            return
+        fut.cancel()
+        try:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+        except ValueError:
+            pass
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def _admit(self, priority: int, waited: float):
+        self.admitted += 1
+        self._waits.append(waited)
+        child = _WAIT.get(priority)
+        if child is not None:
+            child.observe(waited)
+
+    def _shed(self, priority: int, reason: str):
+        child = _SHED.get((priority, reason))
+        if child is not None:
+            child.inc()
+
+    def _overloaded(self, detail: str) -> OverloadedError:
+        return OverloadedError(f"LLM service overloaded: {detail}", headers={"Retry-After": str(self.retry_after())})
+
+    @staticmethod
+    def _percentile(ordered: List[float], q: float) -> float:
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
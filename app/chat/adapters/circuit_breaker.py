@@ -0,0 +1,143 @@
+import math
+import random
+import time
+from collections import deque
+import httpx
+from common.config.config import settings
+from common.exceptions.chat_exceptions import CircuitOpenError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+def is_retryable(error: Exception) -> bool:
+    """Transport failures and overload/5xx statuses are worth retrying; 4xx caller errors are not."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, httpx.TransportError)
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter, so retrying clients do not move in lockstep."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class RetryBudget:
+    """Caps retries to a fraction of traffic: each call earns `ratio` of a retry, each retry spends one."""
+
+    def __init__(self, ratio: float = None, capacity: float = None):
+        self.ratio = settings.LLM_RETRY_BUDGET_RATIO if ratio is None else ratio
+        self.capacity = settings.LLM_RETRY_BUDGET_CAPACITY if capacity is None else capacity
+        self.tokens = self.capacity
+
+    def deposit(self):
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a rolling window of call outcomes.
+
+    The circuit opens when, over the last `window_seconds` and at least `min_calls`
+    calls, the error rate or the share of calls slower than `slow_call_seconds`
+    crosses its threshold. After `open_seconds` it lets `half_open_calls` trial
+    calls through: one failure re-opens it, all succeeding closes it.
+    """
+
+    def __init__(self, window_seconds: float = None, min_calls: int = None, error_rate: float = None,
+                 slow_call_seconds: float = None, slow_call_rate: float = None, open_seconds: float = None,
+                 half_open_calls: int = None):
+        self.window_seconds = settings.LLM_BREAKER_WINDOW_SECONDS if window_seconds is None else window_seconds
+        self.min_calls = settings.LLM_BREAKER_MIN_CALLS if min_calls is None else min_calls
+        self.error_rate = settings.LLM_BREAKER_ERROR_RATE if error_rate is None else error_rate
+        self.slow_call_seconds = settings.LLM_BREAKER_SLOW_CALL_SECONDS if slow_call_seconds is None else slow_call_seconds
+        self.slow_call_rate = settings.LLM_BREAKER_SLOW_CALL_RATE if slow_call_rate is None else slow_call_rate
+        self.open_seconds = settings.LLM_BREAKER_OPEN_SECONDS if open_seconds is None else open_seconds
+        self.half_open_calls = settings.LLM_BREAKER_HALF_OPEN_CALLS if half_open_calls is None else half_open_calls
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._outcomes = deque()  # (timestamp, failed, slow)
+        self._trials = 0
+        self._trial_successes = 0
+
+    def allow(self):
+        """Raise CircuitOpenError instead of letting a call through to a backend that is down."""
+        now = time.monotonic()
+        if self.state == OPEN:
+            remaining = self.opened_at + self.open_seconds - now
+            if remaining > 0:
+                raise CircuitOpenError(
+                    "LLM service unavailable (circuit open)",
+                    headers={"Retry-After": str(max(1, math.ceil(remaining)))},
+                )
+            self.state = HALF_OPEN
+            self._trials = 0
+            self._trial_successes = 0
+        if self.state == HALF_OPEN:
+            if self._trials >= self.half_open_calls:
+                raise CircuitOpenError("LLM service unavailable (circuit half-open)", headers={"Retry-After": "1"})
+            self._trials += 1
+
+    def record_success(self, latency: float):
+        if self.state == HALF_OPEN:
+            self._trial_successes += 1
+            if self._trial_successes >= self.half_open_calls:
+                self._close()
+            return
+        self._record(failed=False, slow=latency >= self.slow_call_seconds)
+
+    def record_failure(self):
+        if self.state == HALF_OPEN:
+            self._open()
+            return
+        self._record(failed=True, slow=False)
+
+    def record_ignored(self):
+        """The call ended without saying anything about backend health (e.g. a 4xx): free its trial slot."""
+        if self.state == HALF_OPEN and self._trials > 0:
+            self._trials -= 1
+
+    def snapshot(self) -> dict:
+        self._evict(time.monotonic())
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "calls_in_window": calls,
+            "error_rate": round(sum(1 for _, failed, _ in self._outcomes if failed) / calls, 3) if calls else 0.0,
+            "slow_call_rate": round(sum(1 for _, _, slow in self._outcomes if slow) / calls, 3) if calls else 0.0,
+            "times_opened": self.times_opened,
+        }
+
+    def _record(self, failed: bool, slow: bool):
+        now = time.monotonic()
+        self._outcomes.append((now, failed, slow))
+        self._evict(now)
+        calls = len(self._outcomes)
+        if self.state != CLOSED or calls < self.min_calls:
+            return
+        failures = sum(1 for _, f, _ in self._outcomes if f)
+        slow_calls = sum(1 for _, _, s in self._outcomes if s)
+        if failures / calls >= self.error_rate or slow_calls / calls >= self.slow_call_rate:
+            self._open()
+
+    def _evict(self, now: float):
+        horizon = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < horizon:
+            self._outcomes.popleft()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+
+    def _close(self):
+        self.state = CLOSED
+        self._outcomes.clear()
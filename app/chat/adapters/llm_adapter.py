@@ -1,64 +1,265 @@
-import socket
 import json
 from typing import List, AsyncGenerator
-import httpx
 import asyncio
 import logging
+import time
+import httpx
+from app.chat.adapters.admission import STANDARD, AdmissionController
+from app.chat.adapters.circuit_breaker import (
+    RETRYABLE_STATUS, CircuitBreaker, RetryBudget, backoff_delay, is_retryable,
+)
+from app.chat.adapters.llm_router import Backend, LLMRouter
+from app.chat.adapters.model_manager import ModelManager
+from app.chat.adapters.prompt_builder import PromptBuilder, prompt_builder
+from app.chat.adapters.response_cache import ResponseCache, response_cache
+from app.chat.adapters.single_flight import SingleFlight, request_key, single_flight
+from app.chat.metrics import (
+    LLM_ERRORS_TOTAL, LLM_REQUEST_SECONDS, LLM_TIME_TO_FIRST_TOKEN_SECONDS, LLM_TOKENS_PER_SECOND, LLM_TOKENS_TOTAL,
+)
 from app.chat.models.chat_models import ChatMessage
+from common.clients.http_manager import get_http_client
+from common.serialization.serializer import serializer
+from common.config.config import settings
 from common.exceptions.chat_exceptions import LLMError
 
 logger = logging.getLogger(__name__)
 
-def get_llm_base_url():
+DOCKER_HOST_LLM_URL = "http://host.docker.internal:11434/api/chat"
+LOCAL_LLM_URL = "http://localhost:11434/api/chat"
+
+async def discover_llm_base_url(timeout: float = None) -> str:
+    """The Docker host's Ollama when host.docker.internal resolves (we run in a container), else localhost.
+
+    Resolved through the event loop's resolver with a deadline, so a slow or
+    unreachable DNS server costs at most `timeout` seconds and never blocks the loop.
+    """
+    timeout = settings.LLM_DISCOVERY_TIMEOUT if timeout is None else timeout
     try:
-        socket.gethostbyname("host.docker.internal")
-        return "http://host.docker.internal:11434/api/chat"
-    except socket.gaierror:
-        return "http://localhost:11434/api/chat"
+        await asyncio.wait_for(asyncio.get_running_loop().getaddrinfo("host.docker.internal", None), timeout)
+        return DOCKER_HOST_LLM_URL
+    except (OSError, asyncio.TimeoutError):  # socket.gaierror is an OSError
+        return LOCAL_LLM_URL
 
 class LLMAdapter:
-    def __init__(self, base_url=None, model="gemma3:1b", retries=3):
-        self.base_url = base_url or get_llm_base_url()
-        self.model = model
+    def __init__(self, base_url=None, model=None, retries=3, cache: ResponseCache = None,
+                 coalescer: SingleFlight = None, builder: PromptBuilder = None, router: LLMRouter = None,
+                 breaker: CircuitBreaker = None, retry_budget: RetryBudget = None,
+                 admission: AdmissionController = None, model_manager: ModelManager = None):
+        # nothing configured: start on localhost and let discover_backend() look for the Docker host at startup
+        self.discover = router is None and not base_url and not settings.LLM_BACKENDS
+        if router is None:
+            urls = [base_url] if base_url else (settings.LLM_BACKENDS or [LOCAL_LLM_URL])
+            router = LLMRouter(urls)
+        self.router = router
+        self.base_url = router.backends[0].url
+        self.model = model or settings.LLM_MODEL
         self.retries = retries
+        self.cache = cache or response_cache
+        self.coalescer = coalescer or (single_flight if settings.LLM_COALESCE_REQUESTS else None)
+        self.prompt_builder = builder or prompt_builder
+        self.breaker = breaker or CircuitBreaker()
+        self.retry_budget = retry_budget or RetryBudget()
+        self.admission = admission or AdmissionController(
+            max_in_flight=settings.LLM_MAX_IN_FLIGHT_PER_BACKEND * len(router.backends)
+        )
+        self.model_manager = model_manager or ModelManager(
+            router, models=settings.LLM_WARMUP_MODELS or [self.model]
+        )
+        self._generate_seconds = LLM_REQUEST_SECONDS.labels(self.model, "generate")
+        self._stream_seconds = LLM_REQUEST_SECONDS.labels(self.model, "stream")
+        self._generate_errors = LLM_ERRORS_TOTAL.labels(self.model, "generate")
+        self._stream_errors = LLM_ERRORS_TOTAL.labels(self.model, "stream")
+        self._ttft_seconds = LLM_TIME_TO_FIRST_TOKEN_SECONDS.labels(self.model)
+        self._tokens_per_second = LLM_TOKENS_PER_SECOND.labels(self.model)
+        self._tokens_total = LLM_TOKENS_TOTAL.labels(self.model)
+
+    async def discover_backend(self):
+        """Call once at startup, before the router and model manager start."""
+        if not self.discover:
+            return
+        url = await discover_llm_base_url()
+        if url != self.router.backends[0].url:
+            self.router.backends = [Backend(url)]
+            self.base_url = url
+        logger.info(f"[LLMAdapter] Using LLM backend {self.base_url}")
+
+    async def generate(self, message: str, history: List[ChatMessage], priority: int = STANDARD) -> str:
+        messages = self._build_messages(history, message)
+        if self.cache.enabled_for(self.model):
+            cached = await self.cache.get(self.model, messages)
+            if cached is not None:
+                return cached
+
+        # cache hits and coalesced followers never take an admission slot; only real upstream calls do
+        if self.coalescer is None:
+            return await self._generate(messages, priority)
+        return await self.coalescer.do(request_key(self.model, messages), lambda: self._generate(messages, priority))
+
+    async def stream_generate(self, message: str, history: List[ChatMessage],
+                              priority: int = STANDARD) -> AsyncGenerator[str, None]:
+        messages = self._build_messages(history, message)
+        if self.cache.enabled_for(self.model):
+            cached = await self.cache.get(self.model, messages)
+            if cached is not None:
+                for chunk in self.cache.replay(cached):
+                    yield chunk
+                return
+
+        if self.coalescer is None:
+            tokens = self._stream(messages, priority)
+        else:
+            tokens = self.coalescer.stream(request_key(self.model, messages), lambda: self._stream(messages, priority))
+        async for token in tokens:
+            yield token
+
+    async def _generate(self, messages: List[dict], priority: int = STANDARD) -> str:
+        async with self.admission.slot(priority):
+            started = time.perf_counter()
+            try:
+                reply = await self._generate_admitted(messages)
+            except Exception:
+                self._generate_errors.inc()
+                raise
+            self._generate_seconds.observe(time.perf_counter() - started)
+            return reply
 
-    async def generate(self, message: str, history: List[ChatMessage]) -> str:
-        payload = {"model": self.model, "messages": self._build_messages(history, message), "stream": False}
-        for attempt in range(self.retries):
+    async def _generate_admitted(self, messages: List[dict]) -> str:
+        use_cache = self.cache.enabled_for(self.model)
+        payload = {"model": self.model, "messages": messages, "stream": False, "keep_alive": settings.LLM_KEEP_ALIVE}
+        client = await get_http_client()
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            self.breaker.allow()
+            started = time.monotonic()
             try:
-                async with httpx.AsyncClient(timeout=60) as client:
-                    resp = await client.post(self.base_url, json=payload)
-                    resp.raise_for_status()
-                    data = resp.json()
-                    return data.get("message", {}).get("content", "")
-            except Exception as e:
-                logger.warning(f"[LLMAdapter] Attempt {attempt+1} failed: {e}")
-                await asyncio.sleep(1)
-        raise LLMError("LLM service unavailable after retries")  # ✅ use custom exception
-
-    async def stream_generate(self, message: str, history: List[ChatMessage]) -> AsyncGenerator[str, None]:
-        payload = {"model": self.model, "messages": self._build_messages(history, message), "stream": True}
+                reply = await self._post(client, payload)
+            except (httpx.HTTPError, ValueError) as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_ignored()
+                attempt += 1
+                logger.warning("[LLMAdapter] Attempt %d failed: %s", attempt, e)
+                if not retryable:
+                    raise LLMError(f"LLM request failed: {e}")
+                if attempt >= self.retries or not self.retry_budget.withdraw():
+                    raise LLMError("LLM service unavailable after retries")  # ✅ use custom exception
+                await asyncio.sleep(backoff_delay(attempt - 1, settings.LLM_RETRY_BASE_DELAY, settings.LLM_RETRY_MAX_DELAY))
+                continue
+            except BaseException:
+                self.breaker.record_ignored()
+                raise
+
+            self.breaker.record_success(time.monotonic() - started)
+            if use_cache:
+                await self.cache.set(self.model, messages, reply)
+            return reply
+
+    async def _post(self, client, payload: dict) -> str:
+        backend = self.router.pick()
+        delay = self.router.hedge_delay()
+        if delay is None:
+            return await self._post_to(client, backend, payload)
+
+        # hedge: if the first backend is slower than the recent p95, race a second one
+        primary = asyncio.ensure_future(self._post_to(client, backend, payload))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        try:
+            other = self.router.pick(exclude=[backend])
+        except LLMError:
+            return await primary
+        pending = {primary, asyncio.ensure_future(self._post_to(client, other, payload))}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _post_to(self, client, backend: Backend, payload: dict) -> str:
+        async with self.router.lease(backend, track_latency=True):
+            resp = await client.post(backend.url, json=payload)
+            resp.raise_for_status()
+            data = resp.json()
+            return data.get("message", {}).get("content", "")
+
+    async def _stream(self, messages: List[dict], priority: int = STANDARD) -> AsyncGenerator[str, None]:
+        # the slot is held for the whole stream and freed when the generator closes
+        async with self.admission.slot(priority):
+            async for token in self._stream_admitted(messages):
+                yield token
+
+    async def _stream_admitted(self, messages: List[dict]) -> AsyncGenerator[str, None]:
+        use_cache = self.cache.enabled_for(self.model)
+        payload = {"model": self.model, "messages": messages, "stream": True, "keep_alive": settings.LLM_KEEP_ALIVE}
+        tokens = []
+        self.breaker.allow()
+        started = time.monotonic()
+        first_token_latency = None
+        count = 0
+        outcome = None  # "ok" | "failed" | None (no verdict on backend health)
         try:
-            async with httpx.AsyncClient(timeout=None) as client:
-                async with client.stream("POST", self.base_url, json=payload) as response:
-                    if response.status_code != 200:
-                        text = await response.aread()
-                        raise LLMError(f"HTTP {response.status_code}: {text.decode()}")
-
-                    async for line in response.aiter_lines():
-                        if not line.strip():
-                            continue
-                        try:
-                            data = json.loads(line)
-                            if data.get("done"):
-                                break
-                            token = data.get("message", {}).get("content", "")
-                            if token:
-                                yield token
-                        except json.JSONDecodeError:
-                            continue
+            client = await get_http_client()
+            backend = self.router.pick()
+            async with self.router.lease(backend), client.stream("POST", backend.url, json=payload) as response:
+                if response.status_code != 200:
+                    text = await response.aread()
+                    if response.status_code in RETRYABLE_STATUS:
+                        outcome = "failed"
+                        self.router.record_failure(backend)
+                    raise LLMError(f"HTTP {response.status_code}: {text.decode()}")
+
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    try:
+                        data = serializer.loads(line)
+                        if data.get("done"):
+                            break
+                        token = data.get("message", {}).get("content", "")
+                        if token:
+                            count += 1
+                            if first_token_latency is None:
+                                first_token_latency = time.monotonic() - started
+                                self._ttft_seconds.observe(first_token_latency)
+                            if use_cache:
+                                tokens.append(token)
+                            yield token
+                    except json.JSONDecodeError:
+                        continue
+            outcome = "ok"
         except Exception as e:
+            self._stream_errors.inc()
+            if is_retryable(e):
+                outcome = "failed"
             raise LLMError(f"LLM streaming failed: {e}")
+        finally:
+            self._tokens_total.inc(count)
+            if outcome == "ok":
+                elapsed = time.monotonic() - started
+                self._stream_seconds.observe(elapsed)
+                if count > 1 and elapsed > first_token_latency:
+                    self._tokens_per_second.observe((count - 1) / (elapsed - first_token_latency))
+                # time-to-first-token is what a streaming user waits on, so that is what counts as slow
+                self.breaker.record_success(first_token_latency if first_token_latency is not None else time.monotonic() - started)
+            elif outcome == "failed":
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_ignored()
+
+        # only complete replies are cached; an aborted stream never reaches this point
+        if use_cache:
+            await self.cache.set(self.model, messages, "".join(tokens))
 
     def _build_messages(self, history: List[ChatMessage], message: str):
-        return [{"role": m.role, "content": m.content} for m in history] + [{"role": "user", "content": message}]
+        return self.prompt_builder.build(self.model, history, message)
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Iterable, List, Optional
+import httpx
+from app.chat.adapters.circuit_breaker import is_retryable
+from common.clients.http_manager import get_http_client
+from common.config.config import settings
+from common.exceptions.chat_exceptions import LLMError
+
+logger = logging.getLogger(__name__)
+
+class Backend:
+    """One Ollama endpoint plus the live stats the router balances on."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.probe_url = str(httpx.URL(url).copy_with(path="/api/tags", query=None))
+        self.in_flight = 0
+        self.ewma_latency = 0.0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.readmitted_at = 0.0
+
+    def weight(self, now: float, ramp_seconds: float) -> float:
+        """Share of normal traffic a re-admitted backend may take while it warms back up."""
+        if not self.readmitted_at or ramp_seconds <= 0:
+            return 1.0
+        return min(1.0, 0.1 + (now - self.readmitted_at) / ramp_seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 1),
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class LLMRouter:
+    """Least-outstanding-requests balancing over a pool of LLM backends.
+
+    Backends that fail LLM_BACKEND_FAILURE_THRESHOLD times in a row (requests or
+    health probes) are ejected for LLM_BACKEND_EJECTION_SECONDS; once a probe
+    succeeds again they are re-admitted with a traffic weight that ramps up over
+    LLM_BACKEND_RAMP_SECONDS. Ties on load go to the lower recent latency.
+    """
+
+    def __init__(self, urls: List[str], probe_interval: float = None, probe_timeout: float = None,
+                 failure_threshold: int = None, ejection_seconds: float = None, ramp_seconds: float = None,
+                 hedge: bool = None, hedge_min_samples: int = None):
+        if not urls:
+            raise ValueError("LLMRouter needs at least one backend URL")
+        self.backends = [Backend(url) for url in urls]
+        self.probe_interval = settings.LLM_HEALTH_PROBE_INTERVAL if probe_interval is None else probe_interval
+        self.probe_timeout = settings.LLM_HEALTH_PROBE_TIMEOUT if probe_timeout is None else probe_timeout
+        self.failure_threshold = settings.LLM_BACKEND_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        self.ejection_seconds = settings.LLM_BACKEND_EJECTION_SECONDS if ejection_seconds is None else ejection_seconds
+        self.ramp_seconds = settings.LLM_BACKEND_RAMP_SECONDS if ramp_seconds is None else ramp_seconds
+        self.hedge = settings.LLM_HEDGE_REQUESTS if hedge is None else hedge
+        self.hedge_min_samples = settings.LLM_HEDGE_MIN_SAMPLES if hedge_min_samples is None else hedge_min_samples
+        self._latencies = deque(maxlen=500)  # recent non-streaming request durations, for p95
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def pick(self, exclude: Iterable[Backend] = ()) -> Backend:
+        now = time.monotonic()
+        excluded = set(id(b) for b in exclude)
+        candidates = [b for b in self.backends if b.healthy and id(b) not in excluded]
+        if not candidates:
+            # everything is ejected: try the one that has been out the longest rather than fail outright
+            candidates = [b for b in self.backends if id(b) not in excluded]
+            if not candidates:
+                raise LLMError("No LLM backend available")
+            return min(candidates, key=lambda b: b.ejected_until)
+        return min(
+            candidates,
+            key=lambda b: ((b.in_flight + 1) / b.weight(now, self.ramp_seconds), b.ewma_latency),
+        )
+
+    @asynccontextmanager
+    async def lease(self, backend: Backend, track_latency: bool = False):
+        backend.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield backend
+        except Exception as e:
+            # only transport errors and 5xx/overload say anything about the backend's health
+            if is_retryable(e):
+                self.record_failure(backend)
+            raise
+        else:
+            self.record_success(backend, time.monotonic() - started, track_latency)
+        finally:
+            backend.in_flight -= 1
+
+    def record_success(self, backend: Backend, latency: float, track_latency: bool = False):
+        backend.consecutive_failures = 0
+        backend.ewma_latency = latency if not backend.ewma_latency else 0.7 * backend.ewma_latency + 0.3 * latency
+        if track_latency:
+            self._latencies.append(latency)
+
+    def record_failure(self, backend: Backend):
+        backend.consecutive_failures += 1
+        if backend.healthy and backend.consecutive_failures >= self.failure_threshold:
+            backend.healthy = False
+            backend.ejected_until = time.monotonic() + self.ejection_seconds
+            logger.warning(f"[LLMRouter] Ejecting backend {backend.url} after {backend.consecutive_failures} failures")
+
+    def hedge_delay(self) -> Optional[float]:
+        """p95 of recent latencies, or None when hedging is off or there is too little data."""
+        if not self.hedge or len(self.backends) < 2 or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+    async def probe(self, backend: Backend):
+        now = time.monotonic()
+        if not backend.healthy and now < backend.ejected_until:
+            return
+        try:
+            client = await get_http_client()
+            resp = await client.get(backend.probe_url, timeout=self.probe_timeout)
+            resp.raise_for_status()
+        except Exception as e:
+            logger.debug(f"[LLMRouter] Probe failed for {backend.url}: {e}")
+            if not backend.healthy:
+                backend.ejected_until = now + self.ejection_seconds
+            else:
+                self.record_failure(backend)
+            return
+
+        if not backend.healthy:
+            logger.info(f"[LLMRouter] Re-admitting backend {backend.url}")
+            backend.healthy = True
+            backend.readmitted_at = now
+        backend.consecutive_failures = 0
+
+    async def start(self):
+        if self._probe_task is None and self.probe_interval > 0:
+            self._probe_task = asyncio.ensure_future(self._probe_loop())
+
+    async def stop(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            await asyncio.gather(self._probe_task, return_exceptions=True)
+            self._probe_task = None
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.gather(*(self.probe(b) for b in self.backends))
+            await asyncio.sleep(self.probe_interval)
+
+    def snapshot(self) -> List[dict]:
+        return [b.snapshot() for b in self.backends]
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from app.chat.adapters.llm_router import LLMRouter
+from common.clients.http_manager import get_http_client
+from common.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ModelManager:
+    """Loads the configured models on every backend before traffic arrives, and keeps them loaded.
+
+    On start it sends each backend an empty chat request per model (Ollama's way
+    of loading a model without generating anything), then repeats that every
+    `refresh_interval` seconds with `keep_alive` so the model is never unloaded
+    for being idle. The service is ready once every model is warm on at least
+    one backend.
+    """
+
+    def __init__(self, router: LLMRouter, models: List[str] = None, keep_alive: str = None,
+                 refresh_interval: float = None, timeout: float = None, retry_interval: float = 5.0):
+        self.router = router
+        self.models = list(models or settings.LLM_WARMUP_MODELS or [settings.LLM_MODEL])
+        self.keep_alive = settings.LLM_KEEP_ALIVE if keep_alive is None else keep_alive
+        self.refresh_interval = settings.LLM_KEEP_ALIVE_INTERVAL if refresh_interval is None else refresh_interval
+        self.timeout = settings.LLM_WARMUP_TIMEOUT if timeout is None else timeout
+        self.retry_interval = retry_interval
+        self._status: Dict[Tuple[str, str], dict] = {}  # (backend url, model) -> last warm-up result
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return all(
+            any(self._status.get((b.url, model), {}).get("warm") for b in self.router.backends)
+            for model in self.models
+        )
+
+    async def warm(self, url: str, model: str) -> bool:
+        started = time.monotonic()
+        try:
+            client = await get_http_client()
+            resp = await client.post(
+                url,
+                json={"model": model, "messages": [], "keep_alive": self.keep_alive, "stream": False},
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+        except Exception as e:
+            logger.warning(f"[ModelManager] Warm-up of '{model}' on {url} failed: {e}")
+            self._status[(url, model)] = {"warm": False, "error": str(e), "at": time.time()}
+            return False
+
+        elapsed = time.monotonic() - started
+        was_warm = self._status.get((url, model), {}).get("warm")
+        self._status[(url, model)] = {"warm": True, "load_ms": round(elapsed * 1000, 1), "at": time.time()}
+        if not was_warm:
+            logger.info(f"[ModelManager] '{model}' ready on {url} after {elapsed:.1f}s")
+        return True
+
+    async def warm_all(self) -> bool:
+        await asyncio.gather(*(self.warm(b.url, m) for b in self.router.backends for m in self.models))
+        return self.ready
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            all_warm = await self.warm_all() and all(s.get("warm") for s in self._status.values())
+            if self.refresh_interval <= 0 and all_warm:
+                return
+            # until everything is loaded, retry quickly; after that, just keep the models resident
+            await asyncio.sleep(self.refresh_interval if all_warm and self.refresh_interval > 0 else self.retry_interval)
+
+    def snapshot(self) -> dict:
+        return {
+            "ready": self.ready,
+            "models": self.models,
+            "keep_alive": self.keep_alive,
+            "backends": [
+                {"url": url, "model": model, **status} for (url, model), status in sorted(self._status.items())
+            ],
+        }
@@ -0,0 +1,43 @@
+from typing import Dict, List
+from app.chat.models.chat_models import ChatMessage, estimate_tokens
+from common.config.config import settings
+
+class PromptBuilder:
+    """Selects as much recent history as fits the model's prompt token budget.
+
+    History is walked newest-first using the token count stored on each message,
+    so nothing is re-tokenized per turn. The current user message is always sent,
+    exactly once, even when it was already appended to the stored history, and a
+    leading system message (the rolling conversation summary) is kept ahead of
+    any other history.
+    """
+
+    def __init__(self, default_budget: int = None, model_budgets: Dict[str, int] = None):
+        self.default_budget = settings.LLM_PROMPT_TOKEN_BUDGET if default_budget is None else default_budget
+        self.model_budgets = settings.LLM_MODEL_TOKEN_BUDGETS if model_budgets is None else model_budgets
+
+    def budget_for(self, model: str) -> int:
+        return self.model_budgets.get(model, self.default_budget)
+
+    def build(self, model: str, history: List[ChatMessage], message: str) -> List[Dict[str, str]]:
+        if history and history[-1].role == "user" and history[-1].content == message:
+            history = history[:-1]
+
+        remaining = self.budget_for(model) - estimate_tokens(message)
+        pinned = []
+        if history and history[0].role == "system" and history[0].tokens <= remaining:
+            pinned = [{"role": history[0].role, "content": history[0].content}]
+            remaining -= history[0].tokens
+            history = history[1:]
+
+        selected = []
+        for m in reversed(history):
+            remaining -= m.tokens
+            if remaining < 0:
+                break
+            selected.append({"role": m.role, "content": m.content})
+        selected.reverse()
+        selected.append({"role": "user", "content": message})
+        return pinned + selected
+
+prompt_builder = PromptBuilder()
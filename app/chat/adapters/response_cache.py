@@ -0,0 +1,120 @@
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+from common.clients.redis_manager import get_redis
+from common.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_REPLAY_CHUNK = re.compile(r"\s*\S+\s*")
+
+class ResponseCache:
+    """Exact-match cache of LLM replies: an in-process LRU (L1) in front of Redis (L2).
+
+    Keys hash the model name with the normalized message list, so "Hi " and "hi"
+    share an entry. Only models listed in LLM_CACHE_MODELS are cached, and cache
+    failures are never surfaced to the caller, they just count as a miss.
+    """
+
+    def __init__(
+        self,
+        models: List[str] = None,
+        ttl: int = None,
+        max_entries: int = None,
+        max_bytes: int = None,
+        max_reply_bytes: int = None,
+        prefix: str = "llm_cache:",
+    ):
+        self.models = set(settings.LLM_CACHE_MODELS if models is None else models)
+        self.ttl = settings.LLM_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.max_entries = settings.LLM_CACHE_L1_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = settings.LLM_CACHE_L1_MAX_BYTES if max_bytes is None else max_bytes
+        self.max_reply_bytes = settings.LLM_CACHE_MAX_REPLY_BYTES if max_reply_bytes is None else max_reply_bytes
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self._l1: "OrderedDict[str, tuple]" = OrderedDict()  # digest -> (reply, size, expires_at)
+        self._l1_bytes = 0
+
+    def enabled_for(self, model: str) -> bool:
+        return model in self.models
+
+    def key(self, model: str, messages: List[Dict[str, str]]) -> str:
+        normalized = [[m["role"], _WHITESPACE.sub(" ", m["content"]).strip().casefold()] for m in messages]
+        raw = json.dumps([model, normalized], separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, model: str, messages: List[Dict[str, str]]) -> Optional[str]:
+        digest = self.key(model, messages)
+        reply = self._l1_get(digest)
+        if reply is None:
+            try:
+                redis = await get_redis()
+                reply = await redis.get(f"{self.prefix}{model}:{digest}")
+            except Exception as e:
+                logger.warning(f"[ResponseCache] Redis lookup failed: {e}")
+                reply = None
+            if reply is not None:
+                self._l1_put(digest, reply)
+
+        if reply is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return reply
+
+    async def set(self, model: str, messages: List[Dict[str, str]], reply: str):
+        if not reply or len(reply.encode("utf-8")) > self.max_reply_bytes:
+            return
+        digest = self.key(model, messages)
+        self._l1_put(digest, reply)
+        try:
+            redis = await get_redis()
+            await redis.set(f"{self.prefix}{model}:{digest}", reply, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"[ResponseCache] Redis store failed: {e}")
+
+    def replay(self, reply: str) -> Iterator[str]:
+        """Split a cached reply back into word-sized chunks for streaming clients."""
+        return iter(_REPLAY_CHUNK.findall(reply) or [reply])
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "l1_entries": len(self._l1),
+            "l1_bytes": self._l1_bytes,
+        }
+
+    def _l1_get(self, digest: str) -> Optional[str]:
+        entry = self._l1.get(digest)
+        if entry is None:
+            return None
+        reply, size, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._l1_evict(digest)
+            return None
+        self._l1.move_to_end(digest)
+        return reply
+
+    def _l1_put(self, digest: str, reply: str):
+        size = len(reply.encode("utf-8"))
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        if digest in self._l1:
+            self._l1_evict(digest)
+        self._l1[digest] = (reply, size, time.monotonic() + self.ttl)
+        self._l1_bytes += size
+        while len(self._l1) > self.max_entries or self._l1_bytes > self.max_bytes:
+            self._l1_evict(next(iter(self._l1)))
+
+    def _l1_evict(self, digest: str):
+        _, size, _ = self._l1.pop(digest)
+        self._l1_bytes -= size
+
+response_cache = ResponseCache()
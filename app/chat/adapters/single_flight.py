@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+def request_key(model: str, messages: List[Dict[str, str]]) -> str:
+    """Exact identity of an upstream request: same model and byte-identical messages."""
+    raw = json.dumps([model, messages], separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _StreamBroadcast:
+    """Pumps one upstream token stream into a buffer that any number of subscribers replay."""
+
+    def __init__(self, source: AsyncIterator[str], on_done: Callable[[], None]):
+        self.tokens: List[str] = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self._on_done = on_done
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[str]):
+        try:
+            async for token in source:
+                self.tokens.append(token)
+                self._notify()
+        except asyncio.CancelledError:
+            self.error = asyncio.CancelledError()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._on_done()
+            self._notify()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def subscribe(self) -> AsyncGenerator[str, None]:
+        self.subscribers += 1
+        index = 0
+        try:
+            while True:
+                # late joiners start at 0, so they first get a replay of everything emitted so far
+                while index < len(self.tokens):
+                    yield self.tokens[index]
+                    index += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                # every client went away: stop generating tokens nobody will read
+                self.task.cancel()
+
+
+class SingleFlight:
+    """Collapses concurrent identical LLM requests onto one upstream call."""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._streams: Dict[str, _StreamBroadcast] = {}
+        self.shared_calls = 0
+        self.shared_streams = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.shared_calls += 1
+        # shield: one caller being cancelled must not cancel the call the others wait on
+        return await asyncio.shield(task)
+
+    async def stream(self, key: str, fn: Callable[[], AsyncIterator[str]]) -> AsyncGenerator[str, None]:
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _StreamBroadcast(fn(), on_done=lambda: self._streams.pop(key, None))
+            self._streams[key] = broadcast
+        else:
+            self.shared_streams += 1
+        async for token in broadcast.subscribe():
+            yield token
+
+    def stats(self) -> dict:
+        return {
+            "in_flight_calls": len(self._calls),
+            "in_flight_streams": len(self._streams),
+            "shared_calls": self.shared_calls,
+            "shared_streams": self.shared_streams,
+        }
+
+single_flight = SingleFlight()
@@ -1,13 +1,13 @@
 from app.auth.service.auth_service import get_current_user
 from fastapi import APIRouter, WebSocket, Query, Depends
 from fastapi.responses import StreamingResponse
-from typing import Optional
+from typing import AsyncIterator, Optional
 from app.chat.service.chat_service import ChatService
 from app.chat.models.chat_models import ChatRequest
 from app.chat.service.rate_limiter_service import rate_limiter
 
 router = APIRouter()
-chat_service = ChatService()
+chat_service: Optional[ChatService] = None  # built by app.chat.start_chat in the app's lifespan, not at import
 
 # REST API - Non-streaming / Streaming
 @router.post("/message")
@@ -18,11 +18,24 @@ async def send_message(
     _ = Depends(rate_limiter)
 ):
     if stream:
-        generator = chat_service.stream_message(user_id=request.user_id, message=request.message)
-        return StreamingResponse(generator, media_type="application/json")
+        generator = chat_service.stream_message(
+            user_id=request.user_id, message=request.message, coalesce=request.coalesce
+        )
+        # pull the first frame before committing to a 200, so overload and LLM errors still map to a 503
+        try:
+            first = await generator.__anext__()
+        except StopAsyncIteration:
+            first = None
+        return StreamingResponse(_prepend(first, generator), media_type="application/json")
     else:
         return await chat_service.handle_message(user_id=request.user_id, message=request.message)
 
+async def _prepend(first, generator: AsyncIterator):
+    if first is not None:
+        yield first
+    async for chunk in generator:
+        yield chunk
+
 # WebSocket API
 @router.websocket("/ws")
 async def websocket_chat(websocket: WebSocket):
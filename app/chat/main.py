@@ -1,19 +1,100 @@
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
-from .api.routers import router as chat_router
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from common.clients.redis_manager import init_redis, close_redis
+from common.clients.http_manager import init_http_client, close_http_client, get_http_pool_stats
+from common.metrics.middleware import init_metrics
+from common.profiling.middleware import init_profiling
+from common.profiling.startup import startup_report
+from common.logging.logger import init_logging
+from common.logging.middleware import init_request_context
+from . import get_chat_service, init_chat, start_chat, stop_chat
+
+startup_report.record("imports", time.perf_counter() - _import_started)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    await init_redis()
+    with startup_report.phase("redis"):
+        await init_redis()
+    with startup_report.phase("http_client"):
+        await init_http_client()
+    await start_chat()
+    startup_report.log()
     yield
     # Shutdown
+    await stop_chat()
+    await close_http_client()
     await close_redis()
 
-app = FastAPI(title="Chat Service", version="1.0.0", lifespan=lifespan)
-app.include_router(chat_router, prefix="/chat", tags=["Chat"])
+def _not_started() -> JSONResponse:
+    # no chat service before start_chat() has run in the lifespan, or after stop_chat()
+    return JSONResponse(status_code=503, content={"ready": False})
+
+def create_app() -> FastAPI:
+    started = time.perf_counter()
+    init_logging()
+    app = FastAPI(title="Chat Service", version="1.0.0", lifespan=lifespan)
+    init_chat(app)
+    init_metrics(app)
+    init_profiling(app)
+    init_request_context(app)
+
+    @app.get("/health", tags=["health"])
+    async def health_check():
+        return {"status": "ok", "message": "Chat service is running!"}
+
+    @app.get("/health/startup", tags=["health"])
+    async def startup_timings():
+        return startup_report.snapshot()
+
+    @app.get("/ready", tags=["health"])
+    async def readiness():
+        # 503 until every configured model is loaded somewhere, so no user request pays the model load
+        chat_service = get_chat_service()
+        if chat_service is None:
+            return _not_started()
+        status = chat_service.llm.model_manager.snapshot()
+        return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+    @app.get("/health/http-pool", tags=["health"])
+    async def http_pool_stats():
+        return get_http_pool_stats()
+
+    @app.get("/health/llm-backends", tags=["health"])
+    async def llm_backends():
+        chat_service = get_chat_service()
+        if chat_service is None:
+            return _not_started()
+        return chat_service.llm.router.snapshot()
+
+    @app.get("/health/llm-circuit", tags=["health"])
+    async def llm_circuit():
+        chat_service = get_chat_service()
+        if chat_service is None:
+            return _not_started()
+        return chat_service.llm.breaker.snapshot()
+
+    @app.get("/health/llm-admission", tags=["health"])
+    async def llm_admission():
+        chat_service = get_chat_service()
+        if chat_service is None:
+            return _not_started()
+        return chat_service.llm.admission.stats()
+
+    startup_report.record("create_app", time.perf_counter() - started)
+    return app
+
+_app = None
 
-@app.get("/health", tags=["health"])
-async def health_check():
-    return {"status": "ok", "message": "Chat service is running!"}
+def __getattr__(name: str):
+    # `uvicorn app.chat.main:app` keeps working; the app is built on first access, not on import
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
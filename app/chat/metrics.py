@@ -0,0 +1,56 @@
+from common.metrics.registry import Counter, Gauge, Histogram
+
+# Chat domain metrics. Hot paths bind their label sets once (module level or
+# __init__) and only call observe()/inc() per request.
+
+REDIS_OP_SECONDS = Histogram("chat_redis_op_seconds", "ChatRepository Redis round trips.", ["op"])
+
+CHAT_TURN_SECONDS = Histogram(
+    "chat_turn_seconds", "One chat turn inside ChatService, from user message to stored reply.", ["mode"],
+)
+
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_seconds", "Upstream LLM calls, including retries; streams until the last token.", ["model", "mode"],
+)
+LLM_TIME_TO_FIRST_TOKEN_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds", "Stream start to first token from the LLM.", ["model"],
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "llm_tokens_per_second", "Decode speed of finished streams, after the first token.", ["model"],
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 400),
+)
+LLM_TOKENS_TOTAL = Counter("llm_stream_tokens_total", "Tokens streamed from the LLM.", ["model"])
+LLM_ERRORS_TOTAL = Counter("llm_errors_total", "Upstream LLM calls that ended in an error.", ["model", "mode"])
+
+LLM_ADMISSION_WAIT_SECONDS = Histogram(
+    "llm_admission_wait_seconds", "Time admitted LLM calls spent queued.", ["priority"],
+)
+LLM_ADMISSION_SHED_TOTAL = Counter(
+    "llm_admission_shed_total", "LLM calls rejected by admission control.", ["priority", "reason"],
+)
+LLM_ADMISSION_IN_FLIGHT = Gauge("llm_admission_in_flight", "LLM calls holding an admission slot.").labels()
+LLM_ADMISSION_QUEUED = Gauge("llm_admission_queued", "LLM calls waiting for an admission slot.").labels()
+LLM_CIRCUIT_OPEN = Gauge("llm_circuit_open", "1 while the LLM circuit breaker is open or half-open.").labels()
+
+RATE_LIMIT_DECISIONS_TOTAL = Counter("rate_limit_decisions_total", "Rate limiter verdicts.", ["result"])
+
+SESSION_CACHE_LOOKUPS_TOTAL = Counter("chat_session_cache_lookups_total", "Session L1 cache lookups.", ["result"])
+SESSION_CACHE_ENTRIES = Gauge("chat_session_cache_entries", "Sessions held in this worker's L1 cache.").labels()
+
+HTTP_POOL_CONNECTIONS = Gauge("llm_http_pool_connections", "Connections in the shared LLM HTTP pool.", ["state"])
+HTTP_POOL_PENDING = Gauge("llm_http_pool_pending_requests", "Requests waiting for a pooled LLM connection.").labels()
+
+def bind_chat_service(chat_service):
+    """Export state the chat service already tracks; read at scrape time, free on the request path."""
+    from common.clients.http_manager import get_http_pool_stats
+
+    llm, cache = chat_service.llm, chat_service.repo.cache
+    LLM_ADMISSION_IN_FLIGHT.set_function(lambda: llm.admission.in_flight)
+    LLM_ADMISSION_QUEUED.set_function(lambda: llm.admission.queued)
+    LLM_CIRCUIT_OPEN.set_function(lambda: 0 if llm.breaker.state == "closed" else 1)
+    SESSION_CACHE_LOOKUPS_TOTAL.labels("hit").set_function(lambda: cache.hits)
+    SESSION_CACHE_LOOKUPS_TOTAL.labels("miss").set_function(lambda: cache.misses)
+    SESSION_CACHE_ENTRIES.set_function(lambda: cache.size)
+    for state in ("active", "idle"):
+        HTTP_POOL_CONNECTIONS.labels(state).set_function(lambda state=state: get_http_pool_stats()[state])
+    HTTP_POOL_PENDING.set_function(lambda: get_http_pool_stats()["pending_requests"])
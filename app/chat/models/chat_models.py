@@ -1,9 +1,21 @@
-from pydantic import BaseModel, Field
-from typing import List
+import math
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+
+def estimate_tokens(text: str) -> int:
+    """Cheap tokenizer-free estimate (~4 characters per token plus role/format overhead)."""
+    return math.ceil(len(text) / 4) + 4
 
 class ChatMessage(BaseModel):
     role: str = Field(..., description="Message role,'user' or 'assistant'")
     content: str = Field(..., description="The message text")
+    tokens: Optional[int] = Field(None, description="Token count, computed once and stored with the message")
+
+    @model_validator(mode="after")
+    def _count_tokens(self):
+        if self.tokens is None:
+            self.tokens = estimate_tokens(self.content)
+        return self
 
 class ChatSession(BaseModel):
     user_id: str
@@ -12,6 +24,7 @@ class ChatSession(BaseModel):
 class ChatRequest(BaseModel):
     user_id: str
     message: str
+    coalesce: bool = Field(True, description="Batch streamed tokens into larger frames; false sends one frame per token")
 
 class ChatResponse(BaseModel):
     user_id: str
@@ -1,7 +1,12 @@
-import json
-from typing import List
+import time
+from typing import List, Optional, Tuple, Union
+from redis.exceptions import WatchError
+from app.chat.metrics import REDIS_OP_SECONDS
 from app.chat.models.chat_models import ChatMessage, ChatSession
-from common.clients.redis_manager import get_redis
+from common.clients.redis_manager import get_redis, is_cluster, user_key
+from common.config.config import settings
+from app.chat.repository.session_cache import SessionCache
+from app.chat.repository.session_codec import SessionCodec, SessionDecodeError, session_codec
 from common.exceptions.chat_exceptions import ChatError
 from common.exceptions.infra_exceptions import RedisError
 import logging
@@ -10,43 +15,283 @@ logger = logging.getLogger(__name__)
 
 MAX_HISTORY = 50  # Keep last 50 messages per session
 
+_GET_SECONDS = REDIS_OP_SECONDS.labels("get_session")
+_GET_VERSIONED_SECONDS = REDIS_OP_SECONDS.labels("get_session_versioned")
+_APPEND_AND_GET_SECONDS = REDIS_OP_SECONDS.labels("append_and_get")
+_APPEND_SECONDS = REDIS_OP_SECONDS.labels("append_messages")
+_COMPACT_SECONDS = REDIS_OP_SECONDS.labels("replace_prefix")
+
 class ChatRepository:
-    def __init__(self):
+    def __init__(self, codec: SessionCodec = None, cache: SessionCache = None):
         self.prefix = "chat_session:"
+        self.version_prefix = "chat_session_version:"
+        self.codec = codec or session_codec
+        self.cache = cache if cache is not None else SessionCache()
+        self.cluster = is_cluster()
+        # a cluster only ever holds tagged keys, and an old key would sit in another slot anyway
+        self.legacy_keys = settings.SESSION_LEGACY_KEYS and not self.cluster
 
     def _key(self, user_id: str) -> str:
-        return f"{self.prefix}{user_id}"
+        # hash-tagged like the version key, so both share a cluster slot and one MULTI/EXEC
+        return user_key(self.prefix, user_id)
+
+    def _version_key(self, user_id: str) -> str:
+        # separate prefix: SCANs over chat_session:* must only ever see lists
+        return user_key(self.version_prefix, user_id)
+
+    def legacy_user_id(self, key: str) -> Optional[str]:
+        """The user of a session key written before keys were hash-tagged (`chat_session:<user>`), else None."""
+        user_id = key[len(self.prefix):]
+        if user_id.startswith("{") and user_id.endswith("}"):
+            return None
+        return user_id
+
+    async def rekey_legacy(self, redis, user_id: str, key=None, attempts: int = 3) -> bool:
+        """Move a session from its pre-hash-tag key (`chat_session:<user>`) to the tagged one.
+
+        Anything already written under the new key since the upgrade is newer, so the old
+        history goes in front of it before trimming. Returns False when there was no old
+        session. Single node only, like the keys it moves.
+        """
+        key = f"{self.prefix}{user_id}" if key is None else key
+        new_key = self._key(user_id)
+        if not await redis.exists(key):
+            return False
+        for _ in range(attempts):
+            try:
+                async with redis.pipeline(transaction=True) as pipe:
+                    await pipe.watch(key, new_key)
+                    raw = await pipe.lrange(key, 0, -1)
+                    if not raw:
+                        await pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    pipe.lpush(new_key, *reversed(raw))
+                    pipe.ltrim(new_key, -MAX_HISTORY, -1)
+                    pipe.delete(key, f"{self.version_prefix}{user_id}")
+                    pipe.incr(self._version_key(user_id))
+                    self._publish(pipe, user_id)
+                    await pipe.execute()
+                    self.cache.invalidate(user_id)
+                    return True
+            except WatchError:
+                continue
+        raise WatchError(f"{key!r} kept changing during migration")
+
+    async def _adopt_legacy(self, redis, user_id: str) -> bool:
+        """Called when the tagged key came back empty: the user may still have history under the old key."""
+        return self.legacy_keys and await self.rekey_legacy(redis, user_id)
 
     async def get_session(self, user_id: str) -> ChatSession:
+        cached = self.cache.get(user_id)
+        if cached is not None:
+            return ChatSession(user_id=user_id, history=cached)
+
         try:
-            redis = await get_redis()
+            redis = await get_redis(binary=True)
         except RedisError as e:
             raise e
 
+        token = self.cache.begin_fill(user_id)
         try:
             # get all messages in list
-            messages_json: List[str] = await redis.lrange(self._key(user_id), 0, -1)
-            messages = [ChatMessage(**json.loads(msg)) for msg in messages_json]
-            return ChatSession(user_id=user_id, history=messages)
-        except json.JSONDecodeError:
-            # session data corrupted
-            await redis.delete(self._key(user_id))
-            raise ChatError("Corrupted session data cleared.")
+            started = time.perf_counter()
+            messages_json: List[bytes] = await redis.lrange(self._key(user_id), 0, -1)
+            _GET_SECONDS.observe(time.perf_counter() - started)
+            if not messages_json and await self._adopt_legacy(redis, user_id):
+                messages_json = await redis.lrange(self._key(user_id), 0, -1)
+            session = await self._to_session(redis, user_id, messages_json)
+            self.cache.fill(user_id, session.history, token)
+            return session
+        except ChatError:
+            raise
         except Exception as e:
-            logger.error(f"[ChatRepository] Unexpected error in get_session: {e}")
+            logger.error("[ChatRepository] Unexpected error in get_session: %s", e)
             raise ChatError(str(e))
+        finally:
+            self.cache.cancel_fill(user_id, token)
+
+    async def get_session_versioned(self, user_id: str) -> Tuple[ChatSession, int]:
+        """The session plus its write counter, read atomically. Every repository write bumps the counter."""
+        try:
+            redis = await get_redis(binary=True)
+        except RedisError as e:
+            raise e
+
+        try:
+            messages_json, version = await self._read_versioned(redis, user_id)
+            if not messages_json and await self._adopt_legacy(redis, user_id):
+                messages_json, version = await self._read_versioned(redis, user_id)
+        except Exception as e:
+            logger.error("[ChatRepository] Failed to read session: %s", e)
+            raise ChatError("Failed to read session.")
+
+        return await self._to_session(redis, user_id, messages_json), int(version or 0)
+
+    async def _read_versioned(self, redis, user_id: str):
+        pipe = redis.pipeline(transaction=True)
+        pipe.lrange(self._key(user_id), 0, -1)
+        pipe.get(self._version_key(user_id))
+        started = time.perf_counter()
+        messages_json, version = await pipe.execute()
+        _GET_VERSIONED_SECONDS.observe(time.perf_counter() - started)
+        return messages_json, version
+
+    async def append_and_get(self, user_id: str, message: ChatMessage) -> ChatSession:
+        """Append, trim and read back the session in a single MULTI/EXEC round trip.
+
+        When this worker has the session cached, the read-back is skipped and the
+        cached history is extended instead.
+        """
+        try:
+            redis = await get_redis(binary=True)
+        except RedisError as e:
+            raise e
+
+        key = self._key(user_id)
+        cached = self.cache.get(user_id)
+        token = self.cache.begin_fill(user_id) if cached is None else None
+        try:
+            pipe = redis.pipeline(transaction=True)
+            pipe.rpush(key, self.codec.encode(message.model_dump()))
+            pipe.ltrim(key, -MAX_HISTORY, -1)
+            if cached is None:
+                pipe.lrange(key, 0, -1)
+            pipe.incr(self._version_key(user_id))
+            self._publish(pipe, user_id)
+            started = time.perf_counter()
+            results = await pipe.execute()
+            _APPEND_AND_GET_SECONDS.observe(time.perf_counter() - started)
+            await self._publish_after(redis, user_id)
+        except Exception as e:
+            if token is not None:
+                self.cache.cancel_fill(user_id, token)
+            logger.error("[ChatRepository] Failed to append and read session: %s", e)
+            raise ChatError("Failed to append message to session.")
+
+        if cached is not None:
+            history = self.cache.extend(user_id, [message], results[0], MAX_HISTORY)
+            if history is not None:
+                return ChatSession(user_id=user_id, history=history)
+            # another worker wrote in between: our copy was dropped, read the real list
+            return await self.get_session(user_id)
+
+        try:
+            messages_json = results[2]
+            # only our message there: the key was empty, so older history may still be under the old key
+            if len(messages_json) == 1:
+                try:
+                    if await self._adopt_legacy(redis, user_id):
+                        messages_json = await redis.lrange(key, 0, -1)
+                except Exception as e:
+                    logger.error("[ChatRepository] Failed to move legacy session: %s", e)
+                    raise ChatError("Failed to read session.")
+            session = await self._to_session(redis, user_id, messages_json)
+            self.cache.fill(user_id, session.history, token)
+            return session
+        finally:
+            self.cache.cancel_fill(user_id, token)
 
     async def append_message(self, user_id: str, message: ChatMessage):
+        await self.append_messages(user_id, [message])
+
+    async def append_turn(self, user_id: str, user_message: ChatMessage, assistant_message: ChatMessage):
+        """Persist a full user/assistant exchange in one round trip."""
+        await self.append_messages(user_id, [user_message, assistant_message])
+
+    async def append_messages(self, user_id: str, messages: List[ChatMessage]) -> int:
+        """Append and trim in one MULTI/EXEC; returns the session's write counter after this write."""
         try:
-            redis = await get_redis()
+            redis = await get_redis(binary=True)
         except RedisError as e:
             raise e
 
         key = self._key(user_id)
         try:
-            await redis.rpush(key, json.dumps(message.model_dump()))
+            # MULTI/EXEC so a concurrent writer can never interleave between push and trim
+            pipe = redis.pipeline(transaction=True)
+            pipe.rpush(key, *[self.codec.encode(m.model_dump()) for m in messages])
             # keep only last MAX_HISTORY messages
-            await redis.ltrim(key, -MAX_HISTORY, -1)
+            pipe.ltrim(key, -MAX_HISTORY, -1)
+            pipe.incr(self._version_key(user_id))
+            self._publish(pipe, user_id)
+            started = time.perf_counter()
+            results = await pipe.execute()
+            _APPEND_SECONDS.observe(time.perf_counter() - started)
+            await self._publish_after(redis, user_id)
         except Exception as e:
-            logger.error(f"[ChatRepository] Failed to append message: {e}")
-            raise ChatError("Failed to append message to session.")
\ No newline at end of file
+            self.cache.invalidate(user_id)
+            logger.error("[ChatRepository] Failed to append message: %s", e)
+            raise ChatError("Failed to append message to session.")
+
+        self.cache.extend(user_id, messages, results[0], MAX_HISTORY)
+        return results[2]
+
+    async def replace_prefix(self, user_id: str, expected: List[ChatMessage], summary: ChatMessage,
+                             attempts: int = 3) -> bool:
+        """Swap the oldest len(expected) messages for `summary`, if they are still the same messages.
+
+        Uses WATCH/MULTI so concurrent appends never get lost: if the list changes while
+        we check, the transaction is retried. Returns False when the prefix no longer
+        matches (e.g. another worker already compacted or the list was trimmed).
+        """
+        try:
+            redis = await get_redis(binary=True)
+        except RedisError as e:
+            raise e
+
+        key = self._key(user_id)
+        count = len(expected)
+        expected_pairs = [(m.role, m.content) for m in expected]
+        started = time.perf_counter()
+        try:
+            for _ in range(attempts):
+                try:
+                    async with redis.pipeline(transaction=True) as pipe:
+                        await pipe.watch(key)
+                        current = [self.codec.decode(raw) for raw in await pipe.lrange(key, 0, count - 1)]
+                        if [(m.get("role"), m.get("content")) for m in current] != expected_pairs:
+                            await pipe.unwatch()
+                            return False
+                        pipe.multi()
+                        pipe.ltrim(key, count, -1)
+                        pipe.lpush(key, self.codec.encode(summary.model_dump()))
+                        pipe.incr(self._version_key(user_id))
+                        self._publish(pipe, user_id)
+                        await pipe.execute()
+                        self.cache.invalidate(user_id)
+                        await self._publish_after(redis, user_id)
+                        return True
+                except WatchError:
+                    continue
+            return False
+        except Exception as e:
+            logger.error("[ChatRepository] Failed to compact session: %s", e)
+            raise ChatError("Failed to compact session.")
+        finally:
+            _COMPACT_SECONDS.observe(time.perf_counter() - started)
+
+    def _publish(self, pipe, user_id: str):
+        """Queue the cross-worker invalidation inside the same MULTI/EXEC as the write."""
+        if self.cache.enabled and not self.cluster:
+            pipe.publish(self.cache.channel, self.cache.message(user_id))
+
+    async def _publish_after(self, redis, user_id: str):
+        """Cluster mode: PUBLISH hashes the channel name to a slot of its own, so it cannot join the
+        session's MULTI/EXEC and is sent right after it. A failure here is logged, not raised: the
+        write has landed, and other workers' copies still expire after the cache TTL."""
+        if not (self.cache.enabled and self.cluster):
+            return
+        try:
+            await redis.publish(self.cache.channel, self.cache.message(user_id))
+        except Exception as e:
+            logger.warning("[ChatRepository] Failed to publish invalidation for %s: %s", user_id, e)
+
+    async def _to_session(self, redis, user_id: str, messages_json: List[Union[bytes, str]]) -> ChatSession:
+        try:
+            messages = [ChatMessage(**self.codec.decode(msg)) for msg in messages_json]
+            return ChatSession(user_id=user_id, history=messages)
+        except SessionDecodeError:
+            # session data corrupted
+            await redis.delete(self._key(user_id))
+            raise ChatError("Corrupted session data cleared.")
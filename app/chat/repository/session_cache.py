@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from app.chat.models.chat_models import ChatMessage
+from common.clients.redis_manager import get_redis
+from common.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SessionCache:
+    """Per-worker LRU of session histories, kept coherent through a Redis pub/sub channel.
+
+    Every repository write publishes "<worker id> <user id>" on `channel` inside
+    its MULTI/EXEC; other workers drop their copy when they see it. Entries are
+    only served while the invalidation listener is subscribed: on any
+    disconnect the cache is emptied and reads go to Redis until it re-subscribes,
+    so a missed invalidation can never be served. `ttl` bounds staleness as a
+    last line of defence.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None, channel: str = "chat_session:invalidate",
+                 retry_interval: float = 1.0):
+        self.max_entries = settings.SESSION_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl = settings.SESSION_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.channel = channel
+        self.retry_interval = retry_interval
+        self.worker_id = uuid.uuid4().hex[:12]
+        self.listening = False
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # user_id -> (history, expires_at)
+        self._pending: Dict[str, object] = {}  # user_id -> token of a read in flight, dropped on invalidation
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and self.listening
+
+    def get(self, user_id: str) -> Optional[List[ChatMessage]]:
+        if not self.active:
+            return None
+        entry = self._entries.get(user_id)
+        if entry is None or time.monotonic() >= entry[1]:
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return list(entry[0])
+
+    def begin_fill(self, user_id: str) -> object:
+        """Call before reading from Redis; pass the token to fill() so an invalidation in between wins."""
+        token = object()
+        if self.active:
+            self._pending[user_id] = token
+        return token
+
+    def fill(self, user_id: str, history: List[ChatMessage], token: object = None):
+        if not self.active:
+            return
+        if token is not None:
+            if self._pending.get(user_id) is not token:
+                return
+            del self._pending[user_id]
+        self._entries[user_id] = (list(history), time.monotonic() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def cancel_fill(self, user_id: str, token: object):
+        if self._pending.get(user_id) is token:
+            del self._pending[user_id]
+
+    def extend(self, user_id: str, messages: List[ChatMessage], length_after: int, max_history: int) -> Optional[List[ChatMessage]]:
+        """Apply our own append to the cached copy.
+
+        `length_after` is RPUSH's reply (list length before the trim). If it does not
+        equal cached + appended, someone else wrote in between and the entry is dropped.
+        """
+        entry = self._entries.get(user_id) if self.active else None
+        if entry is None:
+            return None
+        history = entry[0]
+        if len(history) + len(messages) != length_after:
+            self.invalidate(user_id)
+            return None
+        history = (history + messages)[-max_history:]
+        self.fill(user_id, history)
+        return list(history)
+
+    def invalidate(self, user_id: str):
+        self._entries.pop(user_id, None)
+        self._pending.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._pending.clear()
+
+    def message(self, user_id: str) -> str:
+        return f"{self.worker_id} {user_id}"
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+    async def start(self):
+        if self._task is None and self.enabled:
+            self._task = asyncio.ensure_future(self._listen_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.listening = False
+        self.clear()
+
+    def handle(self, data: str):
+        worker_id, _, user_id = data.partition(" ")
+        if worker_id != self.worker_id:
+            self.invalidations += 1
+            self.invalidate(user_id)
+
+    async def _listen_loop(self):
+        while True:
+            pubsub = None
+            try:
+                redis = await get_redis()
+                pubsub = redis.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(self.channel)
+                self.clear()
+                self.listening = True
+                logger.info(f"[SessionCache] Listening for invalidations on '{self.channel}'")
+                async for msg in pubsub.listen():
+                    if msg.get("type") == "message":
+                        self.handle(msg["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[SessionCache] Invalidation listener lost ({e}), bypassing cache until it reconnects")
+            finally:
+                self.listening = False
+                self.clear()
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+            await asyncio.sleep(self.retry_interval)
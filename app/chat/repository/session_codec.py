@@ -0,0 +1,123 @@
+import logging
+from typing import Optional, Union
+from common.config.config import settings
+from common.exceptions.chat_exceptions import ChatError
+from common.serialization.serializer import serializer
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for SESSION_CODEC=msgpack
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+logger = logging.getLogger(__name__)
+
+# First byte of every stored message says how to read the rest. Legacy JSON
+# entries always start with "{", which none of the binary versions use.
+FORMAT_JSON = 0x7B
+FORMAT_MSGPACK = 0x01
+FORMAT_MSGPACK_ZSTD = 0x02
+FORMAT_MSGPACK_LZ4 = 0x03
+
+ROLES = ("user", "assistant", "system")
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+class SessionDecodeError(ValueError):
+    """A stored message could not be read (truncated, garbled, unknown version)."""
+
+
+class SessionCodec:
+    """Encodes ChatMessage dicts for the session list, and reads back every format ever written.
+
+    `json` keeps the original layout. `msgpack` stores [role, content, tokens] with
+    the role as a small int, behind a one-byte version header; messages of at
+    least `compress_min_bytes` are compressed with zstd or lz4 when that actually
+    makes them smaller. Decoding never depends on the configured codec, so workers
+    can be switched (or switched back) while old entries are still around.
+    """
+
+    def __init__(self, name: str = None, compression: str = None, compress_min_bytes: int = None):
+        self.name = (name or settings.SESSION_CODEC).lower()
+        self.compression = (compression or settings.SESSION_COMPRESSION).lower()
+        self.compress_min_bytes = settings.SESSION_COMPRESS_MIN_BYTES if compress_min_bytes is None else compress_min_bytes
+        if self.name not in ("json", "msgpack"):
+            raise ValueError(f"Unknown session codec '{self.name}', expected json or msgpack")
+        if self.compression not in ("none", "zstd", "lz4"):
+            raise ValueError(f"Unknown session compression '{self.compression}', expected none, zstd or lz4")
+        if self.name == "msgpack" and msgpack is None:
+            logger.warning("[SessionCodec] msgpack is not installed, storing sessions as json")
+            self.name = "json"
+        if (self.compression == "zstd" and zstandard is None) or (self.compression == "lz4" and lz4_frame is None):
+            logger.warning(f"[SessionCodec] {self.compression} is not installed, storing sessions uncompressed")
+            self.compression = "none"
+        self._zstd_c = zstandard.ZstdCompressor(level=3) if self.compression == "zstd" else None
+
+    def encode(self, message: dict) -> bytes:
+        if self.name == "json":
+            return serializer.dumps(message)
+
+        role = message["role"]
+        body = msgpack.packb([ROLE_CODES.get(role, role), message["content"], message.get("tokens")], use_bin_type=True)
+        if self.compression != "none" and len(body) >= self.compress_min_bytes:
+            if self.compression == "zstd":
+                packed = bytes((FORMAT_MSGPACK_ZSTD,)) + self._zstd_c.compress(body)
+            else:
+                packed = bytes((FORMAT_MSGPACK_LZ4,)) + lz4_frame.compress(body)
+            if len(packed) < len(body) + 1:
+                return packed
+        return bytes((FORMAT_MSGPACK,)) + body
+
+    def decode(self, raw: Union[bytes, str]) -> dict:
+        if isinstance(raw, str) or not raw or raw[0] == FORMAT_JSON:
+            try:
+                return serializer.loads(raw)
+            except ValueError as e:
+                raise SessionDecodeError(str(e))
+
+        version, body = raw[0], raw[1:]
+        if version not in (FORMAT_MSGPACK, FORMAT_MSGPACK_ZSTD, FORMAT_MSGPACK_LZ4):
+            raise SessionDecodeError(f"Unknown session format version {version}")
+        if msgpack is None:
+            # not corruption: this worker simply cannot read what a newer one wrote
+            raise ChatError("Session is stored as msgpack but msgpack is not installed.")
+        try:
+            if version == FORMAT_MSGPACK_ZSTD:
+                if zstandard is None:
+                    raise ChatError("Session message is zstd-compressed but zstandard is not installed.")
+                body = zstandard.ZstdDecompressor().decompress(body)
+            elif version == FORMAT_MSGPACK_LZ4:
+                if lz4_frame is None:
+                    raise ChatError("Session message is lz4-compressed but lz4 is not installed.")
+                body = lz4_frame.decompress(body)
+            role, content, tokens = msgpack.unpackb(body, raw=False)
+            if isinstance(role, int):
+                if not 0 <= role < len(ROLES):
+                    raise ValueError(f"unknown role code {role}")
+                role = ROLES[role]
+        except ChatError:
+            raise
+        except Exception as e:
+            raise SessionDecodeError(f"Corrupt session message: {e}")
+        return {"role": role, "content": content, "tokens": tokens}
+
+    def format_of(self, raw: Union[bytes, str]) -> Optional[int]:
+        if isinstance(raw, str) or not raw:
+            return FORMAT_JSON
+        return raw[0]
+
+    def is_current(self, raw: Union[bytes, str]) -> bool:
+        """True when `raw` is already in the format this codec writes (compressed or not)."""
+        if self.name == "json":
+            return self.format_of(raw) == FORMAT_JSON
+        return self.format_of(raw) in (FORMAT_MSGPACK, FORMAT_MSGPACK_ZSTD, FORMAT_MSGPACK_LZ4)
+
+session_codec = SessionCodec()
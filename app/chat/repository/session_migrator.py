@@ -0,0 +1,158 @@
+import argparse
+import asyncio
+import logging
+import random
+from typing import Optional
+from redis.exceptions import ResponseError, WatchError
+from app.chat.models.chat_models import ChatMessage
+from app.chat.repository.chat_repository import ChatRepository
+from app.chat.repository.session_codec import SessionCodec, SessionDecodeError
+from common.clients.redis_manager import close_redis, get_redis, init_redis
+from common.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SessionMigrator:
+    """Re-encodes stored sessions into the configured SESSION_CODEC, one key at a time.
+
+    Keys are walked with SCAN and rewritten under WATCH/MULTI, so a message
+    appended mid-rewrite makes that key retry instead of being lost. Already
+    converted keys are left alone, which makes re-runs cheap and lets several
+    workers run it at once. Sessions still stored under the key names from
+    before hash tags (`chat_session:<user>`) are moved to their tagged key first.
+    """
+
+    def __init__(self, repo: ChatRepository = None, codec: SessionCodec = None, batch_size: int = None,
+                 pause: float = 0.0, attempts: int = 3):
+        self.repo = repo or ChatRepository()
+        self.codec = codec or self.repo.codec
+        self.batch_size = settings.SESSION_MIGRATE_BATCH_SIZE if batch_size is None else batch_size
+        self.pause = pause  # seconds to sleep between SCAN batches, to keep Redis load flat
+        self.attempts = attempts
+        self.stats = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def migrate_key(self, key) -> bool:
+        """Rewrite one session in the target format. Returns False when nothing needed changing."""
+        redis = await get_redis(binary=True)
+        for _ in range(self.attempts):
+            try:
+                async with redis.pipeline(transaction=True) as pipe:
+                    await pipe.watch(key)
+                    raw = await pipe.lrange(key, 0, -1)
+                    if all(self.codec.is_current(r) for r in raw):
+                        await pipe.unwatch()
+                        return False
+                    encoded = [self.codec.encode(ChatMessage(**self.codec.decode(r)).model_dump()) for r in raw]
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.rpush(key, *encoded)
+                    await pipe.execute()
+                    return True
+            except WatchError:
+                continue
+        raise WatchError(f"{key!r} kept changing during migration")
+
+    async def rekey(self, key, user_id: str) -> str:
+        """Move a session from its pre-hash-tag key to the tagged one and return the new key."""
+        redis = await get_redis(binary=True)
+        await self.repo.rekey_legacy(redis, user_id, key=key, attempts=self.attempts)
+        return self.repo._key(user_id)
+
+    async def run(self) -> dict:
+        redis = await get_redis(binary=True)
+        self.stats = {"scanned": 0, "rekeyed": 0, "migrated": 0, "skipped": 0, "failed": 0}
+        async for key in redis.scan_iter(match=f"{self.repo.prefix}*", count=self.batch_size):
+            self.stats["scanned"] += 1
+            try:
+                user_id = self.repo.legacy_user_id(key.decode("utf-8") if isinstance(key, bytes) else key)
+                if user_id is not None:
+                    key = await self.rekey(key, user_id)
+                    self.stats["rekeyed"] += 1
+                if await self.migrate_key(key):
+                    self.stats["migrated"] += 1
+                else:
+                    self.stats["skipped"] += 1
+            except (SessionDecodeError, WatchError) as e:
+                self.stats["failed"] += 1
+                logger.warning(f"[SessionMigrator] Could not migrate {key!r}: {e}")
+            if self.pause and self.stats["scanned"] % self.batch_size == 0:
+                await asyncio.sleep(self.pause)
+        logger.info(f"[SessionMigrator] Finished migrating to {self.codec.name}: {self.stats}")
+        return dict(self.stats)
+
+    async def measure(self, sample_size: int = 100) -> dict:
+        """Bytes per session for a random sample of keys: Redis' own accounting, payload now, payload re-encoded."""
+        redis = await get_redis(binary=True)
+        keys, seen = [], 0
+        async for key in redis.scan_iter(match=f"{self.repo.prefix}*", count=self.batch_size):
+            # reservoir sample, so the result does not only describe the first SCAN pages
+            seen += 1
+            if len(keys) < sample_size:
+                keys.append(key)
+            else:
+                index = random.randrange(seen)
+                if index < sample_size:
+                    keys[index] = key
+
+        memory = payload = projected = messages = 0
+        for key in keys:
+            raw = await redis.lrange(key, 0, -1)
+            if memory is not None:
+                try:
+                    memory += await redis.memory_usage(key) or 0
+                except ResponseError:
+                    memory = None  # MEMORY is disabled on some managed Redis offerings
+            payload += sum(len(r) for r in raw)
+            projected += sum(len(self.codec.encode(ChatMessage(**self.codec.decode(r)).model_dump())) for r in raw)
+            messages += len(raw)
+
+        sampled = len(keys) or 1
+        return {
+            "sessions_sampled": len(keys),
+            "messages_sampled": messages,
+            "avg_memory_bytes": round(memory / sampled) if memory is not None else None,
+            "avg_payload_bytes": round(payload / sampled),
+            f"avg_payload_bytes_as_{self.codec.name}": round(projected / sampled),
+        }
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run_logged())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run_logged(self):
+        try:
+            await self.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[SessionMigrator] Migration aborted: {e}")
+
+
+async def _main(args):
+    await init_redis()
+    try:
+        migrator = SessionMigrator(codec=SessionCodec(args.codec, args.compression), batch_size=args.batch_size,
+                                   pause=args.pause)
+        print("before:", await migrator.measure(args.sample))
+        if not args.measure_only:
+            print("migrated:", await migrator.run())
+            print("after:", await migrator.measure(args.sample))
+    finally:
+        await close_redis()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-encode stored chat sessions and report bytes per session.")
+    parser.add_argument("--codec", default=None, help="json | msgpack (default: SESSION_CODEC)")
+    parser.add_argument("--compression", default=None, help="none | zstd | lz4 (default: SESSION_COMPRESSION)")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+    parser.add_argument("--sample", type=int, default=100, help="sessions sampled for the size report")
+    parser.add_argument("--measure-only", action="store_true")
+    asyncio.run(_main(parser.parse_args()))
@@ -1,59 +1,98 @@
 from app.chat.repository.chat_repository import ChatRepository
+from app.chat.adapters.admission import INTERACTIVE
 from app.chat.adapters.llm_adapter import LLMAdapter
-from app.chat.models.chat_models import ChatMessage, ChatResponse, StreamChunk, ChatRequest
+from app.chat.metrics import CHAT_TURN_SECONDS
+from app.chat.service.compaction_service import ConversationCompactor
+from app.chat.service.stream_coalescer import coalesce_tokens
+from app.chat.service.websocket_session import WebSocketSession
+from app.chat.models.chat_models import ChatMessage, ChatResponse, ChatRequest
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import AsyncGenerator
-import json
+from typing import AsyncGenerator, Optional
 import logging
+import time
 from common.exceptions.chat_exceptions import ChatError, LLMError
 from common.exceptions.infra_exceptions import RedisError
+from common.logging.logger import bind_user
+from common.profiling.profiler import profile_token, profiler
+from common.serialization.serializer import stream_frames
 
 logger = logging.getLogger(__name__)
 
+_REST_TURN_SECONDS = CHAT_TURN_SECONDS.labels("rest")
+_STREAM_TURN_SECONDS = CHAT_TURN_SECONDS.labels("stream")
+_WEBSOCKET_TURN_SECONDS = CHAT_TURN_SECONDS.labels("websocket")
+
 class ChatService:
 
     def __init__(self):
         self.repo = ChatRepository()
         self.llm = LLMAdapter()
+        self.compactor = ConversationCompactor(self.repo, self.llm)
 
     async def handle_message(self, user_id: str, message: str) -> ChatResponse:
+        bind_user(user_id)
+        started = time.perf_counter()
         try:
-            await self.repo.append_message(user_id, ChatMessage(role="user", content=message))
-            session = await self.repo.get_session(user_id)
+            session = await self.repo.append_and_get(user_id, ChatMessage(role="user", content=message))
             reply = await self.llm.generate(message, session.history)
             await self.repo.append_message(user_id, ChatMessage(role="assistant", content=reply))
+            self.compactor.maybe_schedule(user_id, len(session.history) + 1)
+            _REST_TURN_SECONDS.observe(time.perf_counter() - started)
             return ChatResponse(user_id=user_id, reply=reply)
         except (RedisError, LLMError, ChatError) as e:
-            logger.error(f"[handle_message] {e}")
+            logger.error("[handle_message] %s", e)
             raise e
 
-    async def stream_message(self, user_id: str, message: str) -> AsyncGenerator[str, None]:
+    async def stream_message(self, user_id: str, message: str, coalesce: bool = True) -> AsyncGenerator[bytes, None]:
+        bind_user(user_id)
+        started = time.perf_counter()
         try:
-            await self.repo.append_message(user_id, ChatMessage(role="user", content=message))
-            session = await self.repo.get_session(user_id)
-            async for token in self.llm.stream_generate(message, session.history):
-                yield json.dumps(StreamChunk(token=token).model_dump()) + "\n"
+            session = await self.repo.append_and_get(user_id, ChatMessage(role="user", content=message))
+            async for token in self._tokens(message, session.history, coalesce):
+                yield stream_frames.chunk(token) + b"\n"
             await self.repo.append_message(user_id, ChatMessage(role="assistant", content="[streamed response]"))
+            self.compactor.maybe_schedule(user_id, len(session.history) + 1)
+            _STREAM_TURN_SECONDS.observe(time.perf_counter() - started)
         except (RedisError, LLMError, ChatError) as e:
-            logger.error(f"[stream_message] {e}")
+            logger.error("[stream_message] %s", e)
             raise e
 
     async def handle_websocket(self, websocket: WebSocket):
+        # opt-in allocation diff over the whole session, for chasing one connection that grows
+        token = profile_token(websocket.headers, websocket.query_params) if profiler.enabled else None
+        with profiler.memory("websocket", token, path="/chat/ws") as profile:
+            await self._serve_websocket(websocket, profile)
+
+    async def _serve_websocket(self, websocket: WebSocket, profile: Optional[dict]):
         await websocket.accept()
         user_id = None
+        session = None
         try:
             while True:
                 data = await websocket.receive_json()
                 req = ChatRequest(**data)
+                started = time.perf_counter()
                 user_id = req.user_id
-                await self.repo.append_message(user_id, ChatMessage(role="user", content=req.message))
-                session = await self.repo.get_session(user_id)
-                async for token in self.llm.stream_generate(req.message, session.history):
-                    await websocket.send_json(StreamChunk(token=token).model_dump())
-                await websocket.send_json(StreamChunk(token="", is_final=True).model_dump())
-                await self.repo.append_message(user_id, ChatMessage(role="assistant", content="[streamed response]"))
+                if session is None or session.user_id != user_id:
+                    # history is read once per socket; later turns only write deltas
+                    session = WebSocketSession(self.repo, user_id)
+                    bind_user(user_id)
+                history = await session.append(ChatMessage(role="user", content=req.message))
+                async for token in self._tokens(req.message, history, req.coalesce):
+                    await websocket.send_text(stream_frames.chunk_text(token))
+                await websocket.send_text(stream_frames.final_text)
+                await session.append(ChatMessage(role="assistant", content="[streamed response]"))
+                self.compactor.maybe_schedule(user_id, len(session.history))
+                _WEBSOCKET_TURN_SECONDS.observe(time.perf_counter() - started)
+                if profile is not None:
+                    profile["user_id"] = user_id
+                    profile["turns"] = profile.get("turns", 0) + 1
         except WebSocketDisconnect:
-            logger.info(f"User {user_id or 'unknown'} disconnected")
+            logger.info("User %s disconnected", user_id or "unknown")
         except (RedisError, LLMError, ChatError) as e:
-            logger.error(f"[WebSocket] {e}")
+            logger.error("[WebSocket] %s", e)
             await websocket.send_json({"error": str(e)})
+
+    def _tokens(self, message: str, history, coalesce: bool) -> AsyncGenerator[str, None]:
+        tokens = self.llm.stream_generate(message, history, priority=INTERACTIVE)
+        return coalesce_tokens(tokens) if coalesce else tokens
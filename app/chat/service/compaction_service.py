@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import List, Set
+from app.chat.adapters.admission import BATCH
+from app.chat.models.chat_models import ChatMessage
+from common.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+SUMMARY_INSTRUCTION = (
+    "Summarize the conversation below for your own future reference. Keep facts, names, "
+    "decisions, open questions and the user's preferences. Be concise; do not add new content.\n\n"
+)
+
+def is_summary(message: ChatMessage) -> bool:
+    return message.role == "system" and message.content.startswith(SUMMARY_PREFIX)
+
+class ConversationCompactor:
+    """Folds old turns into a rolling summary message, off the request path.
+
+    Past SESSION_COMPACT_THRESHOLD messages, everything but the newest
+    SESSION_COMPACT_KEEP_RECENT messages (plus any previous summary) is summarized
+    by the LLM and replaced by one system message at the head of the session.
+    Runs are deduplicated per user, spaced by SESSION_COMPACT_MIN_INTERVAL and
+    capped at SESSION_COMPACT_CONCURRENCY at once per worker.
+    """
+
+    def __init__(self, repo, llm, threshold: int = None, keep_recent: int = None,
+                 min_interval: float = None, concurrency: int = None, max_tracked_users: int = 10000):
+        self.repo = repo
+        self.llm = llm
+        self.threshold = settings.SESSION_COMPACT_THRESHOLD if threshold is None else threshold
+        self.keep_recent = settings.SESSION_COMPACT_KEEP_RECENT if keep_recent is None else keep_recent
+        self.min_interval = settings.SESSION_COMPACT_MIN_INTERVAL if min_interval is None else min_interval
+        self.max_tracked_users = max_tracked_users
+        self._semaphore = asyncio.Semaphore(settings.SESSION_COMPACT_CONCURRENCY if concurrency is None else concurrency)
+        self._in_flight: Set[str] = set()
+        self._last_run: "OrderedDict[str, float]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def maybe_schedule(self, user_id: str, history_length: int) -> bool:
+        if self.threshold <= 0 or history_length < self.threshold:
+            return False
+        if user_id in self._in_flight:
+            return False
+        last_run = self._last_run.get(user_id)
+        if last_run is not None and time.monotonic() - last_run < self.min_interval:
+            return False
+
+        self._in_flight.add(user_id)
+        task = asyncio.ensure_future(self._run(user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, user_id: str):
+        try:
+            async with self._semaphore:
+                self._mark_run(user_id)
+                await self.compact(user_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[Compactor] Compaction failed for user '{user_id}': {e}")
+        finally:
+            self._in_flight.discard(user_id)
+
+    async def compact(self, user_id: str) -> bool:
+        session = await self.repo.get_session(user_id)
+        history = session.history
+        if len(history) < self.threshold:
+            return False
+
+        older = history[:-self.keep_recent] if self.keep_recent else history
+        if len(older) < 2:
+            return False
+
+        summary_text = await self.llm.generate(SUMMARY_INSTRUCTION + self._transcript(older), [], priority=BATCH)
+        summary = ChatMessage(role="system", content=SUMMARY_PREFIX + summary_text.strip())
+        replaced = await self.repo.replace_prefix(user_id, older, summary)
+        if replaced:
+            logger.info(f"[Compactor] Compacted {len(older)} messages for user '{user_id}'")
+        return replaced
+
+    def _transcript(self, messages: List[ChatMessage]) -> str:
+        lines = []
+        for m in messages:
+            if is_summary(m):
+                lines.append(f"(previous summary) {m.content[len(SUMMARY_PREFIX):]}")
+            else:
+                lines.append(f"{m.role}: {m.content}")
+        return "\n".join(lines)
+
+    def _mark_run(self, user_id: str):
+        self._last_run[user_id] = time.monotonic()
+        self._last_run.move_to_end(user_id)
+        if len(self._last_run) > self.max_tracked_users:
+            self._last_run.popitem(last=False)
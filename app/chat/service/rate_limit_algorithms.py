@@ -0,0 +1,170 @@
+import hashlib
+import math
+import time
+import uuid
+from typing import List, NamedTuple
+from redis.exceptions import NoScriptError
+
+# All scripts read the clock from Redis (TIME) so every worker and node agrees on "now",
+# and each one mutates and expires its key atomically in a single EVALSHA round trip.
+# They return {allowed, remaining, retry_after_ms, reset_after_ms}.
+
+_NOW_MS = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+"""
+
+GCRA_SCRIPT = _NOW_MS + """
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local new_tat = tat + emission
+local allow_at = new_tat - tolerance
+if allow_at > now then
+    return {0, 0, allow_at - now, tat - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, math.floor((now - allow_at) / emission), 0, new_tat - now}
+"""
+
+# ARGV[3] tokens are requested at once; the first reply field is how many were granted
+TOKEN_BUCKET_SCRIPT = _NOW_MS + """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local granted = math.min(requested, math.floor(tokens))
+local retry_after = 0
+if granted > 0 then
+    tokens = tokens - granted
+else
+    retry_after = math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {granted, math.floor(tokens), retry_after, math.ceil((capacity - tokens) / rate)}
+"""
+
+SLIDING_LOG_SCRIPT = _NOW_MS + """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count >= limit then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    local retry_after = math.max(1, tonumber(oldest[2]) + window - now)
+    return {0, 0, retry_after, retry_after}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('PEXPIRE', KEYS[1], window)
+return {1, limit - count - 1, 0, window}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after_ms: int
+    reset_after_ms: int
+
+
+class RateLimitAlgorithm:
+    """Base class for atomic, script-backed limiter algorithms."""
+    name = ""
+    script = ""
+
+    def __init__(self, limit: int, period: float, burst: int = 0):
+        self.limit = limit
+        self.period_ms = max(1, int(period * 1000))
+        self.burst = burst or limit
+        self.sha = hashlib.sha1(self.script.encode("utf-8")).hexdigest()
+
+    def args(self) -> List:
+        raise NotImplementedError
+
+    async def hit(self, redis, key: str) -> RateLimitResult:
+        allowed, remaining, retry_after, reset_after = await self._run(redis, key, self.args())
+        return RateLimitResult(bool(allowed), self.burst, remaining, retry_after, reset_after)
+
+    async def _run(self, redis, key: str, args: List) -> List[int]:
+        try:
+            raw = await redis.evalsha(self.sha, 1, key, *args)
+        except NoScriptError:
+            # first call against this Redis (or after SCRIPT FLUSH): EVAL also caches it
+            raw = await redis.eval(self.script, 1, key, *args)
+        return [int(v) for v in raw]
+
+
+class GCRALimiter(RateLimitAlgorithm):
+    """Generic cell rate algorithm: one timestamp per key, smooth spacing, burst-tolerant."""
+    name = "gcra"
+    script = GCRA_SCRIPT
+
+    def args(self) -> List:
+        emission = max(1, self.period_ms // max(1, self.limit))
+        return [emission, emission * self.burst]
+
+
+class TokenBucketLimiter(RateLimitAlgorithm):
+    """Bucket of `burst` tokens refilled continuously at `limit` per period."""
+    name = "token_bucket"
+    script = TOKEN_BUCKET_SCRIPT
+
+    def args(self, requested: int = 1) -> List:
+        return [self.burst, self.limit / self.period_ms, requested]
+
+    async def acquire(self, redis, key: str, requested: int) -> List[int]:
+        """Take up to `requested` tokens in one call: [granted, remaining, retry_after_ms, reset_after_ms]."""
+        return await self._run(redis, key, self.args(requested))
+
+
+class SlidingLogLimiter(RateLimitAlgorithm):
+    """Exact sliding window over a sorted set of request timestamps."""
+    name = "sliding_log"
+    script = SLIDING_LOG_SCRIPT
+
+    def __init__(self, limit: int, period: float, burst: int = 0):
+        super().__init__(limit, period, burst)
+        # a log has no separate burst allowance: the window itself is the bound
+        self.burst = limit
+
+    def args(self) -> List:
+        return [self.limit, self.period_ms, uuid.uuid4().hex]
+
+
+class LocalTokenBucket:
+    """In-process token bucket, used when Redis cannot be reached."""
+    __slots__ = ("capacity", "rate", "tokens", "updated_at")
+
+    def __init__(self, capacity: int, rate_per_second: float):
+        self.capacity = capacity
+        self.rate = rate_per_second
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def take(self, now: float = None) -> RateLimitResult:
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        allowed = self.tokens >= 1
+        if allowed:
+            self.tokens -= 1
+        retry_after_ms = 0 if allowed else math.ceil((1 - self.tokens) / self.rate * 1000)
+        reset_after_ms = math.ceil((self.capacity - self.tokens) / self.rate * 1000)
+        return RateLimitResult(allowed, self.capacity, int(self.tokens), retry_after_ms, reset_after_ms)
+
+
+ALGORITHMS = {cls.name: cls for cls in (GCRALimiter, TokenBucketLimiter, SlidingLogLimiter)}
+
+
+def build_algorithm(name: str, limit: int, period: float, burst: int = 0) -> RateLimitAlgorithm:
+    try:
+        algorithm_cls = ALGORITHMS[name]
+    except KeyError:
+        raise ValueError(f"Unknown rate limit algorithm '{name}'. Expected one of: {', '.join(ALGORITHMS)}")
+    return algorithm_cls(limit, period, burst)
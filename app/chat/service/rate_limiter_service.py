@@ -1,26 +1,203 @@
-from fastapi import Request
-from common.clients.redis_manager import get_redis
+import math
+import time
+from collections import OrderedDict
+from fastapi import Depends, Response
+from app.auth.service.auth_service import get_current_user
+from app.chat.metrics import RATE_LIMIT_DECISIONS_TOTAL
+from app.chat.service.rate_limit_algorithms import (
+    LocalTokenBucket, RateLimitAlgorithm, RateLimitResult, TokenBucketLimiter, build_algorithm,
+)
+from common.clients.redis_manager import get_redis, user_key
 from common.config.config import settings
 from common.exceptions.infra_exceptions import RateLimitError
 from common.logging.logger import get_logger
 
 logger = get_logger(__name__)
 
-async def rate_limiter(request: Request):
-    user_id = request.headers.get("X-User-ID") or "anonymous"
-    key = f"rate_limit:{user_id}"
+_ALLOWED = RATE_LIMIT_DECISIONS_TOTAL.labels("allowed")
+_REJECTED = RATE_LIMIT_DECISIONS_TOTAL.labels("rejected")
 
-    try:
-        redis = await get_redis()
-        count = await redis.incr(key)
-        if count == 1:
-            await redis.expire(key, settings.RATE_LIMIT_PERIOD)
-    except Exception as e:
-        logger.error(f"[RateLimiter] Redis failure for user '{user_id}': {e}")
-        return
+class RateLimiter:
+    """Per-user limiter; the algorithm decides how a hit is counted inside Redis.
 
-    if count > settings.RATE_LIMIT_REQUESTS:
-        logger.warning(f"[RateLimiter] User '{user_id}' exceeded rate limit")
-        raise RateLimitError("Too many requests. Try again later.")
+    When Redis is unreachable the limiter degrades to a per-worker token bucket
+    instead of admitting everything, and stops calling Redis for a cool-down.
+    """
 
-    logger.debug(f"[RateLimiter] User '{user_id}' request count: {count}")
\ No newline at end of file
+    def __init__(
+        self,
+        algorithm: RateLimitAlgorithm,
+        prefix: str = "rate_limit:",
+        fallback_requests: int = 0,
+        redis_retry_interval: float = 5.0,
+        max_local_keys: int = 10000,
+    ):
+        self.algorithm = algorithm
+        self.prefix = prefix
+        self.fallback_capacity = fallback_requests or algorithm.burst
+        self.fallback_rate = (fallback_requests or algorithm.limit) / (algorithm.period_ms / 1000)
+        self.redis_retry_interval = redis_retry_interval
+        self.max_local_keys = max_local_keys
+        self._redis_down_until = 0.0
+        self._fallback_buckets: "OrderedDict[str, LocalTokenBucket]" = OrderedDict()
+
+    def _key(self, user_id: str) -> str:
+        # algorithm in the key: switching algorithms never trips over a different data type;
+        # hash-tagged so a user's limiter state sits in the same cluster slot as their session
+        return user_key(f"{self.prefix}{self.algorithm.name}:", user_id)
+
+    async def hit(self, user_id: str) -> RateLimitResult:
+        now = time.monotonic()
+        if now < self._redis_down_until:
+            return self._fallback(user_id, now)
+        try:
+            redis = await get_redis()
+            return await self.algorithm.hit(redis, self._key(user_id))
+        except Exception as e:
+            return self._on_redis_failure(user_id, now, e)
+
+    def _on_redis_failure(self, user_id: str, now: float, error: Exception) -> RateLimitResult:
+        logger.error("[RateLimiter] Redis failure for user '%s', using local limits: %s", user_id, error)
+        self._redis_down_until = now + self.redis_retry_interval
+        return self._fallback(user_id, now)
+
+    def _fallback(self, user_id: str, now: float) -> RateLimitResult:
+        bucket = self._local_entry(self._fallback_buckets, user_id)
+        if bucket is None:
+            bucket = LocalTokenBucket(self.fallback_capacity, self.fallback_rate)
+            self._store_local_entry(self._fallback_buckets, user_id, bucket)
+        return bucket.take(now)
+
+    def _local_entry(self, entries: OrderedDict, user_id: str):
+        entry = entries.get(user_id)
+        if entry is not None:
+            entries.move_to_end(user_id)
+        return entry
+
+    def _store_local_entry(self, entries: OrderedDict, user_id: str, entry):
+        entries[user_id] = entry
+        if len(entries) > self.max_local_keys:
+            entries.popitem(last=False)
+
+
+class _Lease:
+    __slots__ = ("tokens", "expires_at", "size", "denied_until", "retry_after_ms")
+
+    def __init__(self):
+        self.tokens = 0
+        self.expires_at = 0.0
+        self.size = 1
+        self.denied_until = 0.0
+        self.retry_after_ms = 0
+
+
+class LeasedRateLimiter(RateLimiter):
+    """Two-tier limiter: workers lease blocks of quota from a shared Redis token bucket.
+
+    A lease is spent in process, so most requests are admitted with no network I/O.
+    Leased tokens are removed from the global bucket up front, so the limit still holds
+    across workers and nodes; unspent tokens simply lapse when the lease expires. The
+    lease size adapts per user: it doubles when a lease is used up and halves when one
+    expires half-unused, so idle users do not hoard quota other workers need.
+    """
+
+    def __init__(self, algorithm: TokenBucketLimiter, lease_size: int = 5, lease_ttl: float = 1.0, **kwargs):
+        super().__init__(algorithm, **kwargs)
+        self.lease_size = max(1, lease_size)
+        self.lease_ttl = lease_ttl
+        self._leases: "OrderedDict[str, _Lease]" = OrderedDict()
+
+    async def hit(self, user_id: str) -> RateLimitResult:
+        now = time.monotonic()
+        lease = self._local_entry(self._leases, user_id)
+        if lease is None:
+            lease = _Lease()
+            self._store_local_entry(self._leases, user_id, lease)
+
+        if lease.tokens > 0 and now < lease.expires_at:
+            lease.tokens -= 1
+            return RateLimitResult(True, self.algorithm.burst, lease.tokens, 0, int((lease.expires_at - now) * 1000))
+        if now < lease.denied_until:
+            # remember the global "no" until the bucket refills instead of asking Redis again
+            retry_after_ms = math.ceil((lease.denied_until - now) * 1000)
+            return RateLimitResult(False, self.algorithm.burst, 0, retry_after_ms, retry_after_ms)
+        if now < self._redis_down_until:
+            return self._fallback(user_id, now)
+
+        self._resize(lease, now)
+        try:
+            redis = await get_redis()
+            granted, remaining, retry_after_ms, reset_after_ms = await self.algorithm.acquire(
+                redis, self._key(user_id), lease.size
+            )
+        except Exception as e:
+            return self._on_redis_failure(user_id, now, e)
+
+        if granted <= 0:
+            lease.tokens = 0
+            lease.denied_until = now + retry_after_ms / 1000
+            return RateLimitResult(False, self.algorithm.burst, 0, retry_after_ms, reset_after_ms)
+
+        lease.tokens = granted - 1
+        lease.expires_at = now + self.lease_ttl
+        return RateLimitResult(True, self.algorithm.burst, lease.tokens + remaining, 0, reset_after_ms)
+
+    def _resize(self, lease: _Lease, now: float):
+        if lease.expires_at == 0.0:
+            return
+        if lease.tokens == 0 and now < lease.expires_at:
+            lease.size = min(self.lease_size, lease.size * 2)
+        elif lease.tokens * 2 >= lease.size:
+            lease.size = max(1, lease.size // 2)
+
+
+def build_rate_limiter() -> RateLimiter:
+    options = {
+        "fallback_requests": settings.RATE_LIMIT_FALLBACK_REQUESTS,
+        "redis_retry_interval": settings.RATE_LIMIT_REDIS_RETRY_INTERVAL,
+        "max_local_keys": settings.RATE_LIMIT_LOCAL_MAX_KEYS,
+    }
+    if settings.RATE_LIMIT_MODE == "hybrid":
+        # leases are carved out of a shared token bucket whatever RATE_LIMIT_ALGORITHM says
+        algorithm = TokenBucketLimiter(
+            settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_PERIOD, settings.RATE_LIMIT_BURST
+        )
+        return LeasedRateLimiter(
+            algorithm,
+            lease_size=settings.RATE_LIMIT_LEASE_SIZE,
+            lease_ttl=settings.RATE_LIMIT_LEASE_TTL,
+            **options,
+        )
+
+    algorithm = build_algorithm(
+        settings.RATE_LIMIT_ALGORITHM,
+        limit=settings.RATE_LIMIT_REQUESTS,
+        period=settings.RATE_LIMIT_PERIOD,
+        burst=settings.RATE_LIMIT_BURST,
+    )
+    return RateLimiter(algorithm, **options)
+
+limiter = build_rate_limiter()
+
+def rate_limit_headers(result: RateLimitResult) -> dict:
+    headers = {
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(max(0, result.remaining)),
+        "X-RateLimit-Reset": str(math.ceil(result.reset_after_ms / 1000)),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(result.retry_after_ms / 1000)))
+    return headers
+
+async def rate_limiter(response: Response, user_id: str = Depends(get_current_user)):
+    result = await limiter.hit(user_id)
+
+    headers = rate_limit_headers(result)
+    if not result.allowed:
+        _REJECTED.inc()
+        logger.warning("[RateLimiter] User '%s' exceeded rate limit", user_id)
+        raise RateLimitError("Too many requests. Try again later.", headers=headers)
+
+    _ALLOWED.inc()
+    response.headers.update(headers)
+    logger.debug("[RateLimiter] User '%s' remaining: %d", user_id, result.remaining)
@@ -0,0 +1,73 @@
+import asyncio
+import time
+from typing import AsyncGenerator, AsyncIterator
+from common.config.config import settings
+
+_END = object()
+
+async def coalesce_tokens(tokens: AsyncIterator[str], max_bytes: int = None, max_delay: float = None,
+                          max_pending: int = None) -> AsyncGenerator[str, None]:
+    """Batch a token stream into larger frames.
+
+    A frame is emitted once it holds `max_bytes` of UTF-8 text, or `max_delay`
+    seconds after its first token arrived, whichever comes first; the deadline
+    holds even while the upstream is silent. A `max_delay` of 0 or less passes
+    tokens through one by one. At most `max_pending` tokens are read ahead of
+    the consumer, so a slow client slows the upstream read instead of buffering
+    the whole reply.
+    """
+    max_bytes = settings.STREAM_COALESCE_MAX_BYTES if max_bytes is None else max_bytes
+    max_delay = settings.STREAM_COALESCE_MAX_DELAY if max_delay is None else max_delay
+    max_pending = settings.STREAM_COALESCE_MAX_PENDING if max_pending is None else max_pending
+    if max_delay <= 0:
+        async for token in tokens:
+            yield token
+        return
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_pending))
+
+    async def pump():
+        # no `finally` here: once cancelled, a put into a full queue would wait forever
+        try:
+            async for token in tokens:
+                await queue.put(token)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(_END)
+
+    task = asyncio.ensure_future(pump())
+    try:
+        item = await queue.get()
+        while item is not _END:
+            if isinstance(item, Exception):
+                raise item
+            parts = [item]
+            size = len(item.encode("utf-8"))
+            deadline = time.monotonic() + max_delay
+            item = None
+            while size < max_bytes:
+                if queue.empty():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = queue.get_nowait()
+                if item is _END or isinstance(item, Exception):
+                    break
+                parts.append(item)
+                size += len(item.encode("utf-8"))
+                item = None
+            yield "".join(parts)
+            if item is None:
+                item = await queue.get()
+    finally:
+        # the client went away (or the stream ended): stop reading from the LLM
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
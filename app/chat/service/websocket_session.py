@@ -0,0 +1,43 @@
+import logging
+from typing import List
+from app.chat.models.chat_models import ChatMessage
+from app.chat.repository.chat_repository import MAX_HISTORY, ChatRepository
+
+logger = logging.getLogger(__name__)
+
+class WebSocketSession:
+    """History for one user on one socket, loaded once and then kept up to date locally.
+
+    Appends go to Redis as deltas and the local list is extended in place. Every
+    repository write bumps the session's version counter, so when the counter
+    after our write is not exactly one past the one we last saw, someone else
+    (another socket, a REST call, compaction) wrote too and we reload.
+    """
+
+    def __init__(self, repo: ChatRepository, user_id: str):
+        self.repo = repo
+        self.user_id = user_id
+        self.history: List[ChatMessage] = []
+        self.version = 0
+        self.loaded = False
+        self.resyncs = 0
+
+    async def load(self):
+        session, self.version = await self.repo.get_session_versioned(self.user_id)
+        self.history = session.history
+        self.loaded = True
+
+    async def append(self, message: ChatMessage) -> List[ChatMessage]:
+        if not self.loaded:
+            await self.load()
+        version = await self.repo.append_messages(self.user_id, [message])
+        if version == self.version + 1:
+            self.history.append(message)
+            if len(self.history) > MAX_HISTORY:
+                del self.history[:-MAX_HISTORY]
+            self.version = version
+        else:
+            self.resyncs += 1
+            logger.debug(f"[WebSocketSession] Another writer touched '{self.user_id}', reloading history")
+            await self.load()
+        return list(self.history)
@@ -1,51 +1,140 @@
-from app.chat import init_chat
-from app.auth import init_auth
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from app.chat import get_chat_service, init_chat, start_chat, stop_chat
+from app.auth import init_auth
 from common.clients.redis_manager import init_redis, close_redis
-from app.chat.api.routers import router as chat_router
+from common.clients.http_manager import init_http_client, close_http_client, get_http_pool_stats
 from common.exceptions.exception_handlers import register_exception_handlers
+from common.metrics.middleware import init_metrics
+from common.profiling.middleware import init_profiling
+from common.profiling.startup import startup_report
 from common.logging.logger import init_logging, get_logger
+from common.logging.middleware import init_request_context
 
-init_logging()
 logger = get_logger(__name__)
-logger.info("Starting Chatbot API...")
+
+startup_report.record("imports", time.perf_counter() - _import_started)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    await init_redis()
+    # Startup: nothing here waits on the network except Redis/LLM discovery, and both are bounded by timeouts
+    with startup_report.phase("redis"):
+        await init_redis()
+    with startup_report.phase("http_client"):
+        await init_http_client()
+    await start_chat()
+    startup_report.log()
     yield
     # Shutdown
+    await stop_chat()
+    await close_http_client()
     await close_redis()
 
-app = FastAPI(
-    title="Chatbot Backend API",
-    version="1.1.0",
-    lifespan=lifespan
-)
+def _not_started() -> JSONResponse:
+    # no chat service before start_chat() has run in the lifespan, or after stop_chat()
+    return JSONResponse(status_code=503, content={"ready": False})
+
+def create_app() -> FastAPI:
+    """Build the API. Services are constructed in `lifespan`, so this does no I/O.
+
+    uvicorn --factory app.main:create_app
+    """
+    started = time.perf_counter()
+    init_logging()
+    logger.info("Starting Chatbot API...")
+
+    app = FastAPI(
+        title="Chatbot Backend API",
+        version="1.1.0",
+        lifespan=lifespan
+    )
+
+    # CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Routers
+    init_chat(app)
+    init_auth(app)
+
+    # Common exception handlers
+    register_exception_handlers(app)
+
+    # Prometheus metrics at /metrics (the chat service binds its gauges when it starts)
+    init_metrics(app)
+
+    # Opt-in request profiling (PROFILING_ENABLED), profiles under /admin/profiles
+    init_profiling(app)
+
+    # Request ids for log correlation (X-Request-ID)
+    init_request_context(app)
+
+    @app.get("/health", tags=["health"])
+    async def health_check():
+        return {"status": "ok", "message": "Chatbot API is running!"}
+
+    @app.get("/health/startup", tags=["health"])
+    async def startup_timings():
+        return startup_report.snapshot()
+
+    @app.get("/ready", tags=["health"])
+    async def readiness():
+        # 503 until every configured model is loaded somewhere, so no user request pays the model load
+        chat_service = get_chat_service()
+        if chat_service is None:
+            return _not_started()
+        status = chat_service.llm.model_manager.snapshot()
+        return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+    @app.get("/health/http-pool", tags=["health"])
+    async def http_pool_stats():
+        return get_http_pool_stats()
+
+    @app.get("/health/llm-backends", tags=["health"])
+    async def llm_backends():
+        chat_service = get_chat_service()
+        if chat_service is None:
+            return _not_started()
+        return chat_service.llm.router.snapshot()
+
+    @app.get("/health/llm-circuit", tags=["health"])
+    async def llm_circuit():
+        chat_service = get_chat_service()
+        if chat_service is None:
+            return _not_started()
+        return chat_service.llm.breaker.snapshot()
 
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    @app.get("/health/llm-admission", tags=["health"])
+    async def llm_admission():
+        chat_service = get_chat_service()
+        if chat_service is None:
+            return _not_started()
+        return chat_service.llm.admission.stats()
 
-# Routers
-init_chat(app)
-init_auth(app)
+    startup_report.record("create_app", time.perf_counter() - started)
+    return app
 
-# Common exception handlers
-register_exception_handlers(app)
+_app = None
 
-@app.get("/health", tags=["health"])
-async def health_check():
-    return {"status": "ok", "message": "Chatbot API is running!"}
+def __getattr__(name: str):
+    # `uvicorn app.main:app` keeps working, but the app is only built when asked for, not on import
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="127.0.0.1", port=9000, reload=True)
\ No newline at end of file
+    uvicorn.run("app.main:create_app", factory=True, host="127.0.0.1", port=9000, reload=True)
@@ -0,0 +1,47 @@
+"""Per-token and per-message serialization cost: the previous path vs. common.serialization.
+
+    python -m benchmarks.bench_serialization [--number N]
+"""
+import argparse
+import json
+import timeit
+from app.chat.models.chat_models import ChatMessage, StreamChunk
+from common.serialization.serializer import JsonSerializer, StreamFrames, build_serializer
+
+TOKEN = " world"
+STORED = json.dumps(ChatMessage(role="assistant", content="Hello there, how can I help you today?").model_dump())
+MESSAGE = ChatMessage(role="assistant", content="Hello there, how can I help you today?")
+
+def cases(codec):
+    frames = StreamFrames(codec)
+    return {
+        "chunk / model + json.dumps (before)": lambda: json.dumps(StreamChunk(token=TOKEN).model_dump()) + "\n",
+        f"chunk / template, {codec.name} (bytes)": lambda: frames.chunk(TOKEN) + b"\n",
+        f"chunk / template, {codec.name} (text)": lambda: frames.chunk_text(TOKEN),
+        "message dump / json.dumps (before)": lambda: json.dumps(MESSAGE.model_dump()),
+        f"message dump / {codec.name}": lambda: codec.dumps(MESSAGE.model_dump()),
+        "message load / json.loads (before)": lambda: ChatMessage(**json.loads(STORED)),
+        f"message load / {codec.name}": lambda: ChatMessage(**codec.loads(STORED)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    codecs = [JsonSerializer()]
+    fast = build_serializer("auto")
+    if fast.name != "json":
+        codecs.append(fast)
+
+    seen = set()
+    for codec in codecs:
+        for name, fn in cases(codec).items():
+            if name in seen:
+                continue
+            seen.add(name)
+            best = min(timeit.repeat(fn, number=args.number, repeat=3))
+            print(f"{name:<42} {best / args.number * 1e9:8.0f} ns/op")
+
+if __name__ == "__main__":
+    main()
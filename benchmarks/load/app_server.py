@@ -0,0 +1,39 @@
+"""Run the chat API under uvicorn for a load test, optionally against an in-process Redis stand-in.
+
+    python -m benchmarks.load.app_server --port 9100 [--fake-redis]
+
+Settings come from the environment as usual (LLM_BACKENDS, REDIS_URL, ...). With --fake-redis
+both Redis clients share one fakeredis server inside this process; Lua scripts need `lupa`,
+without it the rate limiter runs on its per-worker fallback.
+"""
+import argparse
+
+def use_fake_redis():
+    import fakeredis
+    from common.clients import redis_manager
+
+    server = fakeredis.FakeServer()
+
+    def create_client(decode_responses: bool):
+        return fakeredis.FakeAsyncRedis(server=server, decode_responses=decode_responses)
+
+    # init_redis resolves _create_client at call time, so patching the module attribute is enough
+    redis_manager._create_client = create_client
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--fake-redis", action="store_true", help="in-memory Redis (needs fakeredis)")
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+
+    if args.fake_redis:
+        use_fake_redis()
+    uvicorn.run("app.main:create_app", factory=True, host=args.host, port=args.port, log_level=args.log_level,
+                access_log=False)
+
+if __name__ == "__main__":
+    main()
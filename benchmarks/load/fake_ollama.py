@@ -0,0 +1,98 @@
+"""Stand-in for Ollama's /api/chat with a controllable token rate, time to first token and failure rate.
+
+    python -m benchmarks.load.fake_ollama --port 11500 --tokens-per-second 50 --ttft 0.2 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = ("the", "model", "answers", "with", "a", "steady", "stream", "of", "plausible", "tokens")
+
+def create_app(tokens_per_second: float = 50.0, ttft: float = 0.2, reply_tokens: int = 64,
+               error_rate: float = 0.0, error_status: int = 503, abort_rate: float = 0.0, seed: int = None) -> FastAPI:
+    """`error_rate` fails the request up front with `error_status`; `abort_rate` cuts a stream off half way."""
+    app = FastAPI()
+    rng = random.Random(seed)
+    interval = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+    stats = {"requests": 0, "streams": 0, "errors": 0, "aborts": 0, "warmups": 0}
+
+    def tokens():
+        return [f" {WORDS[i % len(WORDS)]}" for i in range(reply_tokens)]
+
+    def line(model: str, content: str, done: bool) -> bytes:
+        body = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "done": done}
+        if not done:
+            body["message"] = {"role": "assistant", "content": content}
+        return json.dumps(body).encode("utf-8") + b"\n"
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": []}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        payload = await request.json()
+        model = payload.get("model", "fake")
+        if not payload.get("messages"):
+            # ModelManager warm-up / keep-alive: load nothing, answer straight away
+            stats["warmups"] += 1
+            return {"model": model, "message": {"role": "assistant", "content": ""}, "done": True}
+
+        stats["requests"] += 1
+        if error_rate and rng.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse(status_code=error_status, content={"error": "injected failure"})
+
+        if not payload.get("stream", True):
+            await asyncio.sleep(ttft + interval * (reply_tokens - 1))
+            return {"model": model, "message": {"role": "assistant", "content": "".join(tokens())}, "done": True}
+
+        stats["streams"] += 1
+        abort_at = rng.randrange(1, reply_tokens) if abort_rate and reply_tokens > 1 and rng.random() < abort_rate else None
+
+        async def body():
+            await asyncio.sleep(ttft)
+            for i, token in enumerate(tokens()):
+                if i == abort_at:
+                    stats["aborts"] += 1
+                    raise RuntimeError("injected mid-stream abort")
+                if i:
+                    await asyncio.sleep(interval)
+                yield line(model, token, False)
+            yield line(model, "", True)
+
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    return app
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="per stream; 0 = as fast as possible")
+    parser.add_argument("--ttft", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--reply-tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failed up front")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--abort-rate", type=float, default=0.0, help="share of streams cut off mid-reply")
+    parser.add_argument("--seed", type=int, default=None)
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    add_arguments(parser)
+    args = parser.parse_args()
+    app = create_app(args.tokens_per_second, args.ttft, args.reply_tokens, args.error_rate,
+                     args.error_status, args.abort_rate, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+if __name__ == "__main__":
+    main()
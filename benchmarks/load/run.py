@@ -0,0 +1,393 @@
+"""End-to-end load test of /chat/message (plain and streaming) and /chat/ws against a fake Ollama.
+
+    python -m benchmarks.load.run --mode rest,stream,ws --users 50 --duration 30 --output load.json
+
+Starts the fake Ollama backend(s) and the API in subprocesses (Redis is in-memory unless
+--redis-url is given), drives a closed loop of concurrent users, and writes one JSON document
+with throughput, latency and time-to-first-token percentiles and API CPU time per request.
+Use --target to aim at an already running deployment instead.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+import httpx
+import jwt
+from benchmarks.load import fake_ollama
+
+ROOT = Path(__file__).resolve().parents[2]
+MODES = ("rest", "stream", "ws")
+
+def percentiles(values: List[float]) -> Optional[dict]:
+    """p50/p95/p99/mean/max in milliseconds, nearest-rank."""
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+    return {
+        "p50": round(rank(50) * 1000, 2),
+        "p95": round(rank(95) * 1000, 2),
+        "p99": round(rank(99) * 1000, 2),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 2),
+        "max": round(ordered[-1] * 1000, 2),
+    }
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """user+system CPU of a process from /proc (Linux); None elsewhere."""
+    try:
+        fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Recorder:
+    """Outcome of every request in the measured window; warm-up requests are dropped."""
+
+    def __init__(self):
+        self.recording = False
+        self.latencies: List[float] = []
+        self.ttfts: List[float] = []
+        self.frames: List[int] = []
+        self.errors = Counter()
+
+    def ok(self, latency: float, ttft: float = None, frames: int = None):
+        if not self.recording:
+            return
+        self.latencies.append(latency)
+        if ttft is not None:
+            self.ttfts.append(ttft)
+        if frames is not None:
+            self.frames.append(frames)
+
+    def error(self, kind: str):
+        if self.recording:
+            self.errors[kind] += 1
+
+
+class LoadTest:
+    def __init__(self, args, base_url: str, server_pid: Optional[int], fake_urls: List[str]):
+        self.args = args
+        self.base_url = base_url
+        self.server_pid = server_pid
+        self.fake_urls = fake_urls
+
+    def token(self, user_id: str) -> str:
+        expires = datetime.now(timezone.utc) + timedelta(hours=1)
+        return jwt.encode({"sub": user_id, "exp": expires}, self.args.jwt_secret, algorithm="HS256")
+
+    def message(self, user_id: str, seq: int) -> str:
+        if self.args.same_prompt:
+            return "What is the capital of France?"
+        # unique per turn so the response cache and request coalescing do not flatter the numbers
+        return f"Load test turn {seq} from {user_id}: what is the capital of France?"
+
+    async def rest_user(self, client: httpx.AsyncClient, user_id: str, stream: bool, recorder: Recorder,
+                        stop_at: float):
+        headers = {"Authorization": f"Bearer {self.token(user_id)}"}
+        seq = 0
+        while time.monotonic() < stop_at:
+            body = {"user_id": user_id, "message": self.message(user_id, seq), "coalesce": not self.args.no_coalesce}
+            seq += 1
+            started = time.perf_counter()
+            try:
+                if stream:
+                    ttft, frames = None, 0
+                    async with client.stream("POST", "/chat/message", params={"stream": "true"},
+                                             json=body, headers=headers) as resp:
+                        if resp.status_code != 200:
+                            await resp.aread()
+                            recorder.error(str(resp.status_code))
+                        else:
+                            async for line in resp.aiter_lines():
+                                if line:
+                                    if ttft is None:
+                                        ttft = time.perf_counter() - started
+                                    frames += 1
+                            recorder.ok(time.perf_counter() - started, ttft, frames)
+                else:
+                    resp = await client.post("/chat/message", json=body, headers=headers)
+                    if resp.status_code != 200:
+                        recorder.error(str(resp.status_code))
+                    else:
+                        recorder.ok(time.perf_counter() - started)
+            except httpx.HTTPError as e:
+                recorder.error(type(e).__name__)
+            if self.args.think_time:
+                await asyncio.sleep(self.args.think_time)
+
+    async def ws_user(self, user_id: str, recorder: Recorder, stop_at: float):
+        import websockets
+
+        url = self.base_url.replace("http", "ws", 1) + "/chat/ws"
+        seq = 0
+        while time.monotonic() < stop_at:
+            try:
+                async with websockets.connect(url, max_size=None) as ws:
+                    while time.monotonic() < stop_at:
+                        body = {"user_id": user_id, "message": self.message(user_id, seq),
+                                "coalesce": not self.args.no_coalesce}
+                        seq += 1
+                        if not await self.ws_turn(ws, body, recorder):
+                            break  # the server closes the socket after an error frame: reconnect
+                        if self.args.think_time:
+                            await asyncio.sleep(self.args.think_time)
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                recorder.error(type(e).__name__)
+
+    async def ws_turn(self, ws, body: dict, recorder: Recorder) -> bool:
+        started = time.perf_counter()
+        await ws.send(json.dumps(body))
+        ttft, frames = None, 0
+        while True:
+            frame = json.loads(await asyncio.wait_for(ws.recv(), self.args.timeout))
+            if "error" in frame:
+                recorder.error("ws_error")
+                return False
+            if frame.get("is_final"):
+                recorder.ok(time.perf_counter() - started, ttft, frames)
+                return True
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            frames += 1
+
+    async def fake_stats(self, client: httpx.AsyncClient) -> Optional[Dict[str, int]]:
+        if not self.fake_urls:
+            return None
+        total = Counter()
+        for url in self.fake_urls:
+            total.update((await client.get(f"{url}/stats")).json())
+        return dict(total)
+
+    async def scenario(self, mode: str) -> dict:
+        args = self.args
+        recorder = Recorder()
+        limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=args.timeout) as client:
+            stop_at = time.monotonic() + args.warmup + args.duration
+            users = [f"load-{mode}-{i}" for i in range(args.users)]
+            if mode == "ws":
+                tasks = [asyncio.ensure_future(self.ws_user(u, recorder, stop_at)) for u in users]
+            else:
+                tasks = [asyncio.ensure_future(self.rest_user(client, u, mode == "stream", recorder, stop_at)) for u in users]
+
+            await asyncio.sleep(args.warmup)
+            recorder.recording = True
+            upstream_before = await self.fake_stats(client)
+            cpu_before = process_cpu_seconds(self.server_pid) if self.server_pid else None
+            started = time.perf_counter()
+            await asyncio.sleep(max(0.0, stop_at - time.monotonic()))
+            elapsed = time.perf_counter() - started
+            recorder.recording = False
+            cpu_after = process_cpu_seconds(self.server_pid) if self.server_pid else None
+            upstream_after = await self.fake_stats(client)
+            # let in-flight requests finish so the next scenario starts from an idle server
+            await asyncio.wait(tasks, timeout=args.timeout)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        completed = len(recorder.latencies)
+        cpu = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+        return {
+            "mode": mode,
+            "users": args.users,
+            "duration_s": round(elapsed, 3),
+            "requests": completed + sum(recorder.errors.values()),
+            "completed": completed,
+            "errors": dict(recorder.errors),
+            "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": percentiles(recorder.latencies),
+            "ttft_ms": percentiles(recorder.ttfts),
+            "frames_per_reply": round(sum(recorder.frames) / len(recorder.frames), 2) if recorder.frames else None,
+            "server_cpu_s": round(cpu, 3) if cpu is not None else None,
+            "server_cpu_ms_per_request": round(cpu / completed * 1000, 3) if cpu is not None and completed else None,
+            "upstream": ({k: upstream_after[k] - upstream_before.get(k, 0) for k in upstream_after}
+                         if upstream_before is not None else None),
+        }
+
+
+class Servers:
+    """Fake Ollama backend(s) and the API as subprocesses, torn down together."""
+
+    def __init__(self, args):
+        self.args = args
+        self.procs: List[subprocess.Popen] = []
+        self.log = tempfile.NamedTemporaryFile(prefix="loadtest-", suffix=".log", delete=False)
+        self.fake_urls: List[str] = []
+        self.api_url = None
+        self.api_pid = None
+
+    def spawn(self, argv: List[str], env: dict = None) -> subprocess.Popen:
+        proc = subprocess.Popen([sys.executable, "-m"] + argv, cwd=ROOT, env=env,
+                                stdout=self.log, stderr=subprocess.STDOUT)
+        self.procs.append(proc)
+        return proc
+
+    async def __aenter__(self):
+        args = self.args
+        for _ in range(args.fake_backends):
+            port = free_port()
+            self.spawn(["benchmarks.load.fake_ollama", "--port", str(port)] + fake_ollama_argv(args))
+            self.fake_urls.append(f"http://127.0.0.1:{port}")
+
+        env = dict(os.environ)
+        env.update({
+            "LLM_BACKENDS": json.dumps([f"{url}/api/chat" for url in self.fake_urls]),
+            "JWT_SECRET_KEY": args.jwt_secret,
+            "RATE_LIMIT_REQUESTS": str(args.rate_limit),
+        })
+        if args.redis_url:
+            env["REDIS_URL"] = args.redis_url
+        for item in args.env:
+            key, _, value = item.partition("=")
+            env[key] = value
+
+        port = free_port()
+        argv = ["benchmarks.load.app_server", "--port", str(port)] + ([] if args.redis_url else ["--fake-redis"])
+        self.api_pid = self.spawn(argv, env).pid
+        self.api_url = f"http://127.0.0.1:{port}"
+        try:
+            await self.wait_ready()
+        except BaseException:
+            self.stop()
+            raise
+        return self
+
+    async def wait_ready(self, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        urls = [f"{url}/api/tags" for url in self.fake_urls] + [f"{self.api_url}/ready"]
+        async with httpx.AsyncClient(timeout=2.0) as client:
+            for url in urls:
+                while True:
+                    if any(p.poll() is not None for p in self.procs):
+                        raise RuntimeError(f"A server exited during startup, see {self.log.name}")
+                    try:
+                        if (await client.get(url)).status_code == 200:
+                            break
+                    except httpx.HTTPError:
+                        pass
+                    if time.monotonic() > deadline:
+                        raise RuntimeError(f"{url} not ready after {timeout}s, see {self.log.name}")
+                    await asyncio.sleep(0.2)
+
+    def stop(self):
+        for proc in self.procs:
+            proc.terminate()
+        for proc in self.procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        self.log.close()
+
+    async def __aexit__(self, *exc):
+        self.stop()
+
+
+def fake_ollama_argv(args) -> List[str]:
+    return [
+        "--tokens-per-second", str(args.tokens_per_second), "--ttft", str(args.ttft),
+        "--reply-tokens", str(args.reply_tokens), "--error-rate", str(args.error_rate),
+        "--error-status", str(args.error_status), "--abort-rate", str(args.abort_rate),
+    ] + (["--seed", str(args.seed)] if args.seed is not None else [])
+
+async def run(args) -> dict:
+    modes = [m.strip() for m in args.mode.split(",") if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        raise SystemExit(f"Unknown mode(s): {', '.join(sorted(unknown))}; choose from {', '.join(MODES)}")
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "scenarios": [],
+    }
+    if args.target:
+        test = LoadTest(args, args.target.rstrip("/"), args.server_pid, [])
+        for mode in modes:
+            report["scenarios"].append(await test.scenario(mode))
+        return report
+
+    async with Servers(args) as servers:
+        test = LoadTest(args, servers.api_url, servers.api_pid, servers.fake_urls)
+        for mode in modes:
+            print(f"[loadtest] {mode}: {args.users} users for {args.duration}s ...", file=sys.stderr)
+            report["scenarios"].append(await test.scenario(mode))
+    return report
+
+def summary(report: dict) -> str:
+    lines = [f"{'mode':<7}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ttft p50':>10}{'ttft p95':>10}"
+             f"{'cpu ms/req':>12}{'errors':>8}"]
+    for s in report["scenarios"]:
+        lat, ttft = s["latency_ms"] or {}, s["ttft_ms"] or {}
+        lines.append(
+            f"{s['mode']:<7}{s['throughput_rps']:>9}{lat.get('p50', '-'):>10}{lat.get('p95', '-'):>10}"
+            f"{lat.get('p99', '-'):>10}{ttft.get('p50', '-'):>10}{ttft.get('p95', '-'):>10}"
+            f"{s['server_cpu_ms_per_request'] if s['server_cpu_ms_per_request'] is not None else '-':>12}"
+            f"{sum(s['errors'].values()):>8}"
+        )
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", default="rest,stream,ws", help=f"comma-separated, from {', '.join(MODES)}")
+    parser.add_argument("--users", type=int, default=20, help="concurrent users, each in a closed loop")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds per mode")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before each mode")
+    parser.add_argument("--think-time", type=float, default=0.0, help="pause between a user's requests")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--same-prompt", action="store_true", help="identical prompts, exercising cache and coalescing")
+    parser.add_argument("--no-coalesce", action="store_true", help="one stream frame per token")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+
+    servers = parser.add_argument_group("servers started by the harness")
+    servers.add_argument("--fake-backends", type=int, default=1, help="fake Ollama processes behind the router")
+    servers.add_argument("--redis-url", help="real Redis; default is an in-memory stand-in (needs fakeredis)")
+    servers.add_argument("--rate-limit", type=int, default=1_000_000, help="RATE_LIMIT_REQUESTS for the API")
+    servers.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra API settings")
+    servers.add_argument("--jwt-secret", default="loadtest-secret-not-for-production-use")
+    fake_ollama.add_arguments(servers)
+
+    existing = parser.add_argument_group("existing deployment")
+    existing.add_argument("--target", help="base URL of a running API; nothing is started")
+    existing.add_argument("--server-pid", type=int, help="local API pid, for CPU per request with --target")
+
+    args = parser.parse_args()
+    report = asyncio.run(run(args))
+    document = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(document + "\n")
+    else:
+        print(document)
+    print(summary(report), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
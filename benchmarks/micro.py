@@ -0,0 +1,260 @@
+"""Micro-benchmarks for the per-request and per-token hot paths, with a regression gate.
+
+    python -m benchmarks.micro                 # run and print
+    python -m benchmarks.micro --save          # run and write benchmarks/baseline.json
+    python -m benchmarks.micro --check         # run and exit 1 if a case regressed past --threshold
+
+Everything runs in process: Redis is a stand-in that answers from memory, so the numbers are
+the Python cost of each path, not network time. Timings are best-of-N and normalized by a fixed
+pure-Python calibration loop, so a baseline recorded on one machine still gates on another of
+a different speed; re-record the baseline on the CI runner when hardware changes a lot.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List
+from unittest.mock import patch
+from fastapi import Response
+from app.auth.service.jwt_service import JWTService
+from app.chat.adapters.llm_adapter import LLMAdapter
+from app.chat.models.chat_models import ChatMessage
+from app.chat.repository import chat_repository
+from app.chat.repository.chat_repository import ChatRepository
+from app.chat.repository.session_cache import SessionCache
+from app.chat.repository.session_codec import SessionCodec
+from app.chat.service import rate_limiter_service
+from app.chat.service.rate_limit_algorithms import GCRALimiter, TokenBucketLimiter
+from app.chat.service.rate_limiter_service import LeasedRateLimiter, RateLimiter
+from common.serialization.serializer import stream_frames
+
+BASELINE = Path(__file__).with_name("baseline.json")
+CALIBRATION = "_calibration"
+
+def history(n: int = 50) -> List[ChatMessage]:
+    return [
+        ChatMessage(role="user" if i % 2 == 0 else "assistant", content=f"message {i} " + "lorem ipsum " * 8)
+        for i in range(n)
+    ]
+
+
+class MemoryRedis:
+    """Just enough of redis.asyncio for the paths below, answered from memory."""
+
+    def __init__(self, lists: Dict[str, List[bytes]] = None, script_reply: List[int] = None):
+        self.lists = lists or {}
+        self.script_reply = script_reply or [1, 0, 0, 0]
+
+    async def lrange(self, key, start, end):
+        return self.lists.get(key, [])
+
+    async def evalsha(self, sha, numkeys, *args):
+        return self.script_reply
+
+
+class Case:
+    def __init__(self, name: str, fn: Callable, is_async: bool = False, setup: Callable = None):
+        self.name = name
+        self.fn = fn
+        self.is_async = is_async
+        self.setup = setup  # context manager factory wrapped around the timing (patches)
+
+    def time(self, number: int, loop: asyncio.AbstractEventLoop) -> float:
+        # like timeit: a collection landing in one repeat and not another is noise, not cost
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with (self.setup() if self.setup else _nothing()):
+                if not self.is_async:
+                    fn = self.fn
+                    started = time.perf_counter()
+                    for _ in range(number):
+                        fn()
+                    return time.perf_counter() - started
+                return loop.run_until_complete(self._time_async(number))
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    async def _time_async(self, number: int) -> float:
+        fn = self.fn
+        started = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        return time.perf_counter() - started
+
+@contextmanager
+def _nothing():
+    yield
+
+def _calibration():
+    total = 0
+    for i in range(1000):
+        total += i * i
+    return total
+
+def cases() -> List[Case]:
+    messages = history(50)
+    adapter = LLMAdapter(base_url="http://127.0.0.1:1/api/chat")
+
+    def repo_case(name: str, codec: SessionCodec) -> Case:
+        repo = ChatRepository(codec=codec, cache=SessionCache(max_entries=0))
+        redis = MemoryRedis({repo._key("bench"): [codec.encode(m.model_dump()) for m in messages]})
+
+        async def get_redis(binary: bool = False):
+            return redis
+
+        return Case(name, lambda: repo.get_session("bench"), is_async=True,
+                    setup=lambda: patch.object(chat_repository, "get_redis", get_redis))
+
+    jwt_cached = JWTService()
+    jwt_uncached = JWTService()
+    jwt_uncached.cache_max_size = 0
+    token = jwt_cached.create_token("bench-user")
+    jwt_cached.decode_token(token)
+
+    def limiter_case(name: str, limiter: RateLimiter, reply: List[int]) -> Case:
+        redis = MemoryRedis(script_reply=reply)
+
+        async def get_redis(binary: bool = False):
+            return redis
+
+        @contextmanager
+        def setup():
+            with patch.object(rate_limiter_service, "limiter", limiter), \
+                    patch.object(rate_limiter_service, "get_redis", get_redis):
+                yield
+
+        return Case(name, lambda: rate_limiter_service.rate_limiter(Response(), user_id="bench-user"),
+                    is_async=True, setup=setup)
+
+    return [
+        Case(CALIBRATION, _calibration),
+        Case("adapter.build_messages[50]", lambda: adapter._build_messages(messages, "a new question")),
+        repo_case("repository.get_session[50,json]", SessionCodec("json")),
+        repo_case("repository.get_session[50,msgpack]", SessionCodec("msgpack")),
+        Case("stream.chunk_frame", lambda: stream_frames.chunk(" token") + b"\n"),
+        Case("jwt.decode_token[cached]", lambda: jwt_cached.decode_token(token)),
+        Case("jwt.decode_token[uncached]", lambda: jwt_uncached.decode_token(token)),
+        # a huge lease and remaining count: every call after the first is served from the lease
+        limiter_case("rate_limiter[hybrid,leased]",
+                     LeasedRateLimiter(TokenBucketLimiter(10**9, 1), lease_size=10**9, lease_ttl=3600),
+                     [10**9, 10**9, 0, 1000]),
+        limiter_case("rate_limiter[global,gcra]", RateLimiter(GCRALimiter(10**9, 1)), [1, 10**9, 0, 1000]),
+    ]
+
+def measure(case: Case, loop, min_time: float, repeat: int) -> float:
+    """Best-of-`repeat` nanoseconds per call, each repeat at least `min_time` long."""
+    number = 1
+    while True:
+        elapsed = case.time(number, loop)
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed
+    for _ in range(repeat - 1):
+        best = min(best, case.time(number, loop))
+    return best / number * 1e9
+
+def run(selected: Callable[[str], bool], min_time: float, repeat: int) -> Dict[str, float]:
+    loop = asyncio.new_event_loop()
+    try:
+        results = {}
+        all_cases = cases()
+        calibration = next(case for case in all_cases if case.name == CALIBRATION)
+        for case in all_cases:
+            if case.name != CALIBRATION and not selected(case.name):
+                continue
+            results[case.name] = measure(case, loop, min_time, repeat)
+        # calibrate again at the end and keep the faster: one slow patch of CPU must not rescale every case
+        results[CALIBRATION] = min(results[CALIBRATION], measure(calibration, loop, min_time, repeat))
+        return results
+    finally:
+        loop.close()
+
+def compare(runs: List[Dict[str, float]], baseline: Dict[str, float], threshold: float) -> List[dict]:
+    """One row per case; `ratio` is current/baseline after dividing both by their calibration.
+
+    Each run is normalized by its own calibration; a case measured in several runs keeps its best ratio.
+    """
+    best: Dict[str, tuple] = {}
+    for results in runs:
+        scale = baseline[CALIBRATION] / results[CALIBRATION]
+        for name, ns in results.items():
+            if name == CALIBRATION:
+                continue
+            before = baseline.get(name)
+            ratio = ns * scale / before if before else None
+            if name not in best or (ratio is not None and ratio < best[name][1]):
+                best[name] = (ns, ratio)
+
+    rows = []
+    for name, (ns, ratio) in best.items():
+        before = baseline.get(name)
+        rows.append({
+            "case": name,
+            "ns_per_op": round(ns, 1),
+            "baseline_ns_per_op": round(before, 1) if before else None,
+            "ratio": round(ratio, 3) if ratio is not None else None,
+            "regressed": ratio is not None and ratio > 1 + threshold,
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any case is slower than the baseline allows")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--filter", help="only cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--confirm", type=int, default=2, help="re-runs of an apparently regressed case before failing")
+    parser.add_argument("--json", action="store_true", help="print the comparison as JSON")
+    args = parser.parse_args()
+
+    results = run(lambda name: not args.filter or args.filter in name, args.min_time, args.repeat)
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline.exists() else None
+
+    if args.save:
+        document = {"recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "results": {k: round(v, 1) for k, v in (dict(baseline or {}, **results)).items()}}
+        args.baseline.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+
+    if baseline is None or CALIBRATION not in baseline:
+        for name, ns in results.items():
+            print(f"{name:<40} {ns:12.1f} ns/op")
+        if args.check:
+            sys.exit(f"No baseline at {args.baseline}; record one with --save")
+        return
+
+    runs = [results]
+    rows = compare(runs, baseline, args.threshold)
+    for _ in range(args.confirm):
+        suspects = {row["case"] for row in rows if row["regressed"]}
+        if not suspects:
+            break
+        # a shared or throttled CPU makes single runs noisy; a real regression survives a re-run
+        runs.append(run(suspects.__contains__, args.min_time, args.repeat))
+        rows = compare(runs, baseline, args.threshold)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'case':<40}{'ns/op':>12}{'baseline':>12}{'ratio':>8}")
+        for row in rows:
+            flag = "  REGRESSED" if row["regressed"] else ""
+            base = row["baseline_ns_per_op"] if row["baseline_ns_per_op"] is not None else "new"
+            ratio = row["ratio"] if row["ratio"] is not None else "-"
+            print(f"{row['case']:<40}{row['ns_per_op']:>12}{base:>12}{ratio:>8}{flag}")
+
+    regressed = [row["case"] for row in rows if row["regressed"]]
+    if args.check and regressed:
+        sys.exit(f"Slower than baseline by more than {args.threshold:.0%}: {', '.join(regressed)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Import-time and startup-time report for a fresh worker, with a budget gate.
+
+    python -m benchmarks.startup                          # report for app.main
+    python -m benchmarks.startup --target app.chat.main   # another entry point
+    python -m benchmarks.startup --budget-ms 1000         # exit 1 if the best run is slower
+
+Each run is a new interpreter started with -X importtime. It imports the entry point, calls
+create_app() and runs the lifespan startup against an in-process Redis (fakeredis), then prints
+the app's own startup report. LLM_BACKENDS points at a closed port, so discovery and model warm-up
+cost nothing here; pass --discover to include the Docker host lookup. Runs are best-of-N, because
+the first one also pays for compiling .pyc files.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+MARKER = "STARTUP_REPORT "
+
+CHILD = """
+import asyncio, json, sys
+__import__(sys.argv[1])  # not importlib.import_module: -X importtime skips the line for modules loaded that way
+module = sys.modules[sys.argv[1]]
+from benchmarks.load.app_server import use_fake_redis
+from common.profiling.startup import startup_report
+
+async def start():
+    app = module.create_app()
+    async with app.router.lifespan_context(app):
+        report = startup_report.snapshot()
+    return report
+
+use_fake_redis()
+print({marker!r} + json.dumps(asyncio.run(start())), flush=True)
+""".format(marker=MARKER)
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) per line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if self_us.strip().isdigit():  # skips the header line
+            rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def run_once(target: str, discover: bool) -> dict:
+    env = dict(os.environ)
+    env.setdefault("JWT_SECRET_KEY", "startup-report")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    if not discover:
+        env["LLM_BACKENDS"] = json.dumps(["http://127.0.0.1:9/api/chat"])
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD, target],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    lines = [line for line in proc.stdout.splitlines() if line.startswith(MARKER)]
+    if proc.returncode != 0 or not lines:
+        sys.exit(f"{target} failed to start:\n{proc.stderr[-2000:]}")
+    imports = parse_importtime(proc.stderr)
+    # a module is listed after everything it pulled in: cut at the target so the harness's own imports are left out
+    end = next((i for i, (name, _, _) in enumerate(imports) if name.strip() == target), len(imports) - 1)
+    return {
+        "report": json.loads(lines[-1][len(MARKER):]),
+        "import_us": imports[end][2] if imports else None,
+        "imports": imports[:end + 1],
+    }
+
+def by_package(imports: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """Self time summed per top-level package, so 'fastapi' covers every fastapi.* module."""
+    totals: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in imports:
+        totals[name.strip().split(".")[0]] += self_us
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="app.main", help="module exposing create_app()")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="packages and modules listed")
+    parser.add_argument("--discover", action="store_true", help="leave LLM_BACKENDS unset and time the DNS lookup")
+    parser.add_argument("--budget-ms", type=float, default=None, help="exit 1 if the best startup exceeds this")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    runs = [run_once(args.target, args.discover) for _ in range(args.runs)]
+    best = min(runs, key=lambda r: r["report"]["total_ms"])
+    report = best["report"]
+
+    if args.json:
+        print(json.dumps({
+            "target": args.target,
+            "startup": report,
+            "import_ms": round(best["import_us"] / 1000, 1) if best["import_us"] else None,
+            "packages_ms": {k: round(v / 1000, 1) for k, v in list(by_package(best["imports"]).items())[:args.top]},
+        }, indent=2))
+    else:
+        print(f"{args.target}: ready in {report['total_ms']}ms (best of {args.runs})")
+        for phase in report["phases"]:
+            print(f"  {phase['name']:<24}{phase['ms']:>10.1f} ms")
+        print("\nimport time by package (self, ms)")
+        for package, us in list(by_package(best["imports"]).items())[:args.top]:
+            print(f"  {package:<24}{us / 1000:>10.1f}")
+        print("\nslowest modules (self, ms)")
+        for name, self_us, _ in sorted(best["imports"], key=lambda row: -row[1])[:args.top]:
+            print(f"  {name.strip():<48}{self_us / 1000:>10.1f}")
+
+    if args.budget_ms is not None and report["total_ms"] > args.budget_ms:
+        sys.exit(f"Startup took {report['total_ms']}ms, over the {args.budget_ms}ms budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#common/clients/http_manager.py
+import httpx
+from common.config.config import settings
+from common.exceptions.infra_exceptions import HttpClientError
+
+_http_client = None  # internal global — one pooled client per worker
+
+def _build_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+def _build_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=settings.LLM_HTTP_CONNECT_TIMEOUT,
+        read=settings.LLM_HTTP_READ_TIMEOUT,
+        write=settings.LLM_HTTP_WRITE_TIMEOUT,
+        pool=settings.LLM_HTTP_POOL_TIMEOUT,
+    )
+
+async def init_http_client():
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(limits=_build_limits(), timeout=_build_timeout())
+    return _http_client
+
+async def get_http_client():
+    if _http_client is None:
+        raise HttpClientError("HTTP client not initialized. Did you call init_http_client()?")
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client:
+        await _http_client.aclose()
+        _http_client = None
+
+def get_http_pool_stats() -> dict:
+    """Snapshot of the shared connection pool, used to size the LLM_HTTP_* limits."""
+    stats = {
+        "initialized": _http_client is not None,
+        "max_connections": settings.LLM_HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        "open": 0,
+        "active": 0,
+        "idle": 0,
+        "pending_requests": 0,
+    }
+    if _http_client is None:
+        return stats
+
+    # httpcore keeps the pool on the default transport; its internals are read-only here
+    pool = getattr(_http_client._transport, "_pool", None)
+    if pool is None:
+        return stats
+    connections = list(getattr(pool, "connections", []))
+    idle = sum(1 for conn in connections if conn.is_idle())
+    stats["open"] = len(connections)
+    stats["idle"] = idle
+    stats["active"] = len(connections) - idle
+    stats["pending_requests"] = len(getattr(pool, "_requests", []))
+    return stats
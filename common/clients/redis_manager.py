@@ -1,28 +1,128 @@
 #common/clients/redis_manager.py
+from typing import List, Tuple
 import redis.asyncio as aioredis
+from redis.asyncio.connection import BlockingConnectionPool, SSLConnection, parse_url
+from redis.asyncio.sentinel import Sentinel, SentinelConnectionPool, SentinelManagedSSLConnection
 from common.config.config import settings
 from common.exceptions.infra_exceptions import RedisError
 
-_redis = None  # internal global — private, module-level cache  
+REDIS_MODES = ("standalone", "sentinel", "cluster")
 
-async def init_redis():
-    global _redis
-    if _redis is None:
-        _redis = await aioredis.from_url(
+_redis = None  # internal global — private, module-level cache
+_redis_binary = None  # same server, raw bytes in and out (no str decoding), for binary payloads
+_sentinel = None  # sentinel mode: the shared Sentinel both clients discover the master through
+
+
+class BlockingSentinelConnectionPool(SentinelConnectionPool, BlockingConnectionPool):
+    """Sentinel master discovery with the blocking pool's bounded wait for a free connection.
+
+    The stock sentinel pool raises as soon as `max_connections` are checked out.
+    SentinelConnectionPool only overrides discovery (reset, owns_connection,
+    get_master_address) and BlockingConnectionPool only checkout and release,
+    so the two compose cleanly.
+    """
+
+
+def user_key(prefix: str, user_id: str) -> str:
+    """`prefix{user_id}`: Redis Cluster hashes only the part in braces, so every key built
+    for one user lands in the same slot and can share a MULTI/EXEC, WATCH or script."""
+    return f"{prefix}{{{user_id}}}"
+
+def is_cluster() -> bool:
+    return settings.REDIS_MODE.lower() == "cluster"
+
+def parse_sentinels(entries: List[str]) -> List[Tuple[str, int]]:
+    sentinels = []
+    for entry in entries:
+        host, _, port = entry.rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"Invalid REDIS_SENTINELS entry '{entry}', expected host:port")
+        sentinels.append((host, int(port)))
+    return sentinels
+
+def _connection_options() -> dict:
+    return {
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT or None,
+        "socket_connect_timeout": settings.REDIS_SOCKET_CONNECT_TIMEOUT or None,
+        "socket_keepalive": settings.REDIS_SOCKET_KEEPALIVE,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+    }
+
+def _create_client(decode_responses: bool):
+    global _sentinel
+    mode = settings.REDIS_MODE.lower()
+    options = _connection_options()
+    text = {"decode_responses": True, "encoding": "utf-8"} if decode_responses else {"decode_responses": False}
+
+    if mode == "standalone":
+        # blocking pool: a burst beyond max_connections waits up to REDIS_POOL_TIMEOUT instead of failing at once
+        pool = BlockingConnectionPool.from_url(
             settings.REDIS_URL,
-            decode_responses=True,
-            encoding="utf-8",
-            max_connections=10,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            **options,
+            **text,
         )
-    return _redis
+        return aioredis.Redis.from_pool(pool)
+
+    if mode == "sentinel":
+        # REDIS_URL still carries the master's credentials and db; its host is ignored in favour of discovery
+        url = parse_url(settings.REDIS_URL)
+        master = {k: url[k] for k in ("username", "password", "db") if k in url}
+        if url.get("connection_class") is SSLConnection:
+            master["connection_class"] = SentinelManagedSSLConnection
+        if _sentinel is None:
+            _sentinel = Sentinel(
+                parse_sentinels(settings.REDIS_SENTINELS),
+                sentinel_kwargs={k: v for k, v in options.items() if k != "health_check_interval"},
+            )
+        return _sentinel.master_for(
+            settings.REDIS_SENTINEL_MASTER,
+            connection_pool_class=BlockingSentinelConnectionPool,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            **master,
+            **options,
+            **text,
+        )
+
+    if mode == "cluster":
+        from redis.asyncio.cluster import RedisCluster  # heavy, and only cluster deployments need it
 
-async def get_redis():
+        # one pool per node; the cluster client has no blocking variant, so an exhausted node pool raises
+        return RedisCluster.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            **options,
+            **text,
+        )
+
+    raise ValueError(f"Unknown REDIS_MODE '{settings.REDIS_MODE}', expected one of {', '.join(REDIS_MODES)}")
+
+async def init_redis():
+    global _redis, _redis_binary
     if _redis is None:
-        raise RedisError("Redis not initialized. Did you call init_redis()?") 
+        _redis = _create_client(decode_responses=True)
+    if _redis_binary is None:
+        # connections are opened lazily, so this costs nothing until something asks for bytes
+        _redis_binary = _create_client(decode_responses=False)
     return _redis
 
+async def get_redis(binary: bool = False):
+    client = _redis_binary if binary else _redis
+    if client is None:
+        raise RedisError("Redis not initialized. Did you call init_redis()?")
+    return client
+
 async def close_redis():
-    global _redis
+    global _redis, _redis_binary, _sentinel
     if _redis:
-        await _redis.close()
-        _redis = None
\ No newline at end of file
+        await _redis.aclose()
+        _redis = None
+    if _redis_binary:
+        await _redis_binary.aclose()
+        _redis_binary = None
+    if _sentinel is not None:
+        for client in _sentinel.sentinels:
+            await client.aclose()
+        _sentinel = None
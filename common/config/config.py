@@ -3,6 +3,7 @@ import logging
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 from pathlib import Path
+from typing import Dict, List
 
 logger = logging.getLogger(__name__)
 
@@ -16,16 +17,135 @@ class Settings(BaseSettings):
 
     # redis
     REDIS_URL: str = Field("redis://localhost:6379/0", env="REDIS_URL")
-    REDIS_MAX_CONNECTIONS: int = Field(10, env="REDIS_MAX_CONNECTIONS")
+    REDIS_MAX_CONNECTIONS: int = Field(10, env="REDIS_MAX_CONNECTIONS")  # per client; per node in cluster mode
+    REDIS_MODE: str = Field("standalone", env="REDIS_MODE")  # standalone | sentinel | cluster
+    REDIS_POOL_TIMEOUT: float = Field(5.0, env="REDIS_POOL_TIMEOUT")  # seconds to wait for a free connection, then fail
+    REDIS_SOCKET_TIMEOUT: float = Field(5.0, env="REDIS_SOCKET_TIMEOUT")  # per command; pub/sub reads are exempt
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = Field(2.0, env="REDIS_SOCKET_CONNECT_TIMEOUT")
+    REDIS_SOCKET_KEEPALIVE: bool = Field(True, env="REDIS_SOCKET_KEEPALIVE")  # TCP keepalive, so dead peers are noticed
+    REDIS_HEALTH_CHECK_INTERVAL: float = Field(30.0, env="REDIS_HEALTH_CHECK_INTERVAL")  # PING connections idle this long, 0 = off
+    REDIS_SENTINELS: List[str] = Field(default_factory=list, env="REDIS_SENTINELS")  # JSON list of "host:port"
+    REDIS_SENTINEL_MASTER: str = Field("mymaster", env="REDIS_SENTINEL_MASTER")  # service name the sentinels monitor
 
     # jwt
     JWT_SECRET_KEY: str = Field(..., env="JWT_SECRET_KEY")
     JWT_ALGORITHM: str = Field("HS256", env="JWT_ALGORITHM")
     JWT_EXPIRE_MINUTES: int = Field(60, env="JWT_EXPIRE_MINUTES")
+    JWT_CACHE_MAX_SIZE: int = Field(10000, env="JWT_CACHE_MAX_SIZE")  # verified tokens kept in memory, 0 = off
+    JWT_CACHE_TTL_SECONDS: int = Field(300, env="JWT_CACHE_TTL_SECONDS")  # capped by each token's exp
+
+    # llm http client (shared, pooled per worker)
+    LLM_HTTP_MAX_CONNECTIONS: int = Field(100, env="LLM_HTTP_MAX_CONNECTIONS")
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(20, env="LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS")
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = Field(30.0, env="LLM_HTTP_KEEPALIVE_EXPIRY")  # seconds
+    LLM_HTTP_CONNECT_TIMEOUT: float = Field(5.0, env="LLM_HTTP_CONNECT_TIMEOUT")
+    LLM_HTTP_READ_TIMEOUT: float = Field(60.0, env="LLM_HTTP_READ_TIMEOUT")
+    LLM_HTTP_WRITE_TIMEOUT: float = Field(10.0, env="LLM_HTTP_WRITE_TIMEOUT")
+    LLM_HTTP_POOL_TIMEOUT: float = Field(10.0, env="LLM_HTTP_POOL_TIMEOUT")  # wait for a free connection
+
+    # model served to chat traffic, plus warm-up / keep-alive so it is loaded before the first request
+    LLM_MODEL: str = Field("gemma3:1b", env="LLM_MODEL")
+    LLM_WARMUP_MODELS: List[str] = Field(default_factory=list, env="LLM_WARMUP_MODELS")  # JSON list, empty = [LLM_MODEL]
+    LLM_KEEP_ALIVE: str = Field("30m", env="LLM_KEEP_ALIVE")  # how long Ollama keeps a model loaded after a request
+    LLM_KEEP_ALIVE_INTERVAL: float = Field(300.0, env="LLM_KEEP_ALIVE_INTERVAL")  # seconds between refreshes, 0 = warm-up only
+    LLM_WARMUP_TIMEOUT: float = Field(120.0, env="LLM_WARMUP_TIMEOUT")  # model loads can take a while
+
+    # llm backends: pool of Ollama /api/chat URLs; empty = auto-detect a single local one
+    LLM_BACKENDS: List[str] = Field(default_factory=list, env="LLM_BACKENDS")  # JSON list
+    LLM_DISCOVERY_TIMEOUT: float = Field(1.0, env="LLM_DISCOVERY_TIMEOUT")  # seconds to resolve the Docker host when LLM_BACKENDS is empty
+    LLM_HEALTH_PROBE_INTERVAL: float = Field(10.0, env="LLM_HEALTH_PROBE_INTERVAL")  # seconds, 0 = no probing
+    LLM_HEALTH_PROBE_TIMEOUT: float = Field(2.0, env="LLM_HEALTH_PROBE_TIMEOUT")
+    LLM_BACKEND_FAILURE_THRESHOLD: int = Field(3, env="LLM_BACKEND_FAILURE_THRESHOLD")  # consecutive failures to eject
+    LLM_BACKEND_EJECTION_SECONDS: float = Field(30.0, env="LLM_BACKEND_EJECTION_SECONDS")
+    LLM_BACKEND_RAMP_SECONDS: float = Field(60.0, env="LLM_BACKEND_RAMP_SECONDS")  # traffic ramp after re-admission
+    LLM_HEDGE_REQUESTS: bool = Field(False, env="LLM_HEDGE_REQUESTS")  # race a 2nd backend past p95 (non-streaming)
+    LLM_HEDGE_MIN_SAMPLES: int = Field(20, env="LLM_HEDGE_MIN_SAMPLES")
+
+    # llm retries and circuit breaker
+    LLM_RETRY_BASE_DELAY: float = Field(0.2, env="LLM_RETRY_BASE_DELAY")  # seconds, doubled per attempt (full jitter)
+    LLM_RETRY_MAX_DELAY: float = Field(2.0, env="LLM_RETRY_MAX_DELAY")
+    LLM_RETRY_BUDGET_RATIO: float = Field(0.2, env="LLM_RETRY_BUDGET_RATIO")  # retries earned per request
+    LLM_RETRY_BUDGET_CAPACITY: float = Field(10.0, env="LLM_RETRY_BUDGET_CAPACITY")
+    LLM_BREAKER_WINDOW_SECONDS: float = Field(30.0, env="LLM_BREAKER_WINDOW_SECONDS")
+    LLM_BREAKER_MIN_CALLS: int = Field(10, env="LLM_BREAKER_MIN_CALLS")
+    LLM_BREAKER_ERROR_RATE: float = Field(0.5, env="LLM_BREAKER_ERROR_RATE")
+    LLM_BREAKER_SLOW_CALL_SECONDS: float = Field(30.0, env="LLM_BREAKER_SLOW_CALL_SECONDS")
+    LLM_BREAKER_SLOW_CALL_RATE: float = Field(0.8, env="LLM_BREAKER_SLOW_CALL_RATE")
+    LLM_BREAKER_OPEN_SECONDS: float = Field(15.0, env="LLM_BREAKER_OPEN_SECONDS")
+    LLM_BREAKER_HALF_OPEN_CALLS: int = Field(2, env="LLM_BREAKER_HALF_OPEN_CALLS")
+
+    # llm response cache (exact match, per-model opt-in)
+    LLM_CACHE_MODELS: List[str] = Field(default_factory=list, env="LLM_CACHE_MODELS")  # JSON list, e.g. ["gemma3:1b"]
+    LLM_CACHE_TTL_SECONDS: int = Field(3600, env="LLM_CACHE_TTL_SECONDS")
+    LLM_CACHE_L1_MAX_ENTRIES: int = Field(1024, env="LLM_CACHE_L1_MAX_ENTRIES")
+    LLM_CACHE_L1_MAX_BYTES: int = Field(8 * 1024 * 1024, env="LLM_CACHE_L1_MAX_BYTES")
+    LLM_CACHE_MAX_REPLY_BYTES: int = Field(16 * 1024, env="LLM_CACHE_MAX_REPLY_BYTES")  # longer replies are not cached
+
+    # prompt construction: newest history first until the token budget is spent
+    LLM_PROMPT_TOKEN_BUDGET: int = Field(2048, env="LLM_PROMPT_TOKEN_BUDGET")
+    LLM_MODEL_TOKEN_BUDGETS: Dict[str, int] = Field(default_factory=dict, env="LLM_MODEL_TOKEN_BUDGETS")  # JSON, per-model override
+
+    # background session compaction (rolling summary of older turns)
+    SESSION_COMPACT_THRESHOLD: int = Field(30, env="SESSION_COMPACT_THRESHOLD")  # messages before compacting, 0 = off
+    SESSION_COMPACT_KEEP_RECENT: int = Field(10, env="SESSION_COMPACT_KEEP_RECENT")  # newest messages kept verbatim
+    SESSION_COMPACT_MIN_INTERVAL: float = Field(60.0, env="SESSION_COMPACT_MIN_INTERVAL")  # seconds between runs per user
+    SESSION_COMPACT_CONCURRENCY: int = Field(2, env="SESSION_COMPACT_CONCURRENCY")  # concurrent runs per worker
+
+    # admission control in front of the LLM: bounded concurrency plus a short priority queue
+    LLM_MAX_IN_FLIGHT_PER_BACKEND: int = Field(4, env="LLM_MAX_IN_FLIGHT_PER_BACKEND")  # match OLLAMA_NUM_PARALLEL
+    LLM_ADMISSION_QUEUE_SIZE: int = Field(64, env="LLM_ADMISSION_QUEUE_SIZE")  # waiters beyond this are rejected
+    LLM_ADMISSION_MAX_WAIT: float = Field(10.0, env="LLM_ADMISSION_MAX_WAIT")  # seconds before a queued request gives up
+
+    # share one upstream call between concurrent identical LLM requests
+    LLM_COALESCE_REQUESTS: bool = Field(True, env="LLM_COALESCE_REQUESTS")
+
+    # batch streamed tokens into fewer frames; clients can opt out per request
+    STREAM_COALESCE_MAX_BYTES: int = Field(512, env="STREAM_COALESCE_MAX_BYTES")  # flush once a frame holds this much text
+    STREAM_COALESCE_MAX_DELAY: float = Field(0.02, env="STREAM_COALESCE_MAX_DELAY")  # seconds a token may wait, 0 = per-token frames
+    STREAM_COALESCE_MAX_PENDING: int = Field(64, env="STREAM_COALESCE_MAX_PENDING")  # tokens read ahead of a slow client before the LLM read pauses
+
+    # JSON codec for stream frames and stored messages
+    SERIALIZER: str = Field("auto", env="SERIALIZER")  # auto | orjson | json
+
+    # session storage format; readers understand every format, so this can be changed on a live cluster
+    SESSION_CODEC: str = Field("json", env="SESSION_CODEC")  # json | msgpack
+    SESSION_COMPRESSION: str = Field("none", env="SESSION_COMPRESSION")  # none | zstd | lz4 (msgpack only)
+    SESSION_COMPRESS_MIN_BYTES: int = Field(512, env="SESSION_COMPRESS_MIN_BYTES")  # shorter messages are stored as-is
+    SESSION_MIGRATE_ON_STARTUP: bool = Field(False, env="SESSION_MIGRATE_ON_STARTUP")  # re-encode old sessions (and move pre-hash-tag keys) in the background
+    SESSION_MIGRATE_BATCH_SIZE: int = Field(200, env="SESSION_MIGRATE_BATCH_SIZE")  # keys per SCAN step
+    SESSION_LEGACY_KEYS: bool = Field(True, env="SESSION_LEGACY_KEYS")  # on an empty read, move a pre-hash-tag session to its new key; off once migrated
+
+    # per-worker session cache, invalidated across workers over pub/sub
+    SESSION_CACHE_MAX_ENTRIES: int = Field(10000, env="SESSION_CACHE_MAX_ENTRIES")  # 0 = off
+    SESSION_CACHE_TTL_SECONDS: float = Field(300.0, env="SESSION_CACHE_TTL_SECONDS")  # upper bound on staleness
+
+    # logging: records go through a bounded queue to a writer thread, never blocking the event loop
+    LOG_LEVEL: str = Field("INFO", env="LOG_LEVEL")
+    LOG_FORMAT: str = Field("json", env="LOG_FORMAT")  # json | text
+    LOG_QUEUE_SIZE: int = Field(10000, env="LOG_QUEUE_SIZE")  # records beyond this are dropped and counted
+    LOG_SAMPLING: Dict[str, float] = Field(default_factory=dict, env="LOG_SAMPLING")  # JSON, logger prefix -> share of INFO/DEBUG kept
+    LOG_REPEAT_BURST: int = Field(5, env="LOG_REPEAT_BURST")  # WARNING+ lines per call site per window, 0 = unlimited
+    LOG_REPEAT_WINDOW_SECONDS: float = Field(10.0, env="LOG_REPEAT_WINDOW_SECONDS")
+
+    # opt-in CPU / allocation profiling of single requests and WebSocket sessions
+    PROFILING_ENABLED: bool = Field(False, env="PROFILING_ENABLED")  # off = no middleware and no hooks at all
+    PROFILING_SECRET: str = Field("", env="PROFILING_SECRET")  # HMAC key for X-Profile tokens and /admin/profiles
+    PROFILING_SAMPLE_RATE: float = Field(0.0, env="PROFILING_SAMPLE_RATE")  # share of requests profiled without a token
+    PROFILING_MAX_PROFILES: int = Field(20, env="PROFILING_MAX_PROFILES")  # newest kept in memory per worker
+    PROFILING_TOP_N: int = Field(40, env="PROFILING_TOP_N")  # rows in each text report
+    PROFILING_TOKEN_MAX_TTL: int = Field(3600, env="PROFILING_TOKEN_MAX_TTL")  # seconds; tokens expiring later are refused
 
     # rate-limiter
     RATE_LIMIT_REQUESTS: int = Field(10, env="RATE_LIMIT_REQUESTS")  # requests per period
     RATE_LIMIT_PERIOD: int = Field(1, env="RATE_LIMIT_PERIOD")       # seconds
+    RATE_LIMIT_ALGORITHM: str = Field("gcra", env="RATE_LIMIT_ALGORITHM")  # gcra | token_bucket | sliding_log
+    RATE_LIMIT_BURST: int = Field(0, env="RATE_LIMIT_BURST")  # 0 = same as RATE_LIMIT_REQUESTS
+    RATE_LIMIT_MODE: str = Field("hybrid", env="RATE_LIMIT_MODE")  # hybrid (leased quota) | global (Redis per request)
+    RATE_LIMIT_LEASE_SIZE: int = Field(5, env="RATE_LIMIT_LEASE_SIZE")  # max tokens a worker leases at once
+    RATE_LIMIT_LEASE_TTL: float = Field(1.0, env="RATE_LIMIT_LEASE_TTL")  # seconds before unspent tokens lapse
+    RATE_LIMIT_FALLBACK_REQUESTS: int = Field(0, env="RATE_LIMIT_FALLBACK_REQUESTS")  # per worker while Redis is down, 0 = RATE_LIMIT_REQUESTS
+    RATE_LIMIT_REDIS_RETRY_INTERVAL: float = Field(5.0, env="RATE_LIMIT_REDIS_RETRY_INTERVAL")  # seconds
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = Field(10000, env="RATE_LIMIT_LOCAL_MAX_KEYS")  # users tracked in process
     
     model_config = SettingsConfigDict(
         env_file_encoding="utf-8",
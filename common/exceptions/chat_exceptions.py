@@ -7,5 +7,13 @@ class ChatError(AppError):
 
 class LLMError(ChatError):
     """LLM service failure."""
-    def __init__(self, detail: str = "LLM service unavailable"):
-        super().__init__(detail=detail, status_code=503)
+    def __init__(self, detail: str = "LLM service unavailable", headers: dict = None):
+        super().__init__(detail=detail, status_code=503, headers=headers)
+
+class CircuitOpenError(LLMError):
+    """LLM calls are short-circuited while the backend is considered down."""
+    pass
+
+class OverloadedError(LLMError):
+    """Request shed by admission control: the LLM queue is full or the wait ran past its deadline."""
+    pass
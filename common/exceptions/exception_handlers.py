@@ -15,6 +15,7 @@ def register_exception_handlers(app):
         return JSONResponse(
             status_code=exc.status_code,
             content={"detail": exc.detail},
+            headers=exc.headers,
         )
 
     @app.exception_handler(Exception)
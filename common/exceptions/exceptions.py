@@ -1,9 +1,10 @@
 #/common/exceptions/exceptions.py
 class AppError(Exception):
     """Base class for all custom application exceptions."""
-    def __init__(self, detail: str = "An application error occurred", status_code: int = 500):
+    def __init__(self, detail: str = "An application error occurred", status_code: int = 500, headers: dict = None):
         self.detail = detail
         self.status_code = status_code
+        self.headers = headers
         super().__init__(detail)
 
 # Domain-agnostic or reusable service errors
@@ -9,7 +9,12 @@ class RedisError(InfraError):
     def __init__(self, detail: str = "Redis client error"):
         super().__init__(detail=detail, status_code=500)
 
+class HttpClientError(InfraError):
+    """Shared HTTP client failure."""
+    def __init__(self, detail: str = "HTTP client error"):
+        super().__init__(detail=detail, status_code=500)
+
 class RateLimitError(AppError):
     """Raised when a user exceeds rate limit"""
-    def __init__(self, detail: str = "Too many requests"):
-        super().__init__(detail=detail, status_code=429)
\ No newline at end of file
+    def __init__(self, detail: str = "Too many requests", headers: dict = None):
+        super().__init__(detail=detail, status_code=429, headers=headers)
\ No newline at end of file
@@ -1,16 +1,254 @@
+import atexit
 import logging
+import queue
 import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+from common.config.config import settings
+from common.serialization.serializer import serializer
 
-def init_logging():
-    LOG_FORMAT = "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s"
-    DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+LOG_FORMAT = "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format=LOG_FORMAT,
-        datefmt=DATE_FORMAT,
-        handlers=[logging.StreamHandler(sys.stdout)]
-    )
+# correlation ids, set per request / per WebSocket connection and stamped on every record logged under them
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+user_id_var: ContextVar[Optional[str]] = ContextVar("user_id", default=None)
+
+# uvicorn gives these their own synchronous stderr handlers; route them through the queue as well
+SERVER_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+
+def bind_user(user_id: Optional[str]):
+    """Tag everything logged from here on in this request (or WebSocket connection) with the user."""
+    user_id_var.set(user_id)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the correlation ids onto the record while still in the caller's context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.user_id = user_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fixed share of records below WARNING per logger (longest matching name prefix wins)."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._counters: Dict[str, float] = {}
+
+    def rate_for(self, name: str) -> float:
+        best, rate = -1, 1.0
+        for prefix, value in self.rates.items():
+            if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > best:
+                best, rate = len(prefix), value
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        # deterministic 1-in-N per logger rather than random: steady output, no RNG on the hot path
+        credit = self._counters.get(record.name, 0.0) + rate
+        if credit >= 1.0 - 1e-9:  # tolerate float drift, e.g. ten additions of 0.1
+            self._counters[record.name] = credit - 1.0
+            return True
+        self._counters[record.name] = credit
+        return False
+
+
+class RepeatFilter(logging.Filter):
+    """Rate-limits a storm of WARNING+ records from the same call site.
+
+    The first `burst` records from one (logger, level, file, line) per `window` seconds
+    pass; the rest are dropped, and the next record that passes carries the number
+    suppressed in between.
+    """
+
+    def __init__(self, burst: int, window: float, max_sites: int = 1024):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.max_sites = max_sites
+        self._sites: "OrderedDict[tuple, list]" = OrderedDict()  # key -> [window_start, count, suppressed]
+        self._lock = threading.Lock()  # records can come from threadpool workers too
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.burst <= 0:
+            return True
+        key = (record.name, record.levelno, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None:
+                site = self._sites[key] = [now, 0, 0]
+                if len(self._sites) > self.max_sites:
+                    self._sites.popitem(last=False)
+            else:
+                self._sites.move_to_end(key)
+            if now - site[0] >= self.window:
+                site[0], site[1] = now, 0
+            if site[1] >= self.burst:
+                site[2] += 1
+                return False
+            site[1] += 1
+            if site[2]:
+                record.suppressed = site[2]
+                site[2] = 0
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the writer thread without formatting them and without ever waiting.
+
+    The stock QueueHandler formats the message (msg % args, tracebacks) in the caller;
+    here that happens on the listener thread, so a log call on the event loop costs a
+    record allocation and a queue put. When the queue is full the record is dropped and
+    counted; the writer reports the count once it catches up.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DropReportingHandler(logging.Handler):
+    """Wraps the real handler on the writer thread; emits a line about records lost to a full queue."""
+
+    def __init__(self, target: logging.Handler, source: NonBlockingQueueHandler):
+        super().__init__()
+        self.target = target
+        self.source = source
+        self._reported = 0
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        dropped = self.source.dropped
+        if dropped != self._reported:
+            notice = logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                                       "Log queue full: dropped %d records", (dropped - self._reported,), None)
+            self._reported = dropped
+            self.target.handle(notice)
+        return self.target.handle(record)
+
+    def emit(self, record: logging.LogRecord):
+        self.target.emit(record)
+
+    def flush(self):
+        self.target.flush()
+
+    def close(self):
+        self.target.close()
+        super().close()
+
+
+class TextFormatter(logging.Formatter):
+    """The original human-readable line, plus correlation ids and suppression counts when present."""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        extras = []
+        if getattr(record, "request_id", None):
+            extras.append(f"request_id={record.request_id}")
+        if getattr(record, "user_id", None):
+            extras.append(f"user_id={record.user_id}")
+        if getattr(record, "suppressed", None):
+            extras.append(f"suppressed={record.suppressed}")
+        return f"{line} [{' '.join(extras)}]" if extras else line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log collectors."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in ("request_id", "user_id", "suppressed"):
+            value = getattr(record, field, None)
+            if value:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc_info"] = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return serializer.dumps_str(entry)
+
+def build_formatter(name: str = None) -> logging.Formatter:
+    name = (name or settings.LOG_FORMAT).lower()
+    if name == "json":
+        return JsonFormatter()
+    if name == "text":
+        return TextFormatter(LOG_FORMAT, DATE_FORMAT)
+    raise ValueError(f"Unknown LOG_FORMAT '{name}', expected json or text")
+
+def init_logging(stream=None):
+    """Route the root logger through a bounded queue to a writer thread. Safe to call more than once."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(build_formatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    handler.addFilter(SamplingFilter(settings.LOG_SAMPLING))
+    handler.addFilter(RepeatFilter(settings.LOG_REPEAT_BURST, settings.LOG_REPEAT_WINDOW_SECONDS))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name in SERVER_LOGGERS:
+        server_logger = logging.getLogger(name)
+        server_logger.handlers.clear()
+        server_logger.propagate = True
+
+    _queue_handler = handler
+    _listener = QueueListener(log_queue, DropReportingHandler(output, handler))
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Drain the queue and stop the writer thread."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
 
 def get_logger(name: str = None) -> logging.Logger:
     return logging.getLogger(name)
@@ -0,0 +1,50 @@
+import re
+import uuid
+from fastapi import FastAPI
+from common.logging.logger import request_id_var, user_id_var
+
+REQUEST_ID_HEADER = b"x-request-id"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+class RequestContextMiddleware:
+    """Gives every HTTP request and WebSocket connection a request id for log correlation.
+
+    An incoming X-Request-ID (from a proxy or the client) is reused when it looks sane,
+    otherwise one is generated; HTTP responses echo it back.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex
+        encoded = request_id.encode("latin-1")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(REQUEST_ID_HEADER, encoded)]
+            await send(message)
+
+        request_token = request_id_var.set(request_id)
+        user_token = user_id_var.set(None)
+        try:
+            await self.app(scope, receive, send_wrapper if scope["type"] == "http" else send)
+        finally:
+            user_id_var.reset(user_token)
+            request_id_var.reset(request_token)
+
+def init_request_context(app: FastAPI):
+    """Request ids on every log line and response (X-Request-ID)."""
+    app.add_middleware(RequestContextMiddleware)
@@ -0,0 +1,48 @@
+import time
+from fastapi import FastAPI
+from fastapi.responses import Response
+from common.metrics.registry import CONTENT_TYPE, REGISTRY, Gauge, Histogram
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time from request start to the last body byte sent.",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Requests currently being served.").labels()
+
+class MetricsMiddleware:
+    """Plain ASGI middleware timing every HTTP request by route template (not raw path, which is unbounded)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], route.path if route is not None else "unmatched", str(status)
+            ).observe(time.perf_counter() - started)
+
+def init_metrics(app: FastAPI):
+    """Time every request and serve the registry at /metrics."""
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", tags=["health"], include_in_schema=False)
+    async def metrics():
+        return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,91 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, FastAPI, Header
+from fastapi.responses import Response
+from common.exceptions.auth_exceptions import PermissionDeniedError
+from common.exceptions.exceptions import AppError
+from common.profiling.profiler import profiler
+
+PROFILE_HEADER = b"x-profile"
+ADMIN_PREFIX = "/admin/profiles"
+
+
+class ProfilingMiddleware:
+    """CPU-profiles HTTP requests that carry a valid X-Profile token or are sampled; the rest pass straight through."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(ADMIN_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                token = value.decode("latin-1")
+                break
+        if token is None and not profiler.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        with profiler.cpu("http", token, method=scope["method"], path=scope["path"]) as profile:
+            if profile is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    profile["status"] = message["status"]
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile["id"].encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                profile["route"] = route.path if route is not None else None
+
+
+def require_profiling_admin(x_profile: Optional[str] = Header(None)):
+    if not profiler.authorized(x_profile):
+        raise PermissionDeniedError("A valid X-Profile token is required")
+
+admin_router = APIRouter(dependencies=[Depends(require_profiling_admin)])
+
+@admin_router.get("")
+async def list_profiles():
+    return {"stats": profiler.stats(), "profiles": profiler.store.list()}
+
+@admin_router.get("/{profile_id}")
+async def get_profile(profile_id: str):
+    profile = _profile_or_404(profile_id)
+    return {k: v for k, v in profile.items() if k != "pstats"}
+
+@admin_router.get("/{profile_id}/pstats")
+async def download_pstats(profile_id: str):
+    """Raw cProfile stats, loadable with `pstats.Stats(path)` or snakeviz."""
+    profile = _profile_or_404(profile_id)
+    if "pstats" not in profile:
+        raise AppError("Not a CPU profile", status_code=404)
+    return Response(profile["pstats"], media_type="application/octet-stream",
+                    headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'})
+
+@admin_router.delete("")
+async def clear_profiles():
+    profiler.store.clear()
+    return {"stored": 0}
+
+def _profile_or_404(profile_id: str) -> dict:
+    profile = profiler.store.get(profile_id)
+    if profile is None:
+        raise AppError(f"Profile {profile_id} not found", status_code=404)
+    return profile
+
+def init_profiling(app: FastAPI):
+    """With PROFILING_ENABLED off nothing is installed, so requests pay nothing."""
+    if not profiler.enabled:
+        return
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(admin_router, prefix=ADMIN_PREFIX, tags=["admin"], include_in_schema=False)
@@ -0,0 +1,236 @@
+import hashlib
+import hmac
+import io
+import itertools
+import logging
+import random
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, List, Optional
+from common.config.config import settings
+
+if TYPE_CHECKING:
+    import cProfile
+    import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+def sign_token(secret: str, expires: int) -> str:
+    """Token for the X-Profile header and the admin endpoints: `<unix expiry>.<hex HMAC-SHA256 of it>`."""
+    digest = hmac.new(secret.encode("utf-8"), str(expires).encode("ascii"), hashlib.sha256).hexdigest()
+    return f"{expires}.{digest}"
+
+def verify_token(secret: str, token: Optional[str], max_ttl: float, now: float = None) -> bool:
+    if not secret or not token:
+        return False
+    expires, _, _ = token.partition(".")
+    if not expires.isdigit():
+        return False
+    now = time.time() if now is None else now
+    # a far-future expiry would be a standing licence to profile production: cap it
+    if not now < int(expires) <= now + max_ttl:
+        return False
+    return hmac.compare_digest(token, sign_token(secret, int(expires)))
+
+def profile_token(headers, query_params=None) -> Optional[str]:
+    """Token from the X-Profile header, or `?profile=` where the client cannot set headers (browser WebSockets)."""
+    token = headers.get("x-profile")
+    if token is None and query_params is not None:
+        token = query_params.get("profile")
+    return token
+
+
+class ProfileStore:
+    """Newest `max_profiles` captures, oldest evicted first."""
+
+    def __init__(self, max_profiles: int):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+
+    def add(self, profile: dict):
+        self._profiles[profile["id"]] = profile
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[dict]:
+        return [{k: v for k, v in p.items() if k not in ("report", "pstats")} for p in reversed(self._profiles.values())]
+
+    def clear(self):
+        self._profiles.clear()
+
+    def __len__(self):
+        return len(self._profiles)
+
+
+class Profiler:
+    """Opt-in CPU (cProfile) and allocation (tracemalloc) captures of single requests.
+
+    A capture is taken when the caller presents a valid signed token or the request is
+    sampled at `sample_rate`. The profilers observe the whole event-loop thread while the
+    capture is open, so requests running concurrently show up too; only one CPU capture
+    runs at a time (cProfile is per thread) and extra ones are skipped, not queued.
+    When disabled every hook returns before touching a profiler.
+    """
+
+    def __init__(self, enabled: bool = None, secret: str = None, sample_rate: float = None,
+                 max_profiles: int = None, top: int = None, token_max_ttl: float = None):
+        self.enabled = settings.PROFILING_ENABLED if enabled is None else enabled
+        self.secret = settings.PROFILING_SECRET if secret is None else secret
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.top = settings.PROFILING_TOP_N if top is None else top
+        self.token_max_ttl = settings.PROFILING_TOKEN_MAX_TTL if token_max_ttl is None else token_max_ttl
+        self.store = ProfileStore(settings.PROFILING_MAX_PROFILES if max_profiles is None else max_profiles)
+        self.captured = 0
+        self.skipped = 0
+        self._ids = itertools.count(1)
+        self._cpu_busy = False
+        self._memory_sessions = 0
+        self._owns_tracemalloc = False
+
+    def authorized(self, token: Optional[str]) -> bool:
+        return verify_token(self.secret, token, self.token_max_ttl)
+
+    def wanted(self, token: Optional[str]) -> bool:
+        if not self.enabled:
+            return False
+        if token is not None and self.authorized(token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _new_profile(self, capture: str, kind: str, meta: dict) -> dict:
+        return {"id": f"{int(time.time())}-{next(self._ids)}", "capture": capture, "kind": kind,
+                "started_at": time.time(), **meta}
+
+    @contextmanager
+    def cpu(self, kind: str, token: Optional[str] = None, **meta) -> Iterator[Optional[dict]]:
+        """Yields the profile record (callers may add metadata to it), or None when not profiling."""
+        if not self.wanted(token):
+            yield None
+            return
+        if self._cpu_busy:
+            self.skipped += 1
+            yield None
+            return
+
+        import cProfile  # profiler modules load on the first capture, not with every worker
+
+        profile = self._new_profile("cpu", kind, meta)
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:
+            # another profiler owns this thread (a debugger, or an outer capture on 3.12+)
+            self.skipped += 1
+            yield None
+            return
+
+        self._cpu_busy = True
+        started = time.perf_counter()
+        try:
+            yield profile
+        finally:
+            prof.disable()
+            self._cpu_busy = False
+            profile["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            self._finish_cpu(profile, prof)
+
+    def _finish_cpu(self, profile: dict, prof: "cProfile.Profile"):
+        import marshal
+        import pstats
+
+        out = io.StringIO()
+        stats = pstats.Stats(prof, stream=out)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        profile["report"] = out.getvalue()
+        prof.create_stats()
+        profile["pstats"] = marshal.dumps(prof.stats)  # the .prof format pstats/snakeviz load
+        self._keep(profile)
+
+    @contextmanager
+    def memory(self, kind: str, token: Optional[str] = None, **meta) -> Iterator[Optional[dict]]:
+        """Allocation diff between the start and end of the block (net growth by source line)."""
+        if not self.wanted(token):
+            yield None
+            return
+
+        import tracemalloc
+
+        profile = self._new_profile("memory", kind, meta)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        self._memory_sessions += 1
+        before = self._snapshot()
+        started = time.perf_counter()
+        try:
+            yield profile
+        finally:
+            try:
+                after = self._snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                profile["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                profile["traced_current_kb"] = round(current / 1024, 1)
+                profile["traced_peak_kb"] = round(peak / 1024, 1)
+                self._finish_memory(profile, after.compare_to(before, "lineno"))
+            finally:
+                self._memory_sessions -= 1
+                if self._memory_sessions == 0 and self._owns_tracemalloc:
+                    tracemalloc.stop()
+                    self._owns_tracemalloc = False
+
+    def _snapshot(self) -> "tracemalloc.Snapshot":
+        import tracemalloc
+
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def _finish_memory(self, profile: dict, diff: List["tracemalloc.StatisticDiff"]):
+        top = diff[:self.top]
+        profile["net_kb"] = round(sum(s.size_diff for s in diff) / 1024, 1)
+        profile["top_allocations"] = [
+            {
+                "line": str(s.traceback[0]),
+                "size_diff_kb": round(s.size_diff / 1024, 1),
+                "count_diff": s.count_diff,
+                "size_kb": round(s.size / 1024, 1),
+            }
+            for s in top
+        ]
+        profile["report"] = "\n".join(str(s) for s in top)
+        self._keep(profile)
+
+    def _keep(self, profile: dict):
+        self.captured += 1
+        self.store.add(profile)
+        logger.info(f"[Profiler] Captured {profile['capture']} profile {profile['id']} ({profile['kind']})")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "stored": len(self.store),
+            "captured": self.captured,
+            "skipped": self.skipped,
+        }
+
+profiler = Profiler()
+
+def _main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mint an X-Profile token signed with PROFILING_SECRET.")
+    parser.add_argument("--ttl", type=int, default=300, help="seconds the token stays valid")
+    args = parser.parse_args()
+    if not settings.PROFILING_SECRET:
+        raise SystemExit("PROFILING_SECRET is not set")
+    print(sign_token(settings.PROFILING_SECRET, int(time.time()) + args.ttl))
+
+if __name__ == "__main__":
+    _main()
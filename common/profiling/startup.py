@@ -0,0 +1,50 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """Wall-clock cost of bringing a worker up, phase by phase.
+
+    Entry points record how long their own imports took and how long building
+    the app took; the lifespan then times each startup step. `log()` writes
+    the lot as one line once the worker is ready to serve, and `snapshot()`
+    backs /health/startup.
+    """
+
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+        self.ready_at: Optional[float] = None
+
+    def record(self, name: str, seconds: float):
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def reset(self):
+        self.phases.clear()
+        self.ready_at = None
+
+    def snapshot(self) -> dict:
+        return {
+            "total_ms": round(sum(seconds for _, seconds in self.phases) * 1000, 1),
+            "ready": self.ready_at is not None,
+            "phases": [{"name": name, "ms": round(seconds * 1000, 1)} for name, seconds in self.phases],
+        }
+
+    def log(self):
+        self.ready_at = time.time()
+        snapshot = self.snapshot()
+        steps = ", ".join(f"{p['name']}={p['ms']}ms" for p in snapshot["phases"])
+        logger.info(f"[Startup] Ready in {snapshot['total_ms']}ms ({steps})")
+
+startup_report = StartupReport()
@@ -0,0 +1,78 @@
+import json
+import logging
+from typing import Any, Dict, Type, Union
+from common.config.config import settings
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+class JsonSerializer:
+    """Standard-library JSON, compact separators. Always available."""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def dumps_str(self, obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    """orjson-backed fast path. Its decode errors subclass json.JSONDecodeError, so callers catch one type."""
+
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def dumps_str(self, obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+SERIALIZERS: Dict[str, Type] = {"json": JsonSerializer, "orjson": OrjsonSerializer}
+
+def build_serializer(name: str = None):
+    """`auto` picks orjson when it is installed; naming an unavailable backend falls back to json."""
+    name = (name or settings.SERIALIZER).lower()
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer '{name}', expected one of: auto, {', '.join(SERIALIZERS)}")
+    if name == "orjson" and orjson is None:
+        logger.warning("[Serializer] orjson is not installed, falling back to json")
+        name = "json"
+    return SERIALIZERS[name]()
+
+serializer = build_serializer()
+
+
+class StreamFrames:
+    """Pre-encoded StreamChunk frames: only the token is encoded per frame, the rest is a fixed template.
+
+    Produces exactly what StreamChunk(token=..., is_final=...).model_dump() would
+    serialize to, without building a model or a dict per token.
+    """
+
+    def __init__(self, codec=None):
+        self.codec = codec or serializer
+        self.final = self.codec.dumps({"token": "", "is_final": True})
+        self.final_text = self.final.decode("utf-8")
+
+    def chunk(self, token: str) -> bytes:
+        return b'{"token":' + self.codec.dumps(token) + b',"is_final":false}'
+
+    def chunk_text(self, token: str) -> str:
+        return '{"token":' + self.codec.dumps_str(token) + ',"is_final":false}'
+
+stream_frames = StreamFrames()
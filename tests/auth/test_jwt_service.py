@@ -58,3 +58,48 @@ class TestJWTService:
         # Act & Assert
         with pytest.raises(AuthError):
             self.service.decode_token(invalid_token)
+
+    def test_decode_token_WhenSameTokenTwice_ServesSecondFromCache(self):
+        # Arrange
+        token = self.service.create_token("user123")
+
+        # Act
+        first = self.service.decode_token(token)
+        with patch("app.auth.service.jwt_service.jwt.decode") as mock_decode:
+            second = self.service.decode_token(token)
+
+        # Assert
+        assert first == second == "user123"
+        mock_decode.assert_not_called()
+        assert self.service.cache_stats()["hits"] == 1
+        assert self.service.cache_stats()["misses"] == 1
+
+    def test_decode_token_WhenCachedTokenPastExp_RaisesTokenExpiredError(self):
+        # Arrange
+        token = self.service.create_token("user123")
+        self.service.decode_token(token)
+        future = datetime.now(timezone.utc) + timedelta(minutes=settings.JWT_EXPIRE_MINUTES + 1)
+
+        # Act & Assert
+        with patch("app.auth.service.jwt_service.time.time", return_value=future.timestamp()), \
+                patch("app.auth.service.jwt_service.jwt.decode", side_effect=jwt.ExpiredSignatureError) as mock_decode:
+            with pytest.raises(TokenExpiredError):
+                self.service.decode_token(token)
+
+        # Assert
+        mock_decode.assert_called_once()
+        assert self.service.cache_stats()["size"] == 0
+
+    def test_decode_token_WhenCacheFull_EvictsLeastRecentlyUsed(self):
+        # Arrange
+        self.service.cache_max_size = 2
+        tokens = [self.service.create_token(f"user{i}") for i in range(3)]
+
+        # Act
+        for token in tokens:
+            self.service.decode_token(token)
+
+        # Assert
+        assert self.service.cache_stats()["size"] == 2
+        self.service.decode_token(tokens[0])
+        assert self.service.cache_stats()["misses"] == 4
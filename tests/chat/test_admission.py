@@ -0,0 +1,124 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.chat.adapters.admission import BATCH, INTERACTIVE, STANDARD, AdmissionController
+from app.chat.adapters.llm_adapter import LLMAdapter
+from common.exceptions.chat_exceptions import OverloadedError
+
+async def _hold(controller, priority, order, name, release):
+    async with controller.slot(priority):
+        order.append(name)
+        await release.wait()
+
+@pytest.mark.asyncio
+class TestAdmissionController:
+
+    async def test_acquire_WhenUnderCapacity_AdmitsImmediately(self):
+        # Arrange
+        controller = AdmissionController(max_in_flight=2, queue_size=1, max_wait=1)
+
+        # Act
+        await controller.acquire()
+        await controller.acquire()
+
+        # Assert
+        assert controller.stats()["in_flight"] == 2
+        assert controller.stats()["queued"] == 0
+
+    async def test_release_WhenWaitersQueued_AdmitsByPriorityThenArrival(self):
+        # Arrange
+        controller = AdmissionController(max_in_flight=1, queue_size=10, max_wait=1)
+        release, order = asyncio.Event(), []
+        holder = asyncio.ensure_future(_hold(controller, STANDARD, order, "first", release))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.ensure_future(_hold(controller, BATCH, order, "batch", release)),
+            asyncio.ensure_future(_hold(controller, STANDARD, order, "standard", release)),
+            asyncio.ensure_future(_hold(controller, INTERACTIVE, order, "interactive", release)),
+        ]
+        await asyncio.sleep(0)
+        assert controller.stats()["queued"] == 3
+
+        # Act
+        release.set()
+        await asyncio.gather(holder, *waiters)
+
+        # Assert
+        assert order == ["first", "interactive", "standard", "batch"]
+        assert controller.stats()["in_flight"] == 0
+
+    async def test_acquire_WhenQueueFull_RejectsWithRetryAfter(self):
+        # Arrange
+        controller = AdmissionController(max_in_flight=1, queue_size=1, max_wait=1)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire(STANDARD))
+        await asyncio.sleep(0)
+
+        # Act & Assert
+        with pytest.raises(OverloadedError) as exc:
+            await controller.acquire(STANDARD)
+        assert exc.value.status_code == 503
+        assert int(exc.value.headers["Retry-After"]) >= 1
+        assert controller.stats()["rejected"] == 1
+        waiter.cancel()
+
+    async def test_acquire_WhenQueueFullOfLowerPriority_DisplacesIt(self):
+        # Arrange
+        controller = AdmissionController(max_in_flight=1, queue_size=1, max_wait=1)
+        await controller.acquire()
+        batch = asyncio.ensure_future(controller.acquire(BATCH))
+        await asyncio.sleep(0)
+
+        # Act
+        interactive = asyncio.ensure_future(controller.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+
+        # Assert
+        with pytest.raises(OverloadedError):
+            await batch
+        controller.release()
+        await interactive
+        assert controller.stats()["in_flight"] == 1
+
+    async def test_acquire_WhenDeadlinePasses_TimesOutAndLeavesQueue(self):
+        # Arrange
+        controller = AdmissionController(max_in_flight=1, queue_size=5, max_wait=1)
+        await controller.acquire()
+
+        # Act & Assert
+        with pytest.raises(OverloadedError):
+            await controller.acquire(max_wait=0.01)
+        assert controller.stats()["timed_out"] == 1
+        assert controller.stats()["queued"] == 0
+        controller.release()
+        assert controller.stats()["in_flight"] == 0
+
+    async def test_acquire_WhenWaiterCancelled_DoesNotLeakSlot(self):
+        # Arrange
+        controller = AdmissionController(max_in_flight=1, queue_size=5, max_wait=1)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+
+        # Act
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        controller.release()
+
+        # Assert
+        assert controller.stats()["in_flight"] == 0
+        assert controller.stats()["queued"] == 0
+
+    @patch("app.chat.adapters.llm_adapter.get_http_client", new_callable=AsyncMock)
+    async def test_llmAdapter_WhenNoCapacity_ShedsWithoutCallingBackend(self, mock_get_client):
+        # Arrange
+        mock_client = AsyncMock()
+        mock_get_client.return_value = mock_client
+        controller = AdmissionController(max_in_flight=1, queue_size=0, max_wait=1)
+        await controller.acquire()
+        adapter = LLMAdapter(admission=controller)
+
+        # Act & Assert
+        with pytest.raises(OverloadedError):
+            await adapter.generate("msg", [])
+        mock_client.post.assert_not_awaited()
@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock, patch
 from fastapi.responses import StreamingResponse
 from app.chat.api.routers import send_message
 from app.chat.models.chat_models import ChatRequest
+from common.exceptions.chat_exceptions import OverloadedError
 
 @pytest.mark.asyncio
 class TestChatApi:
@@ -33,5 +34,20 @@ class TestChatApi:
 
         # Assert
         assert isinstance(response, StreamingResponse)
-        mock_service.stream_message.assert_called_once_with(user_id="mock_user", message="Hi")
+        mock_service.stream_message.assert_called_once_with(user_id="mock_user", message="Hi", coalesce=True)
 
+
+    @patch("app.chat.api.routers.get_current_user", return_value="mock_user")
+    @patch("app.chat.api.routers.chat_service")
+    async def test_sendMessage_WhenStreamShedBeforeFirstChunk_RaisesInsteadOfStarting200(self, mock_service, mock_user):
+        # Arrange
+        async def shed_stream():
+            raise OverloadedError("LLM service overloaded", headers={"Retry-After": "2"})
+            yield
+        mock_service.stream_message.return_value = shed_stream()
+        request = ChatRequest(user_id="mock_user", message="Hi")
+
+        # Act & Assert
+        with pytest.raises(OverloadedError) as exc:
+            await send_message(request=request, stream=True)
+        assert exc.value.headers == {"Retry-After": "2"}
@@ -1,10 +1,12 @@
 import pytest
 import json
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from app.chat.repository.chat_repository import ChatRepository, MAX_HISTORY
+from app.chat.repository.session_cache import SessionCache
 from app.chat.models.chat_models import ChatMessage, ChatSession
 from common.exceptions.chat_exceptions import ChatError
 from common.exceptions.infra_exceptions import RedisError
+from common.serialization.serializer import serializer
 
 @pytest.mark.asyncio
 class TestChatRepository:
@@ -25,7 +27,7 @@ class TestChatRepository:
 
         # Assert
         mock_get_redis.assert_awaited_once()
-        fake_redis.lrange.assert_awaited_once_with("chat_session:u1", 0, -1)
+        fake_redis.lrange.assert_awaited_once_with("chat_session:{u1}", 0, -1)
         assert isinstance(session, ChatSession)
         assert session.user_id == "u1"
         assert len(session.history) == 2
@@ -56,7 +58,7 @@ class TestChatRepository:
             await repo.get_session("u1")
         
         # Assert
-        fake_redis.delete.assert_awaited_once_with("chat_session:u1")
+        fake_redis.delete.assert_awaited_once_with("chat_session:{u1}")
         assert "Corrupted session data" in str(exc.value)
 
 
@@ -74,9 +76,9 @@ class TestChatRepository:
 
 
     @patch("app.chat.repository.chat_repository.get_redis")
-    async def test_appendMessage_WhenValid_CallsRedisWithCorrectArgs(self, mock_get_redis):
+    async def test_appendMessage_WhenValid_PipelinesPushAndTrim(self, mock_get_redis):
         # Arrange
-        fake_redis = AsyncMock()
+        fake_redis, fake_pipe = _fake_redis_with_pipeline()
         mock_get_redis.return_value = fake_redis
         repo = ChatRepository()
         msg = ChatMessage(role="user", content="hello")
@@ -85,9 +87,11 @@ class TestChatRepository:
         await repo.append_message("u1", msg)
 
         # Assert
-        key = "chat_session:u1"
-        fake_redis.rpush.assert_awaited_once_with(key, json.dumps(msg.model_dump()))
-        fake_redis.ltrim.assert_awaited_once_with(key, -MAX_HISTORY, -1)
+        key = "chat_session:{u1}"
+        fake_redis.pipeline.assert_called_once_with(transaction=True)
+        fake_pipe.rpush.assert_called_once_with(key, serializer.dumps(msg.model_dump()))
+        fake_pipe.ltrim.assert_called_once_with(key, -MAX_HISTORY, -1)
+        fake_pipe.execute.assert_awaited_once()
 
 
     @patch("app.chat.repository.chat_repository.get_redis")
@@ -104,9 +108,9 @@ class TestChatRepository:
     @patch("app.chat.repository.chat_repository.get_redis")
     async def test_appendMessage_WhenRedisFailsDuringPush_RaisesChatError(self, mock_get_redis):
         # Arrange
-        fake_redis = AsyncMock()
+        fake_redis, fake_pipe = _fake_redis_with_pipeline()
         mock_get_redis.return_value = fake_redis
-        fake_redis.rpush.side_effect = Exception("rpush fail")
+        fake_pipe.execute.side_effect = Exception("rpush fail")
         repo = ChatRepository()
 
         # Act & Assert
@@ -114,3 +118,250 @@ class TestChatRepository:
             await repo.append_message("u1", ChatMessage(role="user", content="hi"))
 
         assert "Failed to append message" in str(exc.value)
+
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_appendTurn_WhenValid_PushesBothMessagesInOneCall(self, mock_get_redis):
+        # Arrange
+        fake_redis, fake_pipe = _fake_redis_with_pipeline()
+        mock_get_redis.return_value = fake_redis
+        repo = ChatRepository()
+        user_msg = ChatMessage(role="user", content="hi")
+        assistant_msg = ChatMessage(role="assistant", content="hello!")
+
+        # Act
+        await repo.append_turn("u1", user_msg, assistant_msg)
+
+        # Assert
+        fake_pipe.rpush.assert_called_once_with(
+            "chat_session:{u1}",
+            serializer.dumps(user_msg.model_dump()),
+            serializer.dumps(assistant_msg.model_dump()),
+        )
+        fake_pipe.execute.assert_awaited_once()
+
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_appendAndGet_WhenValid_ReturnsSessionFromSingleTransaction(self, mock_get_redis):
+        # Arrange
+        fake_redis, fake_pipe = _fake_redis_with_pipeline()
+        fake_pipe.execute.return_value = [
+            2,
+            True,
+            [json.dumps({"role": "assistant", "content": "earlier"}), json.dumps({"role": "user", "content": "hi"})],
+        ]
+        mock_get_redis.return_value = fake_redis
+        repo = ChatRepository()
+
+        # Act
+        session = await repo.append_and_get("u1", ChatMessage(role="user", content="hi"))
+
+        # Assert
+        key = "chat_session:{u1}"
+        fake_pipe.ltrim.assert_called_once_with(key, -MAX_HISTORY, -1)
+        fake_pipe.lrange.assert_called_once_with(key, 0, -1)
+        fake_pipe.execute.assert_awaited_once()
+        fake_redis.lrange.assert_not_awaited()
+        assert [m.content for m in session.history] == ["earlier", "hi"]
+
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_appendAndGet_WhenCorruptedJson_DeletesKeyAndRaisesChatError(self, mock_get_redis):
+        # Arrange
+        fake_redis, fake_pipe = _fake_redis_with_pipeline()
+        fake_pipe.execute.return_value = [1, True, ["{bad json"]]
+        mock_get_redis.return_value = fake_redis
+        repo = ChatRepository()
+
+        # Act & Assert
+        with pytest.raises(ChatError):
+            await repo.append_and_get("u1", ChatMessage(role="user", content="hi"))
+        fake_redis.delete.assert_awaited_once_with("chat_session:{u1}")
+
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_replacePrefix_WhenPrefixUnchanged_TrimsAndPushesSummary(self, mock_get_redis):
+        # Arrange
+        fake_redis, fake_pipe = _fake_redis_with_watch_pipeline([
+            json.dumps({"role": "user", "content": "a", "tokens": 5}),
+            json.dumps({"role": "assistant", "content": "b"}),
+        ])
+        mock_get_redis.return_value = fake_redis
+        repo = ChatRepository()
+        older = [ChatMessage(role="user", content="a"), ChatMessage(role="assistant", content="b")]
+        summary = ChatMessage(role="system", content="summary")
+
+        # Act
+        result = await repo.replace_prefix("u1", older, summary)
+
+        # Assert
+        key = "chat_session:{u1}"
+        assert result is True
+        fake_pipe.watch.assert_awaited_once_with(key)
+        fake_pipe.ltrim.assert_called_once_with(key, 2, -1)
+        fake_pipe.lpush.assert_called_once_with(key, serializer.dumps(summary.model_dump()))
+
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_replacePrefix_WhenPrefixChanged_LeavesSessionAlone(self, mock_get_redis):
+        # Arrange
+        fake_redis, fake_pipe = _fake_redis_with_watch_pipeline([json.dumps({"role": "system", "content": "other"})])
+        mock_get_redis.return_value = fake_redis
+        repo = ChatRepository()
+
+        # Act
+        result = await repo.replace_prefix(
+            "u1", [ChatMessage(role="user", content="a")], ChatMessage(role="system", content="s")
+        )
+
+        # Assert
+        assert result is False
+        fake_pipe.execute.assert_not_awaited()
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_getSessionVersioned_WhenCalled_ReadsListAndCounterInOneTransaction(self, mock_get_redis):
+        # Arrange
+        fake_redis, fake_pipe = _fake_redis_with_pipeline()
+        fake_pipe.execute = AsyncMock(return_value=[[json.dumps({"role": "user", "content": "hi"})], b"4"])
+        mock_get_redis.return_value = fake_redis
+        repo = ChatRepository()
+
+        # Act
+        session, version = await repo.get_session_versioned("u1")
+
+        # Assert
+        fake_redis.pipeline.assert_called_once_with(transaction=True)
+        fake_pipe.get.assert_called_once_with("chat_session_version:{u1}")
+        assert [m.content for m in session.history] == ["hi"]
+        assert version == 4
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_appendMessage_WhenClusterMode_PublishesAfterTransaction(self, mock_get_redis):
+        # Arrange
+        fake_redis, fake_pipe = _fake_redis_with_pipeline()
+        mock_get_redis.return_value = fake_redis
+        repo = ChatRepository(cache=SessionCache(max_entries=10, ttl=60))
+        repo.cluster = True
+
+        # Act
+        await repo.append_message("u1", ChatMessage(role="user", content="hi"))
+
+        # Assert
+        fake_pipe.publish.assert_not_called()
+        fake_redis.publish.assert_awaited_once_with(repo.cache.channel, repo.cache.message("u1"))
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_appendMessage_WhenClusterPublishFails_StillSucceeds(self, mock_get_redis):
+        # Arrange
+        fake_redis, fake_pipe = _fake_redis_with_pipeline()
+        fake_redis.publish.side_effect = Exception("node down")
+        mock_get_redis.return_value = fake_redis
+        repo = ChatRepository(cache=SessionCache(max_entries=10, ttl=60))
+        repo.cluster = True
+
+        # Act
+        version = await repo.append_messages("u1", [ChatMessage(role="user", content="hi")])
+
+        # Assert
+        fake_pipe.execute.assert_awaited_once()
+        assert version == 1
+
+    def test_legacyUserId_WhenKeyPredatesHashTags_ReturnsUser(self):
+        # Arrange
+        repo = ChatRepository()
+
+        # Act & Assert
+        assert repo.legacy_user_id("chat_session:u1") == "u1"
+        assert repo.legacy_user_id("chat_session:{u1}") is None
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_getSession_WhenOnlyLegacyKeyHasHistory_MovesItAndReturnsIt(self, mock_get_redis):
+        # Arrange
+        old = [json.dumps({"role": "user", "content": "hi"}), json.dumps({"role": "assistant", "content": "hello!"})]
+        fake_redis, fake_pipe = _fake_redis_with_watch_pipeline(old)
+        fake_redis.exists.return_value = 1
+        fake_redis.lrange.side_effect = [[], old]
+        mock_get_redis.return_value = fake_redis
+        repo = ChatRepository()
+
+        # Act
+        session = await repo.get_session("u1")
+
+        # Assert
+        fake_pipe.watch.assert_awaited_once_with("chat_session:u1", "chat_session:{u1}")
+        fake_pipe.lpush.assert_called_once_with("chat_session:{u1}", *reversed(old))
+        fake_pipe.delete.assert_called_once_with("chat_session:u1", "chat_session_version:u1")
+        assert [m.content for m in session.history] == ["hi", "hello!"]
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_getSession_WhenEmptyAndNoLegacyKey_ReturnsEmptySession(self, mock_get_redis):
+        # Arrange
+        fake_redis, fake_pipe = _fake_redis_with_watch_pipeline([])
+        fake_redis.lrange.return_value = []
+        mock_get_redis.return_value = fake_redis
+        repo = ChatRepository()
+
+        # Act
+        session = await repo.get_session("u1")
+
+        # Assert
+        fake_redis.exists.assert_awaited_once_with("chat_session:u1")
+        fake_pipe.watch.assert_not_awaited()
+        assert session.history == []
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_getSession_WhenCluster_DoesNotLookForLegacyKey(self, mock_get_redis):
+        # Arrange
+        fake_redis = AsyncMock()
+        fake_redis.lrange.return_value = []
+        mock_get_redis.return_value = fake_redis
+        repo = ChatRepository()
+        repo.legacy_keys = False
+
+        # Act
+        await repo.get_session("u1")
+
+        # Assert
+        fake_redis.exists.assert_not_awaited()
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_appendAndGet_WhenFirstWriteAfterUpgrade_ReturnsLegacyHistoryFirst(self, mock_get_redis):
+        # Arrange
+        old = [json.dumps({"role": "user", "content": "earlier"})]
+        new = json.dumps({"role": "user", "content": "hi"})
+        fake_redis, fake_pipe = _fake_redis_with_watch_pipeline(old)
+        fake_pipe.execute.side_effect = [[1, True, [new], 1], [2, True, 1, 2]]
+        fake_redis.exists.return_value = 1
+        fake_redis.lrange.return_value = old + [new]
+        mock_get_redis.return_value = fake_redis
+        repo = ChatRepository()
+
+        # Act
+        session = await repo.append_and_get("u1", ChatMessage(role="user", content="hi"))
+
+        # Assert
+        fake_pipe.lpush.assert_called_once_with("chat_session:{u1}", *old)
+        assert [m.content for m in session.history] == ["earlier", "hi"]
+
+
+def _fake_redis_with_watch_pipeline(prefix):
+    fake_pipe = MagicMock()
+    fake_pipe.watch = AsyncMock()
+    fake_pipe.unwatch = AsyncMock()
+    fake_pipe.lrange = AsyncMock(return_value=prefix)
+    fake_pipe.execute = AsyncMock(return_value=[True, 1])
+    fake_pipe.__aenter__ = AsyncMock(return_value=fake_pipe)
+    fake_pipe.__aexit__ = AsyncMock(return_value=None)
+    fake_redis = AsyncMock()
+    fake_redis.pipeline = MagicMock(return_value=fake_pipe)
+    fake_redis.exists.return_value = 0  # no pre-hash-tag session to move
+    return fake_redis, fake_pipe
+
+
+def _fake_redis_with_pipeline():
+    fake_pipe = MagicMock()
+    fake_pipe.execute = AsyncMock(return_value=[1, True, 1, 0])
+    fake_redis = AsyncMock()
+    fake_redis.pipeline = MagicMock(return_value=fake_pipe)
+    fake_redis.exists.return_value = 0  # no pre-hash-tag session to move
+    return fake_redis, fake_pipe
@@ -5,6 +5,7 @@ from app.chat.service.chat_service import ChatService
 from app.chat.models.chat_models import ChatMessage, ChatResponse
 from common.exceptions.chat_exceptions import ChatError, LLMError
 from common.exceptions.infra_exceptions import RedisError
+from common.profiling.profiler import Profiler
 from fastapi import WebSocketDisconnect
 
 @pytest.mark.asyncio
@@ -18,7 +19,7 @@ class TestChatService:
 
         # ✅ Make async mocks for awaited methods
         mock_repo.append_message = AsyncMock()
-        mock_repo.get_session = AsyncMock(return_value=Mock(history=["prev"]))
+        mock_repo.append_and_get = AsyncMock(return_value=Mock(history=["prev"]))
         mock_llm.generate = AsyncMock(return_value="hi there")
 
         service = ChatService()
@@ -27,8 +28,8 @@ class TestChatService:
         result = await service.handle_message("u1", "hello")
 
         # Assert
-        mock_repo.append_message.assert_any_await("u1", ChatMessage(role="user", content="hello"))
-        mock_repo.append_message.assert_any_await("u1", ChatMessage(role="assistant", content="hi there"))
+        mock_repo.append_and_get.assert_awaited_once_with("u1", ChatMessage(role="user", content="hello"))
+        mock_repo.append_message.assert_awaited_once_with("u1", ChatMessage(role="assistant", content="hi there"))
         mock_llm.generate.assert_awaited_once_with("hello", ["prev"])
 
         assert isinstance(result, ChatResponse)
@@ -40,8 +41,8 @@ class TestChatService:
     async def test_handleMessage_WhenDependencyThrowsError_RaisesSameException(self, mock_llm_cls, mock_repo_cls, error):
         # Arrange
         mock_repo = mock_repo_cls.return_value
-        mock_repo.append_message = AsyncMock(side_effect=error)
-        mock_repo.get_session = AsyncMock()
+        mock_repo.append_and_get = AsyncMock(side_effect=error)
+        mock_repo.append_message = AsyncMock()
         service = ChatService()
 
         # Act & Assert
@@ -56,7 +57,7 @@ class TestChatService:
         mock_llm = mock_llm_cls.return_value
 
         mock_repo.append_message = AsyncMock()
-        mock_repo.get_session = AsyncMock(return_value=Mock(history=["prev"]))
+        mock_repo.append_and_get = AsyncMock(return_value=Mock(history=["prev"]))
         mock_llm.stream_generate = self.async_mock_gen(["hi", "there"])
 
         service = ChatService()
@@ -65,13 +66,33 @@ class TestChatService:
         gen = service.stream_message("u1", "hello")
         chunks = [json.loads(c) for c in [x async for x in gen]]
 
+        # Assert
+        assert chunks == [{"token": "hithere", "is_final": False}]
+        mock_repo.append_and_get.assert_awaited_once_with("u1", ChatMessage(role="user", content="hello"))
+        mock_repo.append_message.assert_awaited_once_with("u1", ChatMessage(role="assistant", content="[streamed response]"))
+
+    @patch("app.chat.service.chat_service.ChatRepository")
+    @patch("app.chat.service.chat_service.LLMAdapter")
+    async def test_streamMessage_WhenCoalesceDisabled_YieldsOneChunkPerToken(self, mock_llm_cls, mock_repo_cls):
+        # Arrange
+        mock_repo = mock_repo_cls.return_value
+        mock_llm = mock_llm_cls.return_value
+
+        mock_repo.append_message = AsyncMock()
+        mock_repo.append_and_get = AsyncMock(return_value=Mock(history=["prev"]))
+        mock_llm.stream_generate = self.async_mock_gen(["hi", "there"])
+
+        service = ChatService()
+
+        # Act
+        gen = service.stream_message("u1", "hello", coalesce=False)
+        chunks = [json.loads(c) for c in [x async for x in gen]]
+
         # Assert
         assert chunks == [
             {"token": "hi", "is_final": False},
             {"token": "there", "is_final": False},
         ]
-        mock_repo.append_message.assert_any_await("u1", ChatMessage(role="user", content="hello"))
-        mock_repo.append_message.assert_any_await("u1", ChatMessage(role="assistant", content="[streamed response]"))
 
     @pytest.mark.parametrize("error", [RedisError("redis fail"), LLMError("llm fail"), ChatError("chat fail")])
     @patch("app.chat.service.chat_service.ChatRepository")
@@ -79,8 +100,8 @@ class TestChatService:
     async def test_streamMessage_WhenDependencyThrowsError_RaisesSameException(self, mock_llm_cls, mock_repo_cls, error):
         # Arrange
         mock_repo = mock_repo_cls.return_value
-        mock_repo.append_message = AsyncMock(side_effect=error)
-        mock_repo.get_session = AsyncMock()
+        mock_repo.append_and_get = AsyncMock(side_effect=error)
+        mock_repo.append_message = AsyncMock()
         service = ChatService()
 
         # Act & Assert
@@ -95,8 +116,8 @@ class TestChatService:
         mock_repo = mock_repo_cls.return_value
         mock_llm = mock_llm_cls.return_value
 
-        mock_repo.append_message = AsyncMock()
-        mock_repo.get_session = AsyncMock(return_value=Mock(history=["prev"]))
+        mock_repo.append_messages = AsyncMock(side_effect=[1, 2])
+        mock_repo.get_session_versioned = AsyncMock(return_value=(Mock(history=[]), 0))
         mock_llm.stream_generate = self.async_mock_gen(["hi", "there"])
 
         mock_ws = AsyncMock()
@@ -113,9 +134,99 @@ class TestChatService:
 
         # Assert
         mock_ws.accept.assert_awaited_once()
-        mock_ws.send_json.assert_any_await({"token": "hi", "is_final": False})
-        mock_ws.send_json.assert_any_await({"token": "there", "is_final": False})
-        mock_ws.send_json.assert_any_await({"token": "", "is_final": True})
+        assert {"token": "hithere", "is_final": False} in self.sent_frames(mock_ws)
+        assert {"token": "", "is_final": True} in self.sent_frames(mock_ws)
+
+    @patch("app.chat.service.chat_service.ChatRepository")
+    @patch("app.chat.service.chat_service.LLMAdapter")
+    async def test_handleWebSocket_WhenProfileTokenGiven_StoresAllocationProfileForUser(self, mock_llm_cls, mock_repo_cls):
+        # Arrange
+        mock_repo = mock_repo_cls.return_value
+        mock_llm = mock_llm_cls.return_value
+
+        mock_repo.append_messages = AsyncMock(side_effect=[1, 2])
+        mock_repo.get_session_versioned = AsyncMock(return_value=(Mock(history=[]), 0))
+        mock_llm.stream_generate = self.async_mock_gen(["hi"])
+
+        mock_ws = AsyncMock()
+        mock_ws.headers = {}
+        mock_ws.query_params = {"profile": "token"}
+        mock_ws.receive_json.side_effect = [
+            {"user_id": "u1", "message": "hi"},
+            WebSocketDisconnect(),
+        ]
+        profiler = Profiler(enabled=True, secret="s", sample_rate=0.0, max_profiles=5, top=5)
+
+        service = ChatService()
+
+        # Act
+        with patch("app.chat.service.chat_service.profiler", profiler), \
+                patch.object(profiler, "authorized", return_value=True):
+            await service.handle_websocket(mock_ws)
+
+        # Assert
+        [profile] = profiler.store.list()
+        assert profile["capture"] == "memory"
+        assert profile["user_id"] == "u1"
+        assert profile["turns"] == 1
+
+    @patch("app.chat.service.chat_service.ChatRepository")
+    @patch("app.chat.service.chat_service.LLMAdapter")
+    async def test_handleWebSocket_WhenClientOptsOutOfCoalescing_SendsOneFramePerToken(self, mock_llm_cls, mock_repo_cls):
+        # Arrange
+        mock_repo = mock_repo_cls.return_value
+        mock_llm = mock_llm_cls.return_value
+
+        mock_repo.append_messages = AsyncMock(side_effect=[1, 2])
+        mock_repo.get_session_versioned = AsyncMock(return_value=(Mock(history=[]), 0))
+        mock_llm.stream_generate = self.async_mock_gen(["hi", "there"])
+
+        mock_ws = AsyncMock()
+        mock_ws.receive_json.side_effect = [
+            {"user_id": "u1", "message": "hi", "coalesce": False},
+            WebSocketDisconnect(),
+        ]
+
+        service = ChatService()
+
+        # Act
+        await service.handle_websocket(mock_ws)
+
+        # Assert
+        assert {"token": "hi", "is_final": False} in self.sent_frames(mock_ws)
+        assert {"token": "there", "is_final": False} in self.sent_frames(mock_ws)
+        assert {"token": "", "is_final": True} in self.sent_frames(mock_ws)
+
+    @patch("app.chat.service.chat_service.ChatRepository")
+    @patch("app.chat.service.chat_service.LLMAdapter")
+    async def test_handleWebSocket_WhenSeveralTurns_LoadsHistoryOnce(self, mock_llm_cls, mock_repo_cls):
+        # Arrange
+        mock_repo = mock_repo_cls.return_value
+        mock_llm = mock_llm_cls.return_value
+
+        mock_repo.append_messages = AsyncMock(side_effect=[1, 2, 3, 4])
+        mock_repo.get_session_versioned = AsyncMock(return_value=(Mock(history=[]), 0))
+        seen = []
+        async def stream(message, history, **kwargs):
+            seen.append([m.content for m in history])
+            yield "ok"
+        mock_llm.stream_generate = stream
+
+        mock_ws = AsyncMock()
+        mock_ws.receive_json.side_effect = [
+            {"user_id": "u1", "message": "one"},
+            {"user_id": "u1", "message": "two"},
+            WebSocketDisconnect(),
+        ]
+
+        service = ChatService()
+
+        # Act
+        await service.handle_websocket(mock_ws)
+
+        # Assert
+        mock_repo.get_session_versioned.assert_awaited_once_with("u1")
+        assert seen == [["one"], ["one", "[streamed response]", "two"]]
 
     @patch("app.chat.service.chat_service.ChatRepository")
     @patch("app.chat.service.chat_service.LLMAdapter")
@@ -123,7 +234,7 @@ class TestChatService:
         # Arrange
         mock_repo = mock_repo_cls.return_value
         mock_repo.append_message = AsyncMock()
-        mock_repo.get_session = AsyncMock()
+        mock_repo.append_and_get = AsyncMock()
 
         mock_ws = AsyncMock()
         mock_ws.receive_json.side_effect = WebSocketDisconnect()
@@ -141,8 +252,8 @@ class TestChatService:
     async def test_handleWebSocket_WhenErrorOccurs_SendsErrorMessage(self, mock_llm_cls, mock_repo_cls):
         # Arrange
         mock_repo = mock_repo_cls.return_value
-        mock_repo.append_message = AsyncMock(side_effect=RedisError("boom"))
-        mock_repo.get_session = AsyncMock()
+        mock_repo.get_session_versioned = AsyncMock(side_effect=RedisError("boom"))
+        mock_repo.append_message = AsyncMock()
 
         mock_ws = AsyncMock()
         mock_ws.receive_json.side_effect = [{"user_id": "u1", "message": "hi"}]
@@ -155,6 +266,9 @@ class TestChatService:
         # Assert
         mock_ws.send_json.assert_any_await({"error": "boom"})
     
+    def sent_frames(self, mock_ws):
+        return [json.loads(c.args[0]) for c in mock_ws.send_text.await_args_list]
+
     def async_mock_gen(self, values):
         """Return a callable async generator for mocking stream_generate()."""
         async def gen_func(*args, **kwargs):
@@ -0,0 +1,152 @@
+import pytest
+import httpx
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.chat.adapters.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, RetryBudget, backoff_delay, is_retryable,
+)
+from app.chat.adapters.llm_adapter import LLMAdapter
+from common.exceptions.chat_exceptions import CircuitOpenError, LLMError
+
+def _breaker(**kwargs):
+    options = {"window_seconds": 60, "min_calls": 4, "error_rate": 0.5, "slow_call_seconds": 1.0,
+               "slow_call_rate": 0.75, "open_seconds": 30, "half_open_calls": 1}
+    options.update(kwargs)
+    return CircuitBreaker(**options)
+
+def _status_error(code):
+    request = httpx.Request("POST", "http://llm/api/chat")
+    return httpx.HTTPStatusError("status", request=request, response=httpx.Response(code, request=request))
+
+@pytest.mark.asyncio
+class TestCircuitBreaker:
+
+    def test_isRetryable_WhenClientError_ReturnsFalse(self):
+        # Act & Assert
+        assert is_retryable(httpx.ConnectError("refused"))
+        assert is_retryable(_status_error(503))
+        assert not is_retryable(_status_error(404))
+        assert not is_retryable(ValueError("bad json"))
+
+    def test_backoffDelay_WhenAttemptsGrow_StaysWithinCap(self):
+        # Act
+        delays = [backoff_delay(attempt, base=0.1, cap=1.0) for attempt in range(10)]
+
+        # Assert
+        assert all(0 <= d <= 1.0 for d in delays)
+
+    def test_retryBudget_WhenExhausted_RefillsFromTraffic(self):
+        # Arrange
+        budget = RetryBudget(ratio=0.5, capacity=1)
+
+        # Act & Assert
+        assert budget.withdraw() is True
+        assert budget.withdraw() is False
+        budget.deposit()
+        budget.deposit()
+        assert budget.withdraw() is True
+
+    def test_recordFailure_WhenErrorRateCrossed_OpensAndFailsFast(self):
+        # Arrange
+        breaker = _breaker()
+        breaker.record_success(0.1)
+        breaker.record_success(0.1)
+        breaker.record_failure()
+
+        # Act
+        breaker.record_failure()
+
+        # Assert
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError) as exc:
+            breaker.allow()
+        assert exc.value.status_code == 503
+        assert exc.value.headers["Retry-After"] == "30"
+
+    def test_recordSuccess_WhenMostCallsSlow_Opens(self):
+        # Arrange
+        breaker = _breaker()
+
+        # Act
+        for _ in range(4):
+            breaker.record_success(2.0)
+
+        # Assert
+        assert breaker.state == OPEN
+
+    def test_allow_WhenOpenPeriodElapsed_AllowsTrialThenCloses(self):
+        # Arrange
+        breaker = _breaker(open_seconds=0)
+        breaker._open()
+
+        # Act
+        breaker.allow()
+
+        # Assert
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+        breaker.record_success(0.1)
+        assert breaker.state == CLOSED
+
+    def test_recordFailure_WhenHalfOpenTrialFails_ReopensCircuit(self):
+        # Arrange
+        breaker = _breaker(open_seconds=0)
+        breaker._open()
+        breaker.allow()
+
+        # Act
+        breaker.record_failure()
+
+        # Assert
+        assert breaker.state == OPEN
+        assert breaker.snapshot()["times_opened"] == 2
+
+    @patch("app.chat.adapters.llm_adapter.get_http_client", new_callable=AsyncMock)
+    @patch("app.chat.adapters.llm_adapter.asyncio.sleep", new_callable=AsyncMock)
+    async def test_llmAdapter_WhenClientError_DoesNotRetry(self, mock_sleep, mock_get_client):
+        # Arrange
+        response = MagicMock()
+        response.raise_for_status.side_effect = _status_error(400)
+        mock_client = AsyncMock()
+        mock_client.post.return_value = response
+        mock_get_client.return_value = mock_client
+        adapter = LLMAdapter(retries=3, breaker=_breaker())
+
+        # Act & Assert
+        with pytest.raises(LLMError) as exc:
+            await adapter.generate("msg", [])
+        assert "LLM request failed" in str(exc.value)
+        assert mock_client.post.await_count == 1
+        mock_sleep.assert_not_awaited()
+
+    @patch("app.chat.adapters.llm_adapter.get_http_client", new_callable=AsyncMock)
+    async def test_llmAdapter_WhenCircuitOpen_FailsWithoutCallingBackend(self, mock_get_client):
+        # Arrange
+        mock_client = AsyncMock()
+        mock_get_client.return_value = mock_client
+        breaker = _breaker()
+        breaker._open()
+        adapter = LLMAdapter(breaker=breaker)
+
+        # Act & Assert
+        with pytest.raises(CircuitOpenError):
+            await adapter.generate("msg", [])
+        with pytest.raises(CircuitOpenError):
+            async for _ in adapter.stream_generate("msg", []):
+                pass
+        mock_client.post.assert_not_awaited()
+        mock_client.stream.assert_not_called()
+
+    @patch("app.chat.adapters.llm_adapter.get_http_client", new_callable=AsyncMock)
+    @patch("app.chat.adapters.llm_adapter.asyncio.sleep", new_callable=AsyncMock)
+    async def test_llmAdapter_WhenRetryBudgetEmpty_StopsRetrying(self, mock_sleep, mock_get_client):
+        # Arrange
+        mock_client = AsyncMock()
+        mock_client.post.side_effect = httpx.ConnectError("refused")
+        mock_get_client.return_value = mock_client
+        adapter = LLMAdapter(retries=5, breaker=_breaker(min_calls=100), retry_budget=RetryBudget(ratio=0, capacity=1))
+
+        # Act & Assert
+        with pytest.raises(LLMError):
+            await adapter.generate("msg", [])
+        assert mock_client.post.await_count == 2
@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+from app.chat.models.chat_models import ChatMessage, ChatSession
+from app.chat.service.compaction_service import ConversationCompactor, SUMMARY_PREFIX, is_summary
+
+def _session(count):
+    history = [ChatMessage(role="user" if i % 2 == 0 else "assistant", content=f"m{i}") for i in range(count)]
+    return ChatSession(user_id="u1", history=history)
+
+@pytest.mark.asyncio
+class TestConversationCompactor:
+
+    def _compactor(self, repo, llm, **kwargs):
+        options = {"threshold": 6, "keep_recent": 2, "min_interval": 60, "concurrency": 1}
+        options.update(kwargs)
+        return ConversationCompactor(repo, llm, **options)
+
+    async def test_compact_WhenOverThreshold_ReplacesOlderMessagesWithSummary(self):
+        # Arrange
+        repo = Mock()
+        repo.get_session = AsyncMock(return_value=_session(8))
+        repo.replace_prefix = AsyncMock(return_value=True)
+        llm = Mock()
+        llm.generate = AsyncMock(return_value=" user said hi ")
+        compactor = self._compactor(repo, llm)
+
+        # Act
+        result = await compactor.compact("u1")
+
+        # Assert
+        assert result is True
+        prompt = llm.generate.await_args.args[0]
+        assert "user: m0" in prompt and "assistant: m5" in prompt and "m6" not in prompt
+        user_id, older, summary = repo.replace_prefix.await_args.args
+        assert user_id == "u1"
+        assert [m.content for m in older] == [f"m{i}" for i in range(6)]
+        assert is_summary(summary)
+        assert summary.content == SUMMARY_PREFIX + "user said hi"
+
+    async def test_compact_WhenUnderThreshold_DoesNothing(self):
+        # Arrange
+        repo = Mock()
+        repo.get_session = AsyncMock(return_value=_session(3))
+        repo.replace_prefix = AsyncMock()
+        llm = Mock()
+        llm.generate = AsyncMock()
+        compactor = self._compactor(repo, llm)
+
+        # Act
+        result = await compactor.compact("u1")
+
+        # Assert
+        assert result is False
+        llm.generate.assert_not_awaited()
+
+    async def test_maybeSchedule_WhenAlreadyRunningOrRecent_Deduplicates(self):
+        # Arrange
+        release = asyncio.Event()
+        repo = Mock()
+
+        async def slow_session(user_id):
+            await release.wait()
+            return _session(3)
+
+        repo.get_session = slow_session
+        compactor = self._compactor(repo, Mock())
+
+        # Act
+        first = compactor.maybe_schedule("u1", 10)
+        duplicate = compactor.maybe_schedule("u1", 11)
+        below_threshold = compactor.maybe_schedule("u2", 2)
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.sleep(0.01)
+        too_soon = compactor.maybe_schedule("u1", 12)
+
+        # Assert
+        assert first is True
+        assert duplicate is False
+        assert below_threshold is False
+        assert too_soon is False
+
+    async def test_maybeSchedule_WhenCompactionFails_DoesNotRaise(self):
+        # Arrange
+        repo = Mock()
+        repo.get_session = AsyncMock(side_effect=RuntimeError("redis down"))
+        compactor = self._compactor(repo, Mock())
+
+        # Act
+        compactor.maybe_schedule("u1", 10)
+        await asyncio.sleep(0.01)
+
+        # Assert
+        assert "u1" not in compactor._in_flight
+        await compactor.shutdown()
@@ -1,15 +1,18 @@
 import pytest
 import json
+import httpx
 from unittest.mock import AsyncMock, patch, MagicMock
-from app.chat.adapters.llm_adapter import LLMAdapter
+import asyncio
+from app.chat.adapters.llm_adapter import DOCKER_HOST_LLM_URL, LOCAL_LLM_URL, LLMAdapter, discover_llm_base_url
 from app.chat.models.chat_models import ChatMessage
 from common.exceptions.chat_exceptions import LLMError
+from common.config.config import settings
 
 @pytest.mark.asyncio
 class TestLLMAdapter:
 
-    @patch("app.chat.adapters.llm_adapter.httpx.AsyncClient", autospec=True)
-    async def test_generate_WhenValidResponse_ReturnsMessageContent(self, mock_client_cls):
+    @patch("app.chat.adapters.llm_adapter.get_http_client", new_callable=AsyncMock)
+    async def test_generate_WhenValidResponse_ReturnsMessageContent(self, mock_get_client):
         # Arrange
         mock_response = MagicMock()
         mock_response.json.return_value = {"message": {"content": "Hello!"}}
@@ -17,7 +20,7 @@ class TestLLMAdapter:
 
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
-        mock_client_cls.return_value.__aenter__.return_value = mock_client
+        mock_get_client.return_value = mock_client
 
         llm = LLMAdapter()
         history = [ChatMessage(role="user", content="hi")]
@@ -29,13 +32,13 @@ class TestLLMAdapter:
         assert result == "Hello!"
         mock_client.post.assert_awaited_once()
 
-    @patch("app.chat.adapters.llm_adapter.httpx.AsyncClient")
+    @patch("app.chat.adapters.llm_adapter.get_http_client", new_callable=AsyncMock)
     @patch("app.chat.adapters.llm_adapter.asyncio.sleep", new_callable=AsyncMock)
-    async def test_generate_WhenAllRetriesFail_RaisesLLMError(self, mock_sleep, mock_client_cls):
+    async def test_generate_WhenAllRetriesFail_RaisesLLMError(self, mock_sleep, mock_get_client):
         # Arrange
         mock_client = AsyncMock()
-        mock_client_cls.return_value.__aenter__.return_value = mock_client
-        mock_client.post.side_effect = Exception("network fail")
+        mock_get_client.return_value = mock_client
+        mock_client.post.side_effect = httpx.ConnectError("network fail")
 
         adapter = LLMAdapter(retries=2)
 
@@ -46,8 +49,8 @@ class TestLLMAdapter:
         assert "LLM service unavailable" in str(exc.value)
         assert mock_client.post.await_count == 2
 
-    @patch("app.chat.adapters.llm_adapter.httpx.AsyncClient", autospec=True)
-    async def test_streamGenerate_WhenValidStream_YieldsTokens(self, mock_client_cls):
+    @patch("app.chat.adapters.llm_adapter.get_http_client", new_callable=AsyncMock)
+    async def test_streamGenerate_WhenValidStream_YieldsTokens(self, mock_get_client):
         # Arrange
         mock_response = AsyncMock()
         mock_response.status_code = 200
@@ -67,7 +70,7 @@ class TestLLMAdapter:
         mock_client = MagicMock()
         mock_client.stream = MagicMock(return_value=AsyncStreamCM())
 
-        mock_client_cls.return_value.__aenter__.return_value = mock_client
+        mock_get_client.return_value = mock_client
 
         llm = LLMAdapter()
         history = [ChatMessage(role="user", content="hi")]
@@ -83,12 +86,13 @@ class TestLLMAdapter:
             json={
                 "model": llm.model,
                 "messages": [{"role": "user", "content": "hi"}, {"role": "user", "content": "how are you?"}],
-                "stream": True
+                "stream": True,
+                "keep_alive": settings.LLM_KEEP_ALIVE,
             }
         )
 
-    @patch("app.chat.adapters.llm_adapter.httpx.AsyncClient")
-    async def test_streamGenerate_WhenHttpError_RaisesLLMError(self, mock_client_cls):
+    @patch("app.chat.adapters.llm_adapter.get_http_client", new_callable=AsyncMock)
+    async def test_streamGenerate_WhenHttpError_RaisesLLMError(self, mock_get_client):
         # Arrange
         mock_response = AsyncMock(status_code=500)
         mock_response.aread.return_value = b"server fail"
@@ -99,7 +103,7 @@ class TestLLMAdapter:
 
         mock_client = MagicMock()
         mock_client.stream = MagicMock(return_value=mock_stream_ctx)  # ✅ FIXED
-        mock_client_cls.return_value.__aenter__.return_value = mock_client
+        mock_get_client.return_value = mock_client
 
         adapter = LLMAdapter()
 
@@ -110,11 +114,11 @@ class TestLLMAdapter:
 
         assert "HTTP 500" in str(exc.value)
 
-    @patch("app.chat.adapters.llm_adapter.httpx.AsyncClient")
-    async def test_streamGenerate_WhenUnexpectedError_RaisesLLMError(self, mock_client_cls):
+    @patch("app.chat.adapters.llm_adapter.get_http_client", new_callable=AsyncMock)
+    async def test_streamGenerate_WhenUnexpectedError_RaisesLLMError(self, mock_get_client):
         # Arrange
-        mock_client = AsyncMock()
-        mock_client_cls.return_value.__aenter__.return_value = mock_client
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
         mock_client.stream.side_effect = Exception("boom")
 
         adapter = LLMAdapter()
@@ -126,6 +130,24 @@ class TestLLMAdapter:
 
         assert "LLM streaming failed" in str(exc.value)
 
+    @patch("app.chat.adapters.llm_adapter.get_http_client", new_callable=AsyncMock)
+    async def test_generate_WhenCalledTwice_ReusesSharedClient(self, mock_get_client):
+        # Arrange
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"message": {"content": "ok"}}
+        mock_client = AsyncMock()
+        mock_client.post.return_value = mock_response
+        mock_get_client.return_value = mock_client
+        adapter = LLMAdapter()
+
+        # Act
+        await adapter.generate("one", [])
+        await adapter.generate("two", [])
+
+        # Assert
+        assert mock_client.post.await_count == 2
+        mock_client.aclose.assert_not_called()
+
     def test_buildMessages_ReturnsExpectedList(self):
         # Arrange
         adapter = LLMAdapter()
@@ -141,6 +163,73 @@ class TestLLMAdapter:
         assert result[-1] == {"role": "user", "content": "new message"}
         assert len(result) == 3
 
+@pytest.mark.asyncio
+class TestLLMDiscovery:
+
+    async def test_discoverLlmBaseUrl_WhenDockerHostResolves_ReturnsDockerHostUrl(self):
+        # Arrange
+        loop = asyncio.get_running_loop()
+
+        # Act
+        with patch.object(loop, "getaddrinfo", AsyncMock(return_value=[])):
+            url = await discover_llm_base_url(timeout=1.0)
+
+        # Assert
+        assert url == DOCKER_HOST_LLM_URL
+
+    async def test_discoverLlmBaseUrl_WhenLookupFails_ReturnsLocalUrl(self):
+        # Arrange
+        loop = asyncio.get_running_loop()
+
+        # Act
+        with patch.object(loop, "getaddrinfo", AsyncMock(side_effect=OSError("no such host"))):
+            url = await discover_llm_base_url(timeout=1.0)
+
+        # Assert
+        assert url == LOCAL_LLM_URL
+
+    async def test_discoverLlmBaseUrl_WhenLookupHangs_ReturnsLocalUrlWithinTimeout(self):
+        # Arrange
+        loop = asyncio.get_running_loop()
+
+        async def hang(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        # Act
+        started = loop.time()
+        with patch.object(loop, "getaddrinfo", hang):
+            url = await discover_llm_base_url(timeout=0.05)
+
+        # Assert
+        assert url == LOCAL_LLM_URL
+        assert loop.time() - started < 1.0
+
+    @patch("app.chat.adapters.llm_adapter.discover_llm_base_url", new_callable=AsyncMock)
+    async def test_discoverBackend_WhenNothingConfigured_SwitchesToDiscoveredUrl(self, mock_discover):
+        # Arrange
+        mock_discover.return_value = DOCKER_HOST_LLM_URL
+        with patch.object(settings, "LLM_BACKENDS", []):
+            adapter = LLMAdapter()
+
+        # Act
+        await adapter.discover_backend()
+
+        # Assert
+        assert adapter.base_url == DOCKER_HOST_LLM_URL
+        assert [b.url for b in adapter.router.backends] == [DOCKER_HOST_LLM_URL]
+
+    @patch("app.chat.adapters.llm_adapter.discover_llm_base_url", new_callable=AsyncMock)
+    async def test_discoverBackend_WhenBaseUrlGiven_DoesNotLookUp(self, mock_discover):
+        # Arrange
+        adapter = LLMAdapter(base_url="http://ollama:11434/api/chat")
+
+        # Act
+        await adapter.discover_backend()
+
+        # Assert
+        mock_discover.assert_not_awaited()
+        assert adapter.base_url == "http://ollama:11434/api/chat"
+
 def _aiter(items):
     async def gen():
         for i in items:
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.chat.adapters.llm_adapter import LLMAdapter
+from app.chat.adapters.llm_router import LLMRouter
+from common.exceptions.chat_exceptions import LLMError
+
+URLS = ["http://gpu-a:11434/api/chat", "http://gpu-b:11434/api/chat"]
+
+def _router(**kwargs):
+    options = {"probe_interval": 0, "probe_timeout": 1, "failure_threshold": 2, "ejection_seconds": 0,
+               "ramp_seconds": 60, "hedge": False, "hedge_min_samples": 5}
+    options.update(kwargs)
+    return LLMRouter(URLS, **options)
+
+@pytest.mark.asyncio
+class TestLLMRouter:
+
+    def test_pick_WhenOneBackendBusy_ReturnsLeastOutstanding(self):
+        # Arrange
+        router = _router()
+        router.backends[0].in_flight = 3
+
+        # Act
+        backend = router.pick()
+
+        # Assert
+        assert backend.url == URLS[1]
+        assert backend.probe_url == "http://gpu-b:11434/api/tags"
+
+    def test_pick_WhenLoadEqual_PrefersLowerLatency(self):
+        # Arrange
+        router = _router()
+        router.backends[0].ewma_latency = 2.0
+        router.backends[1].ewma_latency = 0.5
+
+        # Act & Assert
+        assert router.pick().url == URLS[1]
+
+    def test_recordFailure_WhenThresholdReached_EjectsBackend(self):
+        # Arrange
+        router = _router()
+        first = router.backends[0]
+
+        # Act
+        router.record_failure(first)
+        router.record_failure(first)
+
+        # Assert
+        assert first.healthy is False
+        assert router.pick().url == URLS[1]
+        with pytest.raises(LLMError):
+            router.pick(exclude=router.backends)
+
+    @patch("app.chat.adapters.llm_router.get_http_client", new_callable=AsyncMock)
+    async def test_probe_WhenEjectedBackendRecovers_ReadmitsWithRampedWeight(self, mock_get_client):
+        # Arrange
+        mock_client = AsyncMock()
+        mock_client.get.return_value = MagicMock()
+        mock_get_client.return_value = mock_client
+        router = _router()
+        backend = router.backends[0]
+        router.record_failure(backend)
+        router.record_failure(backend)
+
+        # Act
+        await router.probe(backend)
+
+        # Assert
+        mock_client.get.assert_awaited_once_with(backend.probe_url, timeout=1)
+        assert backend.healthy is True
+        assert backend.weight(backend.readmitted_at, router.ramp_seconds) == pytest.approx(0.1)
+
+    def test_hedgeDelay_WhenEnoughSamples_ReturnsP95(self):
+        # Arrange
+        router = _router(hedge=True)
+        for latency in range(1, 21):
+            router.record_success(router.backends[0], latency / 10, track_latency=True)
+
+        # Act & Assert
+        assert router.hedge_delay() == pytest.approx(1.9)
+        assert _router(hedge=False).hedge_delay() is None
+
+    @patch("app.chat.adapters.llm_adapter.get_http_client", new_callable=AsyncMock)
+    async def test_llmAdapter_WhenPrimarySlowerThanP95_HedgesToOtherBackend(self, mock_get_client):
+        # Arrange
+        router = _router(hedge=True, hedge_min_samples=1)
+        router.record_success(router.backends[0], 0.01, track_latency=True)
+        router.backends[1].ewma_latency = 0.5
+
+        async def post(url, json):
+            if url == URLS[0]:
+                await asyncio.sleep(1)
+            response = MagicMock()
+            response.json.return_value = {"message": {"content": url}}
+            return response
+
+        mock_client = AsyncMock()
+        mock_client.post.side_effect = post
+        mock_get_client.return_value = mock_client
+        adapter = LLMAdapter(router=router)
+
+        # Act
+        reply = await adapter.generate("hi", [])
+
+        # Assert
+        assert reply == URLS[1]
+        assert mock_client.post.await_count == 2
+        assert all(b.in_flight == 0 for b in router.backends)
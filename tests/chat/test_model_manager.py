@@ -0,0 +1,73 @@
+import asyncio
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.chat.adapters.llm_router import LLMRouter
+from app.chat.adapters.model_manager import ModelManager
+
+def _router(*urls):
+    return LLMRouter(list(urls), probe_interval=0)
+
+@pytest.mark.asyncio
+class TestModelManager:
+
+    @patch("app.chat.adapters.model_manager.get_http_client", new_callable=AsyncMock)
+    async def test_warmAll_WhenBackendsRespond_LoadsEveryModelWithKeepAlive(self, mock_get_client):
+        # Arrange
+        mock_client = AsyncMock()
+        mock_client.post.return_value = MagicMock()
+        mock_get_client.return_value = mock_client
+        manager = ModelManager(_router("http://a/api/chat", "http://b/api/chat"), models=["m1", "m2"], keep_alive="1h")
+
+        # Act
+        ready = await manager.warm_all()
+
+        # Assert
+        assert ready is True
+        assert mock_client.post.await_count == 4
+        mock_client.post.assert_any_await(
+            "http://b/api/chat",
+            json={"model": "m2", "messages": [], "keep_alive": "1h", "stream": False},
+            timeout=manager.timeout,
+        )
+
+    @patch("app.chat.adapters.model_manager.get_http_client", new_callable=AsyncMock)
+    async def test_ready_WhenModelWarmOnOnlyOneBackend_IsReady(self, mock_get_client):
+        # Arrange
+        async def post(url, **kwargs):
+            if url.startswith("http://down"):
+                raise httpx.ConnectError("refused")
+            return MagicMock()
+        mock_client = AsyncMock()
+        mock_client.post.side_effect = post
+        mock_get_client.return_value = mock_client
+        manager = ModelManager(_router("http://up/api/chat", "http://down/api/chat"), models=["m1"])
+
+        # Act
+        ready = await manager.warm_all()
+
+        # Assert
+        assert ready is True
+        warm = {b["url"]: b["warm"] for b in manager.snapshot()["backends"]}
+        assert warm == {"http://up/api/chat": True, "http://down/api/chat": False}
+
+    @patch("app.chat.adapters.model_manager.get_http_client", new_callable=AsyncMock)
+    async def test_ready_WhenWarmUpFails_StaysNotReadyUntilRetrySucceeds(self, mock_get_client):
+        # Arrange
+        mock_client = AsyncMock()
+        mock_client.post.side_effect = [httpx.ConnectError("refused"), MagicMock(), MagicMock()]
+        mock_get_client.return_value = mock_client
+        manager = ModelManager(_router("http://a/api/chat"), models=["m1"], refresh_interval=60, retry_interval=0.01)
+
+        # Act
+        assert manager.ready is False
+        await manager.start()
+        for _ in range(50):
+            if manager.ready:
+                break
+            await asyncio.sleep(0.01)
+        await manager.stop()
+
+        # Assert
+        assert manager.ready is True
+        assert mock_client.post.await_count == 2
@@ -0,0 +1,81 @@
+import json
+from app.chat.adapters.prompt_builder import PromptBuilder
+from app.chat.models.chat_models import ChatMessage, estimate_tokens
+
+class TestPromptBuilder:
+
+    def test_build_WhenCurrentMessageAlreadyInHistory_SendsItOnce(self):
+        # Arrange
+        builder = PromptBuilder(default_budget=1000, model_budgets={})
+        history = [
+            ChatMessage(role="assistant", content="hello"),
+            ChatMessage(role="user", content="how are you?"),
+        ]
+
+        # Act
+        result = builder.build("m", history, "how are you?")
+
+        # Assert
+        assert result == [
+            {"role": "assistant", "content": "hello"},
+            {"role": "user", "content": "how are you?"},
+        ]
+
+    def test_build_WhenHistoryExceedsBudget_KeepsNewestMessages(self):
+        # Arrange
+        history = [ChatMessage(role="user", content=f"m{i}", tokens=10) for i in range(10)]
+        budget = estimate_tokens("now") + 30
+        builder = PromptBuilder(default_budget=budget, model_budgets={})
+
+        # Act
+        result = builder.build("m", history, "now")
+
+        # Assert
+        assert [m["content"] for m in result] == ["m7", "m8", "m9", "now"]
+
+    def test_build_WhenModelHasOwnBudget_UsesIt(self):
+        # Arrange
+        history = [ChatMessage(role="user", content=f"m{i}", tokens=10) for i in range(10)]
+        builder = PromptBuilder(default_budget=10_000, model_budgets={"small": estimate_tokens("now") + 10})
+
+        # Act
+        small = builder.build("small", history, "now")
+        large = builder.build("large", history, "now")
+
+        # Assert
+        assert len(small) == 2
+        assert len(large) == 11
+
+    def test_build_WhenMessageAloneExceedsBudget_StillSendsMessage(self):
+        # Arrange
+        builder = PromptBuilder(default_budget=1, model_budgets={})
+
+        # Act
+        result = builder.build("m", [ChatMessage(role="user", content="old")], "a long new message")
+
+        # Assert
+        assert result == [{"role": "user", "content": "a long new message"}]
+
+    def test_chatMessage_WhenLoadedWithStoredCount_DoesNotRecount(self):
+        # Arrange
+        stored = json.dumps({"role": "user", "content": "hi", "tokens": 42})
+
+        # Act
+        message = ChatMessage(**json.loads(stored))
+        legacy = ChatMessage(role="user", content="hi")
+
+        # Assert
+        assert message.tokens == 42
+        assert legacy.tokens == estimate_tokens("hi")
+
+    def test_build_WhenHistoryStartsWithSummary_KeepsSummaryFirst(self):
+        # Arrange
+        summary = ChatMessage(role="system", content="Summary of the earlier conversation:\nuser likes tea", tokens=10)
+        history = [summary] + [ChatMessage(role="user", content=f"m{i}", tokens=10) for i in range(5)]
+        builder = PromptBuilder(default_budget=estimate_tokens("now") + 30, model_budgets={})
+
+        # Act
+        result = builder.build("m", history, "now")
+
+        # Assert
+        assert [m["content"] for m in result] == [summary.content, "m3", "m4", "now"]
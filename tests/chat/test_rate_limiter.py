@@ -1,73 +1,179 @@
 # tests/common/test_rate_limiter.py
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
-from fastapi import Request
-from app.chat.service.rate_limiter_service import rate_limiter
+from unittest.mock import AsyncMock, patch
+from fastapi import Response
+from redis.exceptions import NoScriptError
+from app.chat.service.rate_limiter_service import rate_limiter, RateLimiter, LeasedRateLimiter
+from app.chat.service.rate_limit_algorithms import (
+    GCRALimiter, TokenBucketLimiter, SlidingLogLimiter, LocalTokenBucket, build_algorithm,
+)
 from common.exceptions.infra_exceptions import RateLimitError
 from common.config.config import settings
 
+limiter = RateLimiter(GCRALimiter(limit=10, period=1))
+
 @pytest.mark.asyncio
+@patch("app.chat.service.rate_limiter_service.limiter", limiter)
 class TestRateLimiter:
 
+    def setup_method(self):
+        limiter._redis_down_until = 0.0
+        limiter._fallback_buckets.clear()
+
     @patch("app.chat.service.rate_limiter_service.get_redis", new_callable=AsyncMock)
-    async def test_rate_limiter_WhenUnderLimit_AllowsRequest(self, mock_get_redis):
+    async def test_rate_limiter_WhenUnderLimit_AllowsRequestAndSetsHeaders(self, mock_get_redis):
         # Arrange
         mock_redis = AsyncMock()
-        mock_redis.incr.return_value = 1
+        mock_redis.evalsha.return_value = [1, 4, 0, 250]
         mock_get_redis.return_value = mock_redis
-
-        mock_request = MagicMock(spec=Request)
-        mock_request.headers = {"X-User-ID": "user123"}
+        response = Response()
 
         # Act
-        await rate_limiter(mock_request)
+        await rate_limiter(response, user_id="user123")
 
         # Assert
-        mock_redis.incr.assert_awaited_once_with("rate_limit:user123")
-        mock_redis.expire.assert_awaited_once_with("rate_limit:user123", settings.RATE_LIMIT_PERIOD)
+        key = f"rate_limit:{limiter.algorithm.name}:{{user123}}"
+        mock_redis.evalsha.assert_awaited_once()
+        assert mock_redis.evalsha.await_args.args[:3] == (limiter.algorithm.sha, 1, key)
+        assert response.headers["X-RateLimit-Remaining"] == "4"
+        assert response.headers["X-RateLimit-Limit"] == str(limiter.algorithm.burst)
+        assert "Retry-After" not in response.headers
 
-    @patch("app.chat.service.rate_limiter_service.get_redis")
-    async def test_rate_limiter_WhenExceedsLimit_RaisesRateLimitError(self, mock_get_redis):
+    @patch("app.chat.service.rate_limiter_service.get_redis", new_callable=AsyncMock)
+    async def test_rate_limiter_WhenExceedsLimit_RaisesRateLimitErrorWithRetryAfter(self, mock_get_redis):
         # Arrange
         mock_redis = AsyncMock()
-        mock_redis.incr.return_value = settings.RATE_LIMIT_REQUESTS + 1
-        mock_redis.expire = AsyncMock()
-        
+        mock_redis.evalsha.return_value = [0, 0, 1500, 2000]
         mock_get_redis.return_value = mock_redis
 
-        mock_request = MagicMock(spec=Request)
-        mock_request.headers = {"X-User-ID": "user123"}
-
         # Act & Assert
-        with pytest.raises(RateLimitError):
-            await rate_limiter(mock_request)
+        with pytest.raises(RateLimitError) as exc:
+            await rate_limiter(Response(), user_id="user123")
 
-        mock_redis.incr.assert_awaited_once_with("rate_limit:user123")
+        assert exc.value.status_code == 429
+        assert exc.value.headers["Retry-After"] == "2"
+        assert exc.value.headers["X-RateLimit-Remaining"] == "0"
+
+    @patch("app.chat.service.rate_limiter_service.get_redis", new_callable=AsyncMock)
+    async def test_rate_limiter_WhenScriptNotCached_FallsBackToEval(self, mock_get_redis):
+        # Arrange
+        mock_redis = AsyncMock()
+        mock_redis.evalsha.side_effect = NoScriptError("NOSCRIPT")
+        mock_redis.eval.return_value = [1, 9, 0, 100]
+        mock_get_redis.return_value = mock_redis
+
+        # Act
+        await rate_limiter(Response(), user_id="user123")
+
+        # Assert
+        mock_redis.eval.assert_awaited_once()
+        assert mock_redis.eval.await_args.args[0] == limiter.algorithm.script
 
     @patch("app.chat.service.rate_limiter_service.get_redis", new_callable=AsyncMock)
-    async def test_rate_limiter_WhenRedisFails_AllowsRequest(self, mock_get_redis):
+    async def test_rate_limiter_WhenRedisFails_FallsBackToLocalBucket(self, mock_get_redis):
         # Arrange
         mock_get_redis.side_effect = Exception("Redis down")
 
-        mock_request = MagicMock(spec=Request)
-        mock_request.headers = {"X-User-ID": "user123"}
+        # Act
+        for _ in range(limiter.fallback_capacity):
+            await rate_limiter(Response(), user_id="user123")
+
+        # Assert
+        with pytest.raises(RateLimitError):
+            await rate_limiter(Response(), user_id="user123")
+        # Redis is skipped during the cool-down instead of being retried per request
+        mock_get_redis.assert_awaited_once()
+
+    def test_gcraLimiter_WhenBuilt_DerivesEmissionIntervalAndTolerance(self):
+        # Act
+        algorithm = GCRALimiter(limit=10, period=1, burst=20)
+
+        # Assert
+        assert algorithm.args() == [100, 2000]
+
+    def test_tokenBucketLimiter_WhenBurstUnset_UsesLimitAsCapacity(self):
+        # Act
+        algorithm = TokenBucketLimiter(limit=10, period=2)
+
+        # Assert
+        assert algorithm.args() == [10, 10 / 2000, 1]
+
+    def test_slidingLogLimiter_WhenCalledTwice_UsesUniqueMembers(self):
+        # Arrange
+        algorithm = SlidingLogLimiter(limit=5, period=1, burst=50)
 
+        # Act
+        first, second = algorithm.args(), algorithm.args()
+
+        # Assert
+        assert algorithm.burst == 5
+        assert first[:2] == [5, 1000]
+        assert first[2] != second[2]
+
+    def test_buildAlgorithm_WhenUnknownName_RaisesValueError(self):
         # Act & Assert
-        await rate_limiter(mock_request)
+        with pytest.raises(ValueError):
+            build_algorithm("fixed_window", settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_PERIOD)
+
+    def test_localTokenBucket_WhenEmpty_RefillsOverTime(self):
+        # Arrange
+        bucket = LocalTokenBucket(capacity=2, rate_per_second=2)
+        now = bucket.updated_at
+
+        # Act
+        results = [bucket.take(now) for _ in range(3)]
+        later = bucket.take(now + 0.5)
+
+        # Assert
+        assert [r.allowed for r in results] == [True, True, False]
+        assert results[-1].retry_after_ms == 500
+        assert later.allowed
+
+
+@pytest.mark.asyncio
+class TestLeasedRateLimiter:
+
+    @patch("app.chat.service.rate_limiter_service.get_redis", new_callable=AsyncMock)
+    async def test_hit_WhenLeaseHasTokens_SkipsRedis(self, mock_get_redis):
+        # Arrange
+        mock_redis = AsyncMock()
+        mock_redis.evalsha.side_effect = [[1, 9, 0, 100], [2, 7, 0, 300]]
+        mock_get_redis.return_value = mock_redis
+        leased = LeasedRateLimiter(TokenBucketLimiter(limit=10, period=1), lease_size=4)
+
+        # Act: first lease is a single token, then the size doubles as leases run dry
+        results = [await leased.hit("u1") for _ in range(3)]
+
+        # Assert
+        assert all(r.allowed for r in results)
+        requested = [c.args[-1] for c in mock_redis.evalsha.await_args_list]
+        assert requested == [1, 2]
 
     @patch("app.chat.service.rate_limiter_service.get_redis", new_callable=AsyncMock)
-    async def test_rate_limiter_WhenNoUserHeader_UsesAnonymous(self, mock_get_redis):
+    async def test_hit_WhenGlobalBucketEmpty_CachesDenialLocally(self, mock_get_redis):
         # Arrange
         mock_redis = AsyncMock()
-        mock_redis.incr.return_value = 1
+        mock_redis.evalsha.return_value = [0, 0, 800, 1000]
         mock_get_redis.return_value = mock_redis
+        leased = LeasedRateLimiter(TokenBucketLimiter(limit=10, period=1))
 
-        mock_request = MagicMock(spec=Request)
-        mock_request.headers = {}
+        # Act
+        first = await leased.hit("u1")
+        second = await leased.hit("u1")
+
+        # Assert
+        assert not first.allowed and not second.allowed
+        assert first.retry_after_ms == 800
+        mock_redis.evalsha.assert_awaited_once()
+
+    @patch("app.chat.service.rate_limiter_service.get_redis", new_callable=AsyncMock)
+    async def test_hit_WhenRedisDown_EnforcesLocalFallbackLimit(self, mock_get_redis):
+        # Arrange
+        mock_get_redis.side_effect = Exception("Redis down")
+        leased = LeasedRateLimiter(TokenBucketLimiter(limit=3, period=1), fallback_requests=2)
 
         # Act
-        await rate_limiter(mock_request)
+        results = [await leased.hit("u1") for _ in range(3)]
 
         # Assert
-        mock_redis.incr.assert_awaited_once_with("rate_limit:anonymous")
-        mock_redis.expire.assert_awaited_once_with("rate_limit:anonymous", settings.RATE_LIMIT_PERIOD)
+        assert [r.allowed for r in results] == [True, True, False]
@@ -0,0 +1,120 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.chat.adapters.llm_adapter import LLMAdapter
+from app.chat.adapters.response_cache import ResponseCache
+from common.exceptions.infra_exceptions import RedisError
+
+MODEL = "gemma3:1b"
+
+@pytest.mark.asyncio
+class TestResponseCache:
+
+    def _cache(self, **kwargs):
+        options = {"models": [MODEL], "ttl": 60, "max_entries": 10, "max_bytes": 1024, "max_reply_bytes": 512}
+        options.update(kwargs)
+        return ResponseCache(**options)
+
+    def test_key_WhenContentDiffersOnlyByCaseAndWhitespace_ReturnsSameKey(self):
+        # Arrange
+        cache = self._cache()
+
+        # Act
+        first = cache.key(MODEL, [{"role": "user", "content": "  Hi   there "}])
+        second = cache.key(MODEL, [{"role": "user", "content": "hi there"}])
+        other_model = cache.key("llama3", [{"role": "user", "content": "hi there"}])
+
+        # Assert
+        assert first == second
+        assert first != other_model
+
+    @patch("app.chat.adapters.response_cache.get_redis", new_callable=AsyncMock)
+    async def test_get_WhenStoredInL1_SkipsRedis(self, mock_get_redis):
+        # Arrange
+        fake_redis = AsyncMock()
+        mock_get_redis.return_value = fake_redis
+        cache = self._cache()
+        messages = [{"role": "user", "content": "help"}]
+        await cache.set(MODEL, messages, "How can I help?")
+        fake_redis.set.assert_awaited_once()
+        assert fake_redis.set.await_args.kwargs["ex"] == 60
+        mock_get_redis.reset_mock()
+
+        # Act
+        reply = await cache.get(MODEL, messages)
+
+        # Assert
+        assert reply == "How can I help?"
+        mock_get_redis.assert_not_awaited()
+
+    @patch("app.chat.adapters.response_cache.get_redis", new_callable=AsyncMock)
+    async def test_get_WhenOnlyInRedis_ReturnsAndPopulatesL1(self, mock_get_redis):
+        # Arrange
+        fake_redis = AsyncMock()
+        fake_redis.get.return_value = "from redis"
+        mock_get_redis.return_value = fake_redis
+        cache = self._cache()
+        messages = [{"role": "user", "content": "faq"}]
+
+        # Act
+        first = await cache.get(MODEL, messages)
+        second = await cache.get(MODEL, messages)
+
+        # Assert
+        assert first == second == "from redis"
+        fake_redis.get.assert_awaited_once()
+        assert cache.stats()["hits"] == 2
+
+    @patch("app.chat.adapters.response_cache.get_redis", new_callable=AsyncMock)
+    async def test_get_WhenRedisUnavailable_ReturnsNone(self, mock_get_redis):
+        # Arrange
+        mock_get_redis.side_effect = RedisError("down")
+        cache = self._cache()
+
+        # Act
+        reply = await cache.get(MODEL, [{"role": "user", "content": "hi"}])
+
+        # Assert
+        assert reply is None
+        assert cache.stats()["misses"] == 1
+
+    @patch("app.chat.adapters.response_cache.get_redis", new_callable=AsyncMock)
+    async def test_set_WhenL1OverByteBudget_EvictsOldest(self, mock_get_redis):
+        # Arrange
+        mock_get_redis.return_value = AsyncMock()
+        cache = self._cache(max_bytes=10)
+
+        # Act
+        await cache.set(MODEL, [{"role": "user", "content": "a"}], "123456")
+        await cache.set(MODEL, [{"role": "user", "content": "b"}], "abcdef")
+
+        # Assert
+        assert cache.stats()["l1_entries"] == 1
+        assert cache.stats()["l1_bytes"] == 6
+
+    def test_replay_WhenReplyHasSpaces_PreservesTextWhenJoined(self):
+        # Arrange
+        cache = self._cache()
+        reply = "Hello there,  how can I help?\n"
+
+        # Act
+        chunks = list(cache.replay(reply))
+
+        # Assert
+        assert len(chunks) == 6
+        assert "".join(chunks) == reply
+
+    @patch("app.chat.adapters.llm_adapter.get_http_client", new_callable=AsyncMock)
+    async def test_llmAdapter_WhenCacheHit_SkipsBackend(self, mock_get_client):
+        # Arrange
+        cache = self._cache()
+        cache.get = AsyncMock(return_value="cached reply")
+        adapter = LLMAdapter(model=MODEL, cache=cache)
+
+        # Act
+        reply = await adapter.generate("hi", [])
+        streamed = [t async for t in adapter.stream_generate("hi", [])]
+
+        # Assert
+        assert reply == "cached reply"
+        assert streamed == ["cached ", "reply"]
+        mock_get_client.assert_not_awaited()
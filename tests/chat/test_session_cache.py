@@ -0,0 +1,119 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.chat.models.chat_models import ChatMessage
+from app.chat.repository.chat_repository import ChatRepository
+from app.chat.repository.session_cache import SessionCache
+
+def _cache(**kwargs):
+    cache = SessionCache(max_entries=kwargs.pop("max_entries", 10), ttl=kwargs.pop("ttl", 60), **kwargs)
+    cache.listening = True
+    return cache
+
+def _msg(content, role="user"):
+    return ChatMessage(role=role, content=content)
+
+@pytest.mark.asyncio
+class TestSessionCache:
+
+    def test_get_WhenListenerNotSubscribed_ServesNothing(self):
+        # Arrange
+        cache = _cache()
+        cache.fill("u1", [_msg("hi")])
+        cache.listening = False
+
+        # Act & Assert
+        assert cache.get("u1") is None
+
+    def test_fill_WhenInvalidatedDuringRead_DoesNotStoreStaleHistory(self):
+        # Arrange
+        cache = _cache()
+        token = cache.begin_fill("u1")
+
+        # Act
+        cache.handle("other-worker u1")
+        cache.fill("u1", [_msg("stale")], token)
+
+        # Assert
+        assert cache.get("u1") is None
+        assert cache.stats()["invalidations"] == 1
+
+    def test_handle_WhenMessageFromThisWorker_KeepsEntry(self):
+        # Arrange
+        cache = _cache()
+        cache.fill("u1", [_msg("hi")])
+
+        # Act
+        cache.handle(cache.message("u1"))
+
+        # Assert
+        assert cache.get("u1") == [_msg("hi")]
+
+    def test_extend_WhenLengthMatches_AppendsAndTrims(self):
+        # Arrange
+        cache = _cache()
+        cache.fill("u1", [_msg("1"), _msg("2")])
+
+        # Act
+        history = cache.extend("u1", [_msg("3")], length_after=3, max_history=2)
+
+        # Assert
+        assert [m.content for m in history] == ["2", "3"]
+        assert [m.content for m in cache.get("u1")] == ["2", "3"]
+
+    def test_extend_WhenAnotherWriterAppended_DropsEntry(self):
+        # Arrange
+        cache = _cache()
+        cache.fill("u1", [_msg("1")])
+
+        # Act
+        history = cache.extend("u1", [_msg("2")], length_after=3, max_history=50)
+
+        # Assert
+        assert history is None
+        assert cache.get("u1") is None
+
+    def test_fill_WhenFull_EvictsLeastRecentlyUsed(self):
+        # Arrange
+        cache = _cache(max_entries=2)
+        cache.fill("u1", [_msg("1")])
+        cache.fill("u2", [_msg("2")])
+        cache.get("u1")
+
+        # Act
+        cache.fill("u3", [_msg("3")])
+
+        # Assert
+        assert cache.get("u2") is None
+        assert cache.get("u1") is not None and cache.get("u3") is not None
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_getSession_WhenCached_MakesNoRedisCall(self, mock_get_redis):
+        # Arrange
+        repo = ChatRepository(cache=_cache())
+        repo.cache.fill("u1", [_msg("hi")])
+
+        # Act
+        session = await repo.get_session("u1")
+
+        # Assert
+        assert [m.content for m in session.history] == ["hi"]
+        mock_get_redis.assert_not_awaited()
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_appendAndGet_WhenCached_SkipsReadBackAndPublishesInvalidation(self, mock_get_redis):
+        # Arrange
+        repo = ChatRepository(cache=_cache())
+        repo.cache.fill("u1", [_msg("hi")])
+        fake_pipe = MagicMock()
+        fake_pipe.execute = AsyncMock(return_value=[2, True, 0])
+        fake_redis = AsyncMock()
+        fake_redis.pipeline = MagicMock(return_value=fake_pipe)
+        mock_get_redis.return_value = fake_redis
+
+        # Act
+        session = await repo.append_and_get("u1", _msg("again"))
+
+        # Assert
+        assert [m.content for m in session.history] == ["hi", "again"]
+        fake_pipe.lrange.assert_not_called()
+        fake_pipe.publish.assert_called_once_with(repo.cache.channel, repo.cache.message("u1"))
@@ -0,0 +1,169 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.chat.models.chat_models import ChatMessage
+from app.chat.repository.chat_repository import ChatRepository
+from app.chat.repository.session_codec import (
+    FORMAT_MSGPACK, FORMAT_MSGPACK_LZ4, FORMAT_MSGPACK_ZSTD, SessionCodec, SessionDecodeError,
+)
+from app.chat.repository.session_migrator import SessionMigrator
+from common.exceptions.chat_exceptions import ChatError
+
+msgpack = pytest.importorskip("msgpack")
+
+LONG = "the quick brown fox jumps over the lazy dog " * 40
+
+@pytest.mark.asyncio
+class TestSessionCodec:
+
+    @pytest.mark.parametrize("compression", ["none", "zstd", "lz4"])
+    @pytest.mark.parametrize("role", ["user", "assistant", "system", "tool"])
+    def test_encode_WhenMsgpack_RoundTripsMessage(self, compression, role):
+        # Arrange
+        codec = SessionCodec("msgpack", compression, compress_min_bytes=64)
+        message = ChatMessage(role=role, content=LONG + "✓").model_dump()
+
+        # Act
+        restored = codec.decode(codec.encode(message))
+
+        # Assert
+        assert restored == message
+
+    def test_encode_WhenMsgpack_IsSmallerThanJson(self):
+        # Arrange
+        message = ChatMessage(role="assistant", content="hello there").model_dump()
+
+        # Act
+        encoded = SessionCodec("msgpack", "none").encode(message)
+
+        # Assert
+        assert encoded[0] == FORMAT_MSGPACK
+        assert len(encoded) < len(json.dumps(message))
+
+    @pytest.mark.parametrize("compression, version", [("zstd", FORMAT_MSGPACK_ZSTD), ("lz4", FORMAT_MSGPACK_LZ4)])
+    def test_encode_WhenMessageShort_SkipsCompression(self, compression, version):
+        # Arrange
+        codec = SessionCodec("msgpack", compression, compress_min_bytes=256)
+
+        # Act & Assert
+        assert codec.encode({"role": "user", "content": "hi", "tokens": 5})[0] == FORMAT_MSGPACK
+        assert codec.encode({"role": "user", "content": LONG, "tokens": 5})[0] == version
+
+    @pytest.mark.parametrize("raw", [json.dumps({"role": "user", "content": "hi"}),
+                                     json.dumps({"role": "user", "content": "hi"}).encode()])
+    def test_decode_WhenLegacyJson_ReadsIt(self, raw):
+        # Act
+        result = SessionCodec("msgpack").decode(raw)
+
+        # Assert
+        assert result == {"role": "user", "content": "hi"}
+
+    @pytest.mark.parametrize("raw", [b"{bad json", b"\x01\xc1", b"\x02garbage", b"\x7f\x00"])
+    def test_decode_WhenCorrupt_RaisesSessionDecodeError(self, raw):
+        # Act & Assert
+        with pytest.raises(SessionDecodeError):
+            SessionCodec("msgpack").decode(raw)
+
+    @pytest.mark.parametrize("code", [3, 99, -1])
+    def test_decode_WhenRoleCodeUnknown_RaisesSessionDecodeError(self, code):
+        # Arrange
+        raw = bytes([FORMAT_MSGPACK]) + msgpack.packb([code, "hi", None])
+
+        # Act & Assert
+        with pytest.raises(SessionDecodeError):
+            SessionCodec("msgpack").decode(raw)
+
+    def test_decode_WhenMsgpackMissing_RaisesChatErrorWithoutCorruption(self):
+        # Arrange
+        raw = SessionCodec("msgpack").encode({"role": "user", "content": "hi", "tokens": 5})
+
+        # Act & Assert
+        with patch("app.chat.repository.session_codec.msgpack", None):
+            with pytest.raises(ChatError) as exc:
+                SessionCodec("json").decode(raw)
+        assert not isinstance(exc.value, SessionDecodeError)
+
+    @patch("app.chat.repository.chat_repository.get_redis")
+    async def test_getSession_WhenFormatsMixed_ReadsAll(self, mock_get_redis):
+        # Arrange
+        codec = SessionCodec("msgpack", "zstd", compress_min_bytes=64)
+        fake_redis = AsyncMock()
+        mock_get_redis.return_value = fake_redis
+        fake_redis.lrange.return_value = [
+            json.dumps({"role": "user", "content": "hi"}).encode(),
+            codec.encode(ChatMessage(role="assistant", content=LONG).model_dump()),
+        ]
+
+        # Act
+        session = await ChatRepository(codec).get_session("u1")
+
+        # Assert
+        mock_get_redis.assert_awaited_once_with(binary=True)
+        assert [m.content for m in session.history] == ["hi", LONG]
+
+    @patch("app.chat.repository.session_migrator.get_redis")
+    async def test_migrateKey_WhenLegacyEntries_RewritesInTargetFormat(self, mock_get_redis):
+        # Arrange
+        codec = SessionCodec("msgpack", "none")
+        fake_pipe = _watch_pipeline([json.dumps({"role": "user", "content": "hi"}).encode()])
+        fake_redis = AsyncMock()
+        fake_redis.pipeline = MagicMock(return_value=fake_pipe)
+        mock_get_redis.return_value = fake_redis
+
+        # Act
+        migrated = await SessionMigrator(ChatRepository(codec)).migrate_key(b"chat_session:u1")
+
+        # Assert
+        assert migrated is True
+        fake_pipe.delete.assert_called_once_with(b"chat_session:u1")
+        (key, encoded), _ = fake_pipe.rpush.call_args
+        assert encoded[0] == FORMAT_MSGPACK
+        assert codec.decode(encoded)["content"] == "hi"
+
+    @patch("app.chat.repository.session_migrator.get_redis")
+    async def test_migrateKey_WhenAlreadyCurrent_LeavesKeyAlone(self, mock_get_redis):
+        # Arrange
+        codec = SessionCodec("msgpack", "none")
+        fake_pipe = _watch_pipeline([codec.encode({"role": "user", "content": "hi", "tokens": 5})])
+        fake_redis = AsyncMock()
+        fake_redis.pipeline = MagicMock(return_value=fake_pipe)
+        mock_get_redis.return_value = fake_redis
+
+        # Act
+        migrated = await SessionMigrator(ChatRepository(codec)).migrate_key(b"chat_session:u1")
+
+        # Assert
+        assert migrated is False
+        fake_pipe.unwatch.assert_awaited_once()
+        fake_pipe.execute.assert_not_awaited()
+
+    @patch("app.chat.repository.session_migrator.get_redis")
+    async def test_rekey_WhenLegacyKey_MovesHistoryInFrontOfNewerWrites(self, mock_get_redis):
+        # Arrange
+        old = [b"a", b"b"]
+        fake_pipe = _watch_pipeline(old)
+        fake_redis = AsyncMock()
+        fake_redis.pipeline = MagicMock(return_value=fake_pipe)
+        fake_redis.exists.return_value = 1
+        mock_get_redis.return_value = fake_redis
+
+        # Act
+        new_key = await SessionMigrator(ChatRepository()).rekey(b"chat_session:u1", "u1")
+
+        # Assert
+        assert new_key == "chat_session:{u1}"
+        fake_pipe.watch.assert_awaited_once_with(b"chat_session:u1", "chat_session:{u1}")
+        fake_pipe.lpush.assert_called_once_with("chat_session:{u1}", b"b", b"a")
+        fake_pipe.delete.assert_called_once_with(b"chat_session:u1", "chat_session_version:u1")
+        fake_pipe.incr.assert_called_once_with("chat_session_version:{u1}")
+
+
+def _watch_pipeline(entries):
+    fake_pipe = MagicMock()
+    fake_pipe.watch = AsyncMock()
+    fake_pipe.unwatch = AsyncMock()
+    fake_pipe.lrange = AsyncMock(return_value=entries)
+    fake_pipe.execute = AsyncMock(return_value=[1, len(entries)])
+    fake_pipe.__aenter__ = AsyncMock(return_value=fake_pipe)
+    fake_pipe.__aexit__ = AsyncMock(return_value=None)
+    return fake_pipe
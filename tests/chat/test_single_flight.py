@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from unittest.mock import Mock
+from app.chat.adapters.single_flight import SingleFlight, request_key
+from common.exceptions.chat_exceptions import LLMError
+
+@pytest.mark.asyncio
+class TestSingleFlight:
+
+    def test_requestKey_WhenPayloadDiffers_ReturnsDifferentKeys(self):
+        # Arrange
+        messages = [{"role": "user", "content": "hi"}]
+
+        # Act & Assert
+        assert request_key("m", messages) == request_key("m", [{"role": "user", "content": "hi"}])
+        assert request_key("m", messages) != request_key("m", [{"role": "user", "content": "Hi"}])
+        assert request_key("m", messages) != request_key("other", messages)
+
+    async def test_do_WhenConcurrentIdenticalCalls_RunsUpstreamOnce(self):
+        # Arrange
+        flight = SingleFlight()
+        release = asyncio.Event()
+        upstream = Mock()
+
+        async def call():
+            upstream()
+            await release.wait()
+            return "reply"
+
+        # Act
+        waiters = [asyncio.ensure_future(flight.do("k", call)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        # Assert
+        assert results == ["reply"] * 5
+        upstream.assert_called_once()
+        assert flight.stats()["shared_calls"] == 4
+        assert flight.stats()["in_flight_calls"] == 0
+
+    async def test_do_WhenOneCallerCancelled_OthersStillGetResult(self):
+        # Arrange
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            return "reply"
+
+        first = asyncio.ensure_future(flight.do("k", call))
+        second = asyncio.ensure_future(flight.do("k", call))
+        await asyncio.sleep(0)
+
+        # Act
+        first.cancel()
+        release.set()
+
+        # Assert
+        assert await second == "reply"
+
+    async def test_stream_WhenLateJoiner_ReplaysEmittedTokens(self):
+        # Arrange
+        flight = SingleFlight()
+        step = asyncio.Event()
+        starts = []
+
+        async def upstream():
+            starts.append(1)
+            yield "a"
+            yield "b"
+            await step.wait()
+            yield "c"
+
+        async def collect():
+            return [t async for t in flight.stream("k", upstream)]
+
+        early = asyncio.ensure_future(collect())
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        # Act: join after "a" and "b" were already emitted
+        late = asyncio.ensure_future(collect())
+        await asyncio.sleep(0)
+        step.set()
+
+        # Assert
+        assert await early == ["a", "b", "c"]
+        assert await late == ["a", "b", "c"]
+        assert starts == [1]
+        assert flight.stats()["shared_streams"] == 1
+
+    async def test_stream_WhenUpstreamFails_RaisesForEverySubscriber(self):
+        # Arrange
+        flight = SingleFlight()
+
+        async def upstream():
+            yield "partial"
+            raise LLMError("boom")
+
+        async def collect():
+            return [t async for t in flight.stream("k", upstream)]
+
+        # Act
+        results = await asyncio.gather(collect(), collect(), return_exceptions=True)
+
+        # Assert
+        assert all(isinstance(r, LLMError) for r in results)
+        assert flight.stats()["in_flight_streams"] == 0
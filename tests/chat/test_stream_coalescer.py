@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from app.chat.service.stream_coalescer import coalesce_tokens
+
+async def _tokens(values, gap: float = 0):
+    for v in values:
+        if gap:
+            await asyncio.sleep(gap)
+        yield v
+
+@pytest.mark.asyncio
+class TestStreamCoalescer:
+
+    async def test_coalesceTokens_WhenTokensArriveTogether_EmitsOneFrame(self):
+        # Act
+        frames = [f async for f in coalesce_tokens(_tokens(["a", "b", "c"]), max_bytes=100, max_delay=0.05)]
+
+        # Assert
+        assert frames == ["abc"]
+
+    async def test_coalesceTokens_WhenMaxBytesReached_SplitsFrames(self):
+        # Act
+        frames = [f async for f in coalesce_tokens(_tokens(["ab", "cd", "ef"]), max_bytes=4, max_delay=0.05)]
+
+        # Assert
+        assert frames == ["abcd", "ef"]
+
+    async def test_coalesceTokens_WhenUpstreamPauses_FlushesAfterMaxDelay(self):
+        # Arrange
+        async def slow():
+            yield "a"
+            await asyncio.sleep(0.1)
+            yield "b"
+
+        # Act
+        frames = [f async for f in coalesce_tokens(slow(), max_bytes=100, max_delay=0.01)]
+
+        # Assert
+        assert frames == ["a", "b"]
+
+    async def test_coalesceTokens_WhenDelayDisabled_PassesTokensThrough(self):
+        # Act
+        frames = [f async for f in coalesce_tokens(_tokens(["a", "b"]), max_bytes=100, max_delay=0)]
+
+        # Assert
+        assert frames == ["a", "b"]
+
+    async def test_coalesceTokens_WhenUpstreamFails_FlushesThenRaises(self):
+        # Arrange
+        async def failing():
+            yield "a"
+            raise RuntimeError("boom")
+
+        frames = []
+
+        # Act & Assert
+        with pytest.raises(RuntimeError):
+            async for f in coalesce_tokens(failing(), max_bytes=100, max_delay=0.05):
+                frames.append(f)
+        assert frames == ["a"]
+
+    async def test_coalesceTokens_WhenConsumerStops_CancelsUpstream(self):
+        # Arrange
+        closed = asyncio.Event()
+
+        async def endless():
+            try:
+                while True:
+                    yield "x"
+                    await asyncio.sleep(0.001)
+            finally:
+                closed.set()
+
+        # Act
+        gen = coalesce_tokens(endless(), max_bytes=1, max_delay=0.05)
+        assert await gen.__anext__() == "x"
+        await gen.aclose()
+
+        # Assert
+        assert closed.is_set()
+
+    async def test_coalesceTokens_WhenConsumerIsSlow_ReadsAtMostMaxPendingAhead(self):
+        # Arrange
+        produced = 0
+
+        async def endless():
+            nonlocal produced
+            while True:
+                produced += 1
+                yield "x"
+                await asyncio.sleep(0)
+
+        gen = coalesce_tokens(endless(), max_bytes=1, max_delay=0.05, max_pending=4)
+
+        # Act
+        assert await gen.__anext__() == "x"
+        await asyncio.sleep(0.05)  # the client stalls while the upstream could run ahead
+        await gen.aclose()
+
+        # Assert: one token delivered, four queued, one held by the blocked put
+        assert produced <= 1 + 4 + 1
@@ -0,0 +1,57 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+from app.chat.models.chat_models import ChatMessage
+from app.chat.repository.chat_repository import MAX_HISTORY
+from app.chat.service.websocket_session import WebSocketSession
+
+def _repo(history, version, append_versions):
+    repo = Mock()
+    repo.get_session_versioned = AsyncMock(return_value=(Mock(history=list(history)), version))
+    repo.append_messages = AsyncMock(side_effect=append_versions)
+    return repo
+
+@pytest.mark.asyncio
+class TestWebSocketSession:
+
+    async def test_append_WhenNoOtherWriter_ExtendsLocallyWithoutReading(self):
+        # Arrange
+        repo = _repo([ChatMessage(role="user", content="old")], 7, [8, 9])
+        session = WebSocketSession(repo, "u1")
+
+        # Act
+        await session.append(ChatMessage(role="user", content="a"))
+        history = await session.append(ChatMessage(role="assistant", content="b"))
+
+        # Assert
+        assert [m.content for m in history] == ["old", "a", "b"]
+        repo.get_session_versioned.assert_awaited_once_with("u1")
+        assert session.version == 9
+        assert session.resyncs == 0
+
+    async def test_append_WhenAnotherWriterBumpedVersion_Reloads(self):
+        # Arrange
+        repo = _repo([], 0, [1, 3])
+        session = WebSocketSession(repo, "u1")
+        await session.append(ChatMessage(role="user", content="a"))
+        repo.get_session_versioned.return_value = (Mock(history=[ChatMessage(role="user", content="fresh")]), 3)
+
+        # Act
+        history = await session.append(ChatMessage(role="user", content="b"))
+
+        # Assert
+        assert [m.content for m in history] == ["fresh"]
+        assert repo.get_session_versioned.await_count == 2
+        assert session.version == 3
+        assert session.resyncs == 1
+
+    async def test_append_WhenHistoryFull_TrimsLikeRedis(self):
+        # Arrange
+        full = [ChatMessage(role="user", content=str(i)) for i in range(MAX_HISTORY)]
+        session = WebSocketSession(_repo(full, 1, [2]), "u1")
+
+        # Act
+        history = await session.append(ChatMessage(role="user", content="new"))
+
+        # Assert
+        assert len(history) == MAX_HISTORY
+        assert history[0].content == "1" and history[-1].content == "new"
@@ -0,0 +1,55 @@
+import pytest
+import httpx
+from common.clients import http_manager
+from common.clients.http_manager import init_http_client, get_http_client, close_http_client, get_http_pool_stats
+from common.config.config import settings
+from common.exceptions.infra_exceptions import HttpClientError
+
+@pytest.mark.asyncio
+class TestHttpManager:
+
+    def teardown_method(self):
+        http_manager._http_client = None
+
+    async def test_getHttpClient_WhenNotInitialized_RaisesHttpClientError(self):
+        # Act & Assert
+        with pytest.raises(HttpClientError):
+            await get_http_client()
+
+    async def test_initHttpClient_WhenCalledTwice_ReturnsSameClient(self):
+        # Act
+        first = await init_http_client()
+        second = await init_http_client()
+
+        # Assert
+        assert first is second
+        assert await get_http_client() is first
+        assert isinstance(first, httpx.AsyncClient)
+        assert first.timeout.connect == settings.LLM_HTTP_CONNECT_TIMEOUT
+        assert first.timeout.read == settings.LLM_HTTP_READ_TIMEOUT
+        await close_http_client()
+
+    async def test_closeHttpClient_WhenInitialized_ResetsGlobal(self):
+        # Arrange
+        client = await init_http_client()
+
+        # Act
+        await close_http_client()
+
+        # Assert
+        assert client.is_closed
+        assert http_manager._http_client is None
+
+    async def test_getHttpPoolStats_WhenInitialized_ReportsLimitsAndEmptyPool(self):
+        # Arrange
+        await init_http_client()
+
+        # Act
+        stats = get_http_pool_stats()
+
+        # Assert
+        assert stats["initialized"] is True
+        assert stats["max_connections"] == settings.LLM_HTTP_MAX_CONNECTIONS
+        assert stats["open"] == 0
+        assert stats["active"] == 0
+        await close_http_client()
@@ -0,0 +1,166 @@
+import json
+import logging
+import queue
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from common.logging.logger import (
+    ContextFilter, JsonFormatter, NonBlockingQueueHandler, RepeatFilter, SamplingFilter, request_id_var, user_id_var,
+)
+from common.logging.middleware import init_request_context
+
+def make_record(name: str = "app.test", level: int = logging.INFO, msg: str = "hello %s", args=("world",),
+                lineno: int = 10) -> logging.LogRecord:
+    return logging.LogRecord(name, level, "/src/app/test.py", lineno, msg, args, None)
+
+class TestSamplingFilter:
+
+    def test_filter_WhenRateIsTenth_KeepsOneInTen(self):
+        # Arrange
+        sampler = SamplingFilter({"app.chat": 0.1})
+
+        # Act
+        kept = sum(sampler.filter(make_record("app.chat.service")) for _ in range(100))
+
+        # Assert
+        assert kept == 10
+
+    def test_filter_WhenWarning_AlwaysKeeps(self):
+        # Arrange
+        sampler = SamplingFilter({"app": 0.0})
+
+        # Act & Assert
+        assert sampler.filter(make_record("app.x", level=logging.WARNING)) is True
+        assert sampler.filter(make_record("app.x", level=logging.INFO)) is False
+
+    def test_rateFor_WhenPrefixesOverlap_LongestWins(self):
+        # Arrange
+        sampler = SamplingFilter({"app": 0.5, "app.chat": 0.1})
+
+        # Act & Assert
+        assert sampler.rate_for("app.chat.service") == 0.1
+        assert sampler.rate_for("app.auth") == 0.5
+        assert sampler.rate_for("application") == 1.0
+
+
+class TestRepeatFilter:
+
+    def test_filter_WhenSameCallSiteStorms_PassesBurstThenSuppresses(self):
+        # Arrange
+        repeat = RepeatFilter(burst=3, window=60)
+
+        # Act
+        passed = [repeat.filter(make_record(level=logging.ERROR, args=(i,))) for i in range(10)]
+
+        # Assert
+        assert passed == [True] * 3 + [False] * 7
+
+    def test_filter_WhenWindowRolls_ReportsSuppressedCount(self):
+        # Arrange
+        repeat = RepeatFilter(burst=1, window=0)
+        repeat.window = 60
+        repeat.filter(make_record(level=logging.ERROR))
+        repeat.filter(make_record(level=logging.ERROR))
+        repeat.window = 0
+
+        # Act
+        record = make_record(level=logging.ERROR)
+        passed = repeat.filter(record)
+
+        # Assert
+        assert passed is True
+        assert record.suppressed == 1
+
+    def test_filter_WhenDifferentCallSites_CountsSeparately(self):
+        # Arrange
+        repeat = RepeatFilter(burst=1, window=60)
+
+        # Act & Assert
+        assert repeat.filter(make_record(level=logging.ERROR, lineno=1)) is True
+        assert repeat.filter(make_record(level=logging.ERROR, lineno=2)) is True
+
+    def test_filter_WhenInfo_NeverSuppresses(self):
+        # Arrange
+        repeat = RepeatFilter(burst=1, window=60)
+
+        # Act & Assert
+        assert all(repeat.filter(make_record()) for _ in range(5))
+
+
+class TestNonBlockingQueueHandler:
+
+    def test_handle_WhenQueueFull_DropsAndCountsWithoutBlocking(self):
+        # Arrange
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+
+        # Act
+        for _ in range(5):
+            handler.handle(make_record())
+
+        # Assert
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 3
+
+    def test_handle_WhenEnqueued_LeavesMessageUnformatted(self):
+        # Arrange
+        handler = NonBlockingQueueHandler(queue.Queue())
+
+        # Act
+        handler.handle(make_record())
+        record = handler.queue.get_nowait()
+
+        # Assert
+        assert record.msg == "hello %s"
+        assert record.args == ("world",)
+
+
+class TestJsonFormatter:
+
+    def test_format_WhenContextBound_IncludesCorrelationIds(self):
+        # Arrange
+        record = make_record()
+        request_token = request_id_var.set("req-1")
+        user_token = user_id_var.set("u1")
+        try:
+            ContextFilter().filter(record)
+        finally:
+            user_id_var.reset(user_token)
+            request_id_var.reset(request_token)
+
+        # Act
+        entry = json.loads(JsonFormatter().format(record))
+
+        # Assert
+        assert entry["message"] == "hello world"
+        assert entry["request_id"] == "req-1"
+        assert entry["user_id"] == "u1"
+        assert entry["level"] == "INFO"
+
+
+class TestRequestContextMiddleware:
+
+    def build_client(self) -> TestClient:
+        app = FastAPI()
+        init_request_context(app)
+
+        @app.get("/whoami")
+        async def whoami():
+            return {"request_id": request_id_var.get()}
+
+        return TestClient(app)
+
+    def test_request_WhenHeaderGiven_ReusesAndEchoesIt(self):
+        # Act
+        response = self.build_client().get("/whoami", headers={"X-Request-ID": "abc-123"})
+
+        # Assert
+        assert response.json() == {"request_id": "abc-123"}
+        assert response.headers["x-request-id"] == "abc-123"
+
+    def test_request_WhenHeaderMalformed_GeneratesNewId(self):
+        # Act
+        response = self.build_client().get("/whoami", headers={"X-Request-ID": "bad id\twith spaces"})
+
+        # Assert
+        request_id = response.json()["request_id"]
+        assert request_id and request_id != "bad id\twith spaces"
+        assert response.headers["x-request-id"] == request_id
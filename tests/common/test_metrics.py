@@ -0,0 +1,123 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from common.metrics.middleware import HTTP_REQUEST_SECONDS, init_metrics
+from common.metrics.registry import CONTENT_TYPE, Counter, Gauge, Histogram, Registry
+
+class TestRegistry:
+
+    def test_render_WhenHistogramObserved_EmitsCumulativeBucketsSumAndCount(self):
+        # Arrange
+        registry = Registry()
+        histogram = Histogram("op_seconds", "Op latency.", ["op"], buckets=(0.1, 1.0), registry=registry)
+        child = histogram.labels("get")
+
+        # Act
+        for value in (0.05, 0.5, 0.5, 5.0):
+            child.observe(value)
+        text = registry.render()
+
+        # Assert
+        assert "# TYPE op_seconds histogram" in text
+        assert 'op_seconds_bucket{op="get",le="0.1"} 1' in text
+        assert 'op_seconds_bucket{op="get",le="1"} 3' in text
+        assert 'op_seconds_bucket{op="get",le="+Inf"} 4' in text
+        assert 'op_seconds_sum{op="get"} 6.05' in text
+        assert 'op_seconds_count{op="get"} 4' in text
+
+    def test_render_WhenLabelValueHasQuotes_EscapesThem(self):
+        # Arrange
+        registry = Registry()
+        Counter("errors_total", "Errors.", ["kind"], registry=registry).labels('say "hi"\n').inc()
+
+        # Act
+        text = registry.render()
+
+        # Assert
+        assert 'errors_total{kind="say \\"hi\\"\\n"} 1' in text
+
+    def test_render_WhenGaugeHasFunction_ReadsItAtScrapeTime(self):
+        # Arrange
+        registry = Registry()
+        state = {"value": 3}
+        Gauge("queued", "Queued.", registry=registry).labels().set_function(lambda: state["value"])
+        state["value"] = 7
+
+        # Act
+        text = registry.render()
+
+        # Assert
+        assert "queued 7" in text
+
+    def test_render_WhenCallbackRaises_SkipsOnlyThatSample(self):
+        # Arrange
+        registry = Registry()
+        Gauge("broken", "Broken.", registry=registry).labels().set_function(lambda: 1 / 0)
+        Counter("ok_total", "Fine.", registry=registry).labels().inc(2)
+
+        # Act
+        text = registry.render()
+
+        # Assert
+        assert "ok_total 2" in text
+        assert not any(line.startswith("broken ") for line in text.splitlines())
+
+    def test_labels_WhenWrongLabelCount_RaisesValueError(self):
+        # Arrange
+        counter = Counter("calls_total", "Calls.", ["model", "mode"], registry=Registry())
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            counter.labels("llama3")
+
+    def test_labels_WhenSameValues_ReturnsSameChild(self):
+        # Arrange
+        counter = Counter("calls_total", "Calls.", ["model"], registry=Registry())
+
+        # Act & Assert
+        assert counter.labels("llama3") is counter.labels("llama3")
+
+    def test_register_WhenNameTaken_RaisesValueError(self):
+        # Arrange
+        registry = Registry()
+        Counter("calls_total", "Calls.", registry=registry)
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            Gauge("calls_total", "Calls again.", registry=registry)
+
+
+class TestMetricsMiddleware:
+
+    def test_request_WhenRouteHasPathParam_LabelsByTemplate(self):
+        # Arrange
+        app = FastAPI()
+        init_metrics(app)
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: str):
+            return {"id": item_id}
+
+        client = TestClient(app)
+        before = HTTP_REQUEST_SECONDS.labels("GET", "/items/{item_id}", "200").count
+
+        # Act
+        client.get("/items/1")
+        client.get("/items/2")
+
+        # Assert
+        assert HTTP_REQUEST_SECONDS.labels("GET", "/items/{item_id}", "200").count == before + 2
+
+    def test_metrics_WhenScraped_ReturnsPrometheusText(self):
+        # Arrange
+        app = FastAPI()
+        init_metrics(app)
+        client = TestClient(app)
+
+        # Act
+        response = client.get("/metrics")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"] == CONTENT_TYPE
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
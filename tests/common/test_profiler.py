@@ -0,0 +1,227 @@
+import pstats
+import time
+import tracemalloc
+from unittest.mock import patch
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from common.exceptions.exception_handlers import register_exception_handlers
+from common.profiling import middleware
+from common.profiling.middleware import ProfilingMiddleware, init_profiling
+from common.profiling.profiler import Profiler, profile_token, sign_token, verify_token
+
+SECRET = "profiling-test-secret"
+
+def valid_token(ttl: int = 60) -> str:
+    return sign_token(SECRET, int(time.time()) + ttl)
+
+def build_profiler(**kwargs) -> Profiler:
+    options = dict(enabled=True, secret=SECRET, sample_rate=0.0, max_profiles=5, top=10, token_max_ttl=3600)
+    options.update(kwargs)
+    return Profiler(**options)
+
+class TestProfileToken:
+
+    def test_verifyToken_WhenSignedAndUnexpired_ReturnsTrue(self):
+        # Act & Assert
+        assert verify_token(SECRET, valid_token(), max_ttl=3600) is True
+
+    def test_verifyToken_WhenExpired_ReturnsFalse(self):
+        # Arrange
+        token = sign_token(SECRET, int(time.time()) - 1)
+
+        # Act & Assert
+        assert verify_token(SECRET, token, max_ttl=3600) is False
+
+    def test_verifyToken_WhenExpiryBeyondMaxTtl_ReturnsFalse(self):
+        # Arrange
+        token = valid_token(ttl=7200)
+
+        # Act & Assert
+        assert verify_token(SECRET, token, max_ttl=3600) is False
+
+    def test_verifyToken_WhenSignedWithOtherSecret_ReturnsFalse(self):
+        # Arrange
+        token = sign_token("another-secret", int(time.time()) + 60)
+
+        # Act & Assert
+        assert verify_token(SECRET, token, max_ttl=3600) is False
+
+    def test_verifyToken_WhenNoSecretConfigured_ReturnsFalse(self):
+        # Act & Assert
+        assert verify_token("", valid_token(), max_ttl=3600) is False
+
+    def test_profileToken_WhenOnlyQueryParam_ReturnsIt(self):
+        # Act & Assert
+        assert profile_token({}, {"profile": "abc"}) == "abc"
+
+
+class TestProfiler:
+
+    def test_cpu_WhenDisabled_YieldsNoneAndStoresNothing(self):
+        # Arrange
+        profiler = build_profiler(enabled=False)
+
+        # Act
+        with profiler.cpu("http", valid_token()) as profile:
+            pass
+
+        # Assert
+        assert profile is None
+        assert len(profiler.store) == 0
+
+    def test_cpu_WhenTokenValid_StoresReportAndLoadableStats(self, tmp_path):
+        # Arrange
+        profiler = build_profiler()
+
+        # Act
+        with profiler.cpu("http", valid_token(), path="/chat/message") as profile:
+            sorted(range(10000), key=lambda x: -x)
+
+        # Assert
+        stored = profiler.store.get(profile["id"])
+        assert stored["path"] == "/chat/message"
+        assert "function calls" in stored["report"]
+        path = tmp_path / "out.prof"
+        path.write_bytes(stored["pstats"])
+        assert pstats.Stats(str(path)).total_calls > 0
+
+    def test_cpu_WhenTokenMissingAndNotSampled_YieldsNone(self):
+        # Arrange
+        profiler = build_profiler()
+
+        # Act
+        with profiler.cpu("http", None) as profile:
+            pass
+
+        # Assert
+        assert profile is None
+
+    def test_cpu_WhenSampleRateIsOne_ProfilesWithoutToken(self):
+        # Arrange
+        profiler = build_profiler(sample_rate=1.0)
+
+        # Act
+        with profiler.cpu("http") as profile:
+            pass
+
+        # Assert
+        assert profile is not None
+        assert profiler.captured == 1
+
+    def test_cpu_WhenCaptureAlreadyRunning_SkipsNested(self):
+        # Arrange
+        profiler = build_profiler()
+
+        # Act
+        with profiler.cpu("http", valid_token()) as outer:
+            with profiler.cpu("http", valid_token()) as inner:
+                pass
+
+        # Assert
+        assert outer is not None
+        assert inner is None
+        assert profiler.skipped == 1
+
+    def test_memory_WhenBlockAllocates_ReportsGrowthAndStopsTracing(self):
+        # Arrange
+        profiler = build_profiler()
+        kept = []
+
+        # Act
+        with profiler.memory("websocket", valid_token()) as profile:
+            kept.append([bytearray(1024) for _ in range(200)])
+
+        # Assert
+        assert profile["net_kb"] > 100
+        assert profile["top_allocations"][0]["size_diff_kb"] > 100
+        assert not tracemalloc.is_tracing()
+
+    def test_store_WhenOverCapacity_EvictsOldest(self):
+        # Arrange
+        profiler = build_profiler(max_profiles=2)
+
+        # Act
+        ids = []
+        for _ in range(3):
+            with profiler.cpu("http", valid_token()) as profile:
+                ids.append(profile["id"])
+
+        # Assert
+        assert [p["id"] for p in profiler.store.list()] == [ids[2], ids[1]]
+
+
+class TestProfilingMiddleware:
+
+    @pytest.fixture
+    def client(self):
+        profiler = build_profiler()
+        app = FastAPI()
+        register_exception_handlers(app)
+        with patch.object(middleware, "profiler", profiler):
+            init_profiling(app)
+
+            @app.get("/items/{item_id}")
+            async def item(item_id: str):
+                return {"id": item_id}
+
+            yield TestClient(app), profiler
+
+    def test_request_WhenTokenValid_ReturnsProfileIdAndRoute(self, client):
+        # Arrange
+        client, profiler = client
+
+        # Act
+        response = client.get("/items/1", headers={"X-Profile": valid_token()})
+
+        # Assert
+        profile = profiler.store.get(response.headers["x-profile-id"])
+        assert profile["route"] == "/items/{item_id}"
+        assert profile["status"] == 200
+
+    def test_request_WhenTokenInvalid_IsNotProfiled(self, client):
+        # Arrange
+        client, profiler = client
+
+        # Act
+        response = client.get("/items/1", headers={"X-Profile": "123.bogus"})
+
+        # Assert
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+        assert len(profiler.store) == 0
+
+    def test_admin_WhenNoToken_Returns403(self, client):
+        # Arrange
+        client, _ = client
+
+        # Act
+        response = client.get("/admin/profiles")
+
+        # Assert
+        assert response.status_code == 403
+
+    def test_admin_WhenTokenValid_ListsAndServesProfiles(self, client):
+        # Arrange
+        client, _ = client
+        profile_id = client.get("/items/1", headers={"X-Profile": valid_token()}).headers["x-profile-id"]
+
+        # Act
+        listing = client.get("/admin/profiles", headers={"X-Profile": valid_token()})
+        raw = client.get(f"/admin/profiles/{profile_id}/pstats", headers={"X-Profile": valid_token()})
+
+        # Assert
+        assert [p["id"] for p in listing.json()["profiles"]] == [profile_id]
+        assert raw.headers["content-type"] == "application/octet-stream"
+
+    def test_initProfiling_WhenDisabled_InstallsNothing(self):
+        # Arrange
+        app = FastAPI()
+
+        # Act
+        with patch.object(middleware, "profiler", build_profiler(enabled=False)):
+            init_profiling(app)
+
+        # Assert
+        assert all(m.cls is not ProfilingMiddleware for m in app.user_middleware)
+        assert all(not getattr(r, "path", "").startswith("/admin") for r in app.routes)
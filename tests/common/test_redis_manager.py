@@ -0,0 +1,95 @@
+import pytest
+from unittest.mock import patch
+from redis.asyncio import BlockingConnectionPool
+from redis.asyncio.cluster import RedisCluster
+from redis.crc import key_slot
+from common.clients import redis_manager
+from common.clients.redis_manager import (
+    BlockingSentinelConnectionPool, get_redis, init_redis, parse_sentinels, user_key,
+)
+from common.config.config import settings
+from common.exceptions.infra_exceptions import RedisError
+
+@pytest.mark.asyncio
+class TestRedisManager:
+
+    def teardown_method(self):
+        redis_manager._redis = None
+        redis_manager._redis_binary = None
+        redis_manager._sentinel = None
+
+    async def test_getRedis_WhenNotInitialized_RaisesRedisError(self):
+        # Act & Assert
+        with pytest.raises(RedisError):
+            await get_redis()
+
+    async def test_initRedis_WhenStandalone_UsesBlockingPoolFromSettings(self):
+        # Act
+        with patch.object(settings, "REDIS_MAX_CONNECTIONS", 7), patch.object(settings, "REDIS_POOL_TIMEOUT", 1.5):
+            await init_redis()
+        client = await get_redis(binary=True)
+
+        # Assert
+        pool = client.connection_pool
+        assert isinstance(pool, BlockingConnectionPool)
+        assert pool.max_connections == 7
+        assert pool.timeout == 1.5
+        assert pool.connection_kwargs["socket_keepalive"] == settings.REDIS_SOCKET_KEEPALIVE
+        assert pool.connection_kwargs["health_check_interval"] == settings.REDIS_HEALTH_CHECK_INTERVAL
+        assert pool.connection_kwargs["decode_responses"] is False
+
+    async def test_initRedis_WhenSentinel_DiscoversMasterThroughBlockingPool(self):
+        # Act
+        with patch.object(settings, "REDIS_MODE", "sentinel"), \
+                patch.object(settings, "REDIS_SENTINELS", ["s1:26379", "s2:26379"]), \
+                patch.object(settings, "REDIS_URL", "redis://:secret@ignored:6379/2"):
+            await init_redis()
+        client = await get_redis()
+
+        # Assert
+        pool = client.connection_pool
+        assert isinstance(pool, BlockingSentinelConnectionPool)
+        assert pool.service_name == settings.REDIS_SENTINEL_MASTER
+        assert pool.connection_kwargs["password"] == "secret"
+        assert pool.connection_kwargs["db"] == 2
+        assert len(redis_manager._sentinel.sentinels) == 2
+
+    async def test_initRedis_WhenCluster_CreatesClusterClient(self):
+        # Act
+        with patch.object(settings, "REDIS_MODE", "cluster"), \
+                patch.object(settings, "REDIS_URL", "redis://node1:7000"):
+            await init_redis()
+
+        # Assert
+        assert isinstance(await get_redis(), RedisCluster)
+        assert isinstance(await get_redis(binary=True), RedisCluster)
+
+    async def test_initRedis_WhenUnknownMode_RaisesValueError(self):
+        # Act & Assert
+        with patch.object(settings, "REDIS_MODE", "replicated"), pytest.raises(ValueError):
+            await init_redis()
+
+
+class TestBlockingSentinelConnectionPool:
+
+    def test_getConnection_ComesFromBlockingPool(self):
+        # Assert
+        assert BlockingSentinelConnectionPool.get_connection is BlockingConnectionPool.get_connection
+        assert BlockingSentinelConnectionPool.release is BlockingConnectionPool.release
+
+
+class TestKeys:
+
+    def test_userKey_WhenBuilt_HashTagsTheUser(self):
+        # Act & Assert
+        assert user_key("chat_session:", "u1") == "chat_session:{u1}"
+
+    def test_userKey_WhenDifferentPrefixes_MapToSameClusterSlot(self):
+        # Act & Assert
+        assert key_slot(user_key("chat_session:", "u1").encode()) == key_slot(user_key("rate_limit:gcra:", "u1").encode())
+
+    def test_parseSentinels_WhenMalformed_RaisesValueError(self):
+        # Act & Assert
+        assert parse_sentinels(["a:1", "b:2"]) == [("a", 1), ("b", 2)]
+        with pytest.raises(ValueError):
+            parse_sentinels(["no-port"])
@@ -0,0 +1,52 @@
+import json
+import pytest
+from app.chat.models.chat_models import ChatMessage, StreamChunk
+from common.serialization.serializer import (
+    JsonSerializer, OrjsonSerializer, StreamFrames, build_serializer, orjson,
+)
+
+CODECS = [JsonSerializer()] + ([OrjsonSerializer()] if orjson is not None else [])
+
+class TestSerializer:
+
+    @pytest.mark.parametrize("codec", CODECS, ids=lambda c: c.name)
+    def test_dumps_WhenMessageRoundTrips_ReturnsSameMessage(self, codec):
+        # Arrange
+        message = ChatMessage(role="user", content="héllo \"world\"\n")
+
+        # Act
+        restored = ChatMessage(**codec.loads(codec.dumps(message.model_dump())))
+
+        # Assert
+        assert restored == message
+
+    @pytest.mark.parametrize("codec", CODECS, ids=lambda c: c.name)
+    def test_loads_WhenDataWrittenByStdlibJson_ParsesIt(self, codec):
+        # Arrange
+        legacy = json.dumps({"role": "assistant", "content": "hi"})
+
+        # Act & Assert
+        assert codec.loads(legacy) == {"role": "assistant", "content": "hi"}
+
+    @pytest.mark.parametrize("codec", CODECS, ids=lambda c: c.name)
+    def test_loads_WhenInputCorrupt_RaisesJSONDecodeError(self, codec):
+        # Act & Assert
+        with pytest.raises(json.JSONDecodeError):
+            codec.loads("{not json")
+
+    def test_buildSerializer_WhenUnknownName_RaisesValueError(self):
+        # Act & Assert
+        with pytest.raises(ValueError):
+            build_serializer("yaml")
+        assert build_serializer("json").name == "json"
+
+    @pytest.mark.parametrize("codec", CODECS, ids=lambda c: c.name)
+    @pytest.mark.parametrize("token", ["hi", "", "quote\" and \\ slash", "naïve 🙂", "line\nbreak"])
+    def test_chunk_WhenEncoded_MatchesStreamChunkModel(self, codec, token):
+        # Arrange
+        frames = StreamFrames(codec)
+
+        # Act & Assert
+        assert json.loads(frames.chunk(token)) == StreamChunk(token=token).model_dump()
+        assert json.loads(frames.chunk_text(token)) == StreamChunk(token=token).model_dump()
+        assert json.loads(frames.final_text) == StreamChunk(token="", is_final=True).model_dump()
@@ -0,0 +1,81 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.chat.api import routers
+from common.profiling.startup import StartupReport
+
+class TestStartupReport:
+
+    def test_snapshot_WhenPhasesRecorded_SumsTotalInMilliseconds(self):
+        # Arrange
+        report = StartupReport()
+        report.record("imports", 0.2)
+        report.record("redis", 0.05)
+
+        # Act
+        snapshot = report.snapshot()
+
+        # Assert
+        assert snapshot["total_ms"] == 250.0
+        assert snapshot["phases"] == [{"name": "imports", "ms": 200.0}, {"name": "redis", "ms": 50.0}]
+        assert snapshot["ready"] is False
+
+    def test_phase_WhenBodyRaises_StillRecordsPhase(self):
+        # Arrange
+        report = StartupReport()
+
+        # Act
+        with pytest.raises(RuntimeError):
+            with report.phase("redis"):
+                raise RuntimeError("down")
+
+        # Assert
+        assert [p["name"] for p in report.snapshot()["phases"]] == ["redis"]
+
+    def test_log_MarksReady(self):
+        # Arrange
+        report = StartupReport()
+        report.record("imports", 0.1)
+
+        # Act
+        report.log()
+
+        # Assert
+        assert report.snapshot()["ready"] is True
+
+    def test_reset_ClearsPhasesAndReadiness(self):
+        # Arrange
+        report = StartupReport()
+        report.record("imports", 0.1)
+        report.log()
+
+        # Act
+        report.reset()
+
+        # Assert
+        assert report.snapshot() == {"total_ms": 0.0, "ready": False, "phases": []}
+
+class TestAppFactory:
+
+    def test_createApp_WhenCalled_DoesNotBuildServicesUntilStartup(self):
+        # Arrange
+        from app.main import create_app
+
+        # Act
+        app = create_app()
+
+        # Assert
+        assert routers.chat_service is None
+        assert "/chat/message" in app.openapi()["paths"]
+
+    @pytest.mark.parametrize("path", ["/ready", "/health/llm-backends", "/health/llm-circuit", "/health/llm-admission"])
+    def test_healthEndpoints_WhenChatServiceNotStarted_Return503(self, path):
+        # Arrange
+        from app.main import create_app
+        client = TestClient(create_app())  # not used as a context manager, so the lifespan never runs
+
+        # Act
+        response = client.get(path)
+
+        # Assert
+        assert response.status_code == 503
+        assert response.json() == {"ready": False}